@@ -1,23 +1,38 @@
+import argparse
 import json
 import os
 import re
+from bisect import bisect_left, insort
 from collections import defaultdict as ddict
-from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from time import time
-from warnings import simplefilter
+from time import monotonic, perf_counter, sleep, time
+from urllib.parse import urlsplit
 
-import openpyxl
-import requests
-from alive_progress import alive_bar
-
-from upload import Uploader
-from util.data_to_xlsx import DTX
+from upload import UPLOAD_MODES, Uploader
+from util.coach_pipeline import CoachPipeline
+from util.dns_cache import DNSCache
+from util.fingerprint import CONTENT_KB
+from util.metrics import PHASES, LatencyHistogram, MetricsCollector
+from util.probe_engine import ProbeEngine
+from util.probe_cache import ProbeCache
+from util.report_reader import EXTENSIONS, read_report
+from util.results import PROJECTS, Issue, SeekerResult
+from util.run_history import RunHistory
+from util.run_journal import RunJournal
+from util.scheduler import HostScheduler, cold_start
+from util.shards import parse_shard, shard_of
+from util.telemetry import Telemetry, progress_bar
+from util.timeouts import TimeoutPolicy
+from util.urls import canonicalize_url
 
 # Constants
 DIR = os.path.dirname(os.path.realpath(__file__))
 TARGET = os.path.join(DIR, 'target')
 RES = os.path.join(DIR, 'res')
+# the share of the deadline kept back from probing for writing the xlsx and json
+DEADLINE_RESERVE = 0.05
+# how long a delta run carries an unchanged url's healthy result before it's probed again
+DELTA_MAX_AGE = timedelta(days=7)
 
 class Not200Club:
     
@@ -26,7 +41,7 @@ class Not200Club:
         """
         The function `validate` checks if the necessary folders exist, if the target folder is not
         empty, if the first file in the target folder is not a `.DS_Store` file, and if the file in the
-        target folder is an `.xlsx` file.
+        target folder is an `.xlsx` or `.csv` file.
         """
         
         # Creating output(res) folder if it doesn't exist
@@ -49,11 +64,11 @@ class Not200Club:
             # check if empty again if we remove the ds_store
             empty_check()
             
-        # Checks that the target file is an xlsx file
-        if not os.listdir(TARGET)[0].endswith('.xlsx'):
-            raise Exception(f'INVALID FILE TYPE ERROR - The current file in the target folder is a bad type! it\'s not a xlsx file!\nTrying to read: ({os.listdir(TARGET)[0]})')
+        # Checks that the target file is an xlsx or csv file
+        if not os.listdir(TARGET)[0].lower().endswith(EXTENSIONS):
+            raise Exception(f'INVALID FILE TYPE ERROR - The current file in the target folder is a bad type! it\'s not a xlsx or csv file!\nTrying to read: ({os.listdir(TARGET)[0]})')
     
-    def __init__(self, timeout = None) -> None:
+    def __init__(self, timeout = None, concurrency = 256, probe_mode = 'light', host_limit = 32, cache_ttl = timedelta(0), delta = False, resume = False, shard = None, merge = False, deadline = None, warmup = True, warmup_delay = 5, upload_mode = 'document', metrics_port = None, metrics_file = None, metrics_host = '127.0.0.1', content_kb = 0) -> None:
         """
         The function initializes various data structures and variables for tracking statistics related
         to coaching sites and seekers.
@@ -62,13 +77,82 @@ class Not200Club:
         value for the instance. This value can be used to set a time limit for certain operations or
         processes within the class. If a timeout value is provided when initializing an instance of the
         class, it will be
+        :param concurrency: The `concurrency` parameter is the max number of urls that are probed at the
+        same time across every coach, defaults to 256
+        :param probe_mode: The `probe_mode` parameter picks how sites are checked, 'light' (pooled
+        keep-alive connections, HEAD first and time to first byte) or 'full' (a plain GET of the whole
+        page), defaults to 'light'
+        :param host_limit: The `host_limit` parameter is the most urls that are probed at the same time on
+        a single host or hosting platform (onrender.com, herokuapp.com...), the scheduler starts lower and
+        widens up to it while the host stays healthy, defaults to 32
+        :param cache_ttl: The `cache_ttl` parameter is how long a healthy result from an earlier run is
+        trusted for before the url is probed again, every other url is probed with the conditional
+        headers saved from its last healthy result, defaults to 0 (probe everything)
+        :param delta: The `delta` parameter turns on delta runs, only the seekers' projects that are new,
+        have a different url or coach, had issues in the last run, or weren't probed in `DELTA_MAX_AGE`
+        are probed, the rest carry their healthy result forward, defaults to False
+        :param resume: The `resume` parameter picks up the last run from its journal, only the urls that
+        weren't probed before it stopped are probed, a run that finished or started on another day is
+        never resumed, defaults to False
+        :param shard: The `shard` parameter is an (i, n) tuple that makes this run the i-th of n shards,
+        it only probes its share of the unique urls and writes their results to its shard file in the res
+        folder for a merge run to pick up, defaults to None (probe everything)
+        :param merge: The `merge` parameter makes this run combine the shard files of today's sharded run
+        into the usual xlsx and json, only urls that no shard has a result for are probed, defaults to False
+        :param deadline: The `deadline` parameter is the seconds the whole run has to finish in, urls that
+        aren't probed in time are reported as timeouts, defaults to None (no deadline)
+        :param warmup: The `warmup` parameter wakes every site on a platform that puts idle sites to sleep
+        (onrender.com, herokuapp.com...) with one request to all of them at once before they are probed,
+        so a cold start isn't reported as a slow site, defaults to True
+        :param warmup_delay: The `warmup_delay` parameter is the seconds to wait between waking the sites
+        up and probing them, defaults to 5
+        :param upload_mode: The `upload_mode` parameter is how the json is uploaded, 'document' for one
+        document with all of it or 'coaches' for a document per coach that changed, defaults to 'document'
+        :param metrics_port: The `metrics_port` parameter is the port the run's live telemetry is served
+        on at `/metrics` (in the Prometheus text format), defaults to None (not served)
+        :param metrics_file: The `metrics_file` parameter is a file the run's live telemetry is written to
+        every few seconds, for the node exporter's textfile collector, defaults to None (not written)
+        :param metrics_host: The `metrics_host` parameter is the address `/metrics` is served on, defaults
+        to '127.0.0.1' ('0.0.0.0' for it to be scraped from outside a container)
+        :param content_kb: The `content_kb` parameter turns on the content check, the first `content_kb` KB
+        of every page are read to catch the platform error pages (and empty pages) sites answer with a 200,
+        and their fingerprint is compared with the last run's to tell if the page changed, defaults to 0
+        (no content check)
         """
-        self.dtx = DTX()
+        self.__dtx = None
+        self.__prober = None
+        self.started_at = datetime.now()
         self.data = list()
-        self.sites_by_coach = ddict(lambda: ddict(dict))
-        self.all_coach_issues = dict()
+        self.seekers_by_coach = ddict(dict)
+        self.url_index = dict()
+        self.url_results = dict()
+        self.json_path = None
+        self.json_parts = dict()
+        self.sheets_written = list()
         self.timeout = timeout
+        self.concurrency = concurrency
+        self.dns = DNSCache()
+        self.probe_mode = probe_mode
+        self.scheduler = HostScheduler(max_per_host=host_limit)
+        self.cache_ttl = cache_ttl
+        self.delta = delta
+        self.resume = resume
+        self.shard = shard
+        self.merge = merge
+        self.deadline = deadline
+        self.deadline_at = None
+        self.timeouts = TimeoutPolicy(cap=timeout)
+        self.warmup = warmup
+        self.warmup_delay = warmup_delay
+        self.warmed = dict()
+        self.upload_mode = upload_mode
         self.total_seekers = 0
+        self.stage_times = dict()
+        self.telemetry = Telemetry()
+        self.metrics_port = metrics_port
+        self.metrics_file = metrics_file
+        self.metrics_host = metrics_host
+        self.content_kb = content_kb
         
         
         overview_init = lambda: {'solo': 0, 'capstone': 0, 'group': 0}
@@ -78,9 +162,34 @@ class Not200Club:
             'sites_bad_url': overview_init(),
             'sites_no_url': overview_init(),
             'seeker_with_issue': 0,
-            'time_average': list(),
-            'sites_timeout': overview_init()
+            'latency': dict(),
+            'phases': dict(),
+            'sites_timeout': overview_init(),
+            'sites_content': overview_init(),
+            'warmup': dict(),
+            'urls_total': 0,
+            'urls_unique': 0
         }
+    
+    @property
+    def dtx(self) -> 'DTX':
+        """
+        The workbook the run is written to, it's made (and openpyxl loaded) the first time a stage uses it.
+        """
+        if self.__dtx is None:
+            from util.data_to_xlsx import DTX
+            self.__dtx = DTX(self.started_at)
+        return self.__dtx
+    
+    @property
+    def prober(self) -> 'Prober':
+        """
+        The prober every url is checked with, it's made (and requests loaded) the first time a url is probed.
+        """
+        if self.__prober is None:
+            from util.prober import Prober
+            self.__prober = Prober(self.timeout, self.probe_mode, self.concurrency, self.dns.getaddrinfo, self.content_kb)
+        return self.__prober
         
     def __validation_check(self) -> bool:
         """
@@ -106,42 +215,16 @@ class Not200Club:
         
     def __grab_data_from_file(self) -> None:
         """
-        This function reads data from an Excel file in the target folder and populates a dictionary with the data.
+        This function streams the rows of the report in the target folder (xlsx or csv) into
+        `seekers_by_coach`, the columns are found by their header.
         """
         target_file = os.listdir(TARGET)[0]
         
-        simplefilter("ignore") # both simplefilter lines supress the style warning openpyxl throws
-        data = openpyxl.load_workbook(os.path.join(TARGET, target_file))
-        simplefilter("default")
-        
-        sheet = data.active
-        self.total_seekers = sheet.max_row-1
-
-        with alive_bar(sheet.max_row-1, title="Grabing Data...") as bar:
-            for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-                curr_row = dict()
-                for idx, cell in enumerate(row):
-                    
-                    data_list = {
-                        0: 'seeker',
-                        1: 'coach',
-                        2: 'status',
-                        3: 'solo',
-                        4: 'capstone',
-                        5: 'group',
-                        6: 'email'
-                    }
-                    
-                    val = cell.value
-                    if val == ' ' and idx == 1:
-                        val = 'Placements' 
-                    
-                    curr_row[data_list[idx]] = val
-                    
-                        
-                
-                for proj in ['status', 'solo', 'capstone', 'group', 'email']:
-                    self.sites_by_coach[curr_row['coach']][curr_row['seeker']][proj] = curr_row[proj]
+        with progress_bar(title="Grabing Data...") as bar:
+            for curr_row in read_report(os.path.join(TARGET, target_file)):
+                seeker = SeekerResult(curr_row['seeker'], curr_row['coach'], curr_row['status'], curr_row['email'], curr_row)
+                self.seekers_by_coach[seeker.coach][seeker.name] = seeker
+                self.total_seekers += 1
                 bar()
     
     def __validate_url(self, url: str) -> str:
@@ -162,135 +245,548 @@ class Not200Club:
         
         return url
     
-    def __get_issues_from_urls(self, seeker: str, urls: dict) -> dict:
-        """
-        This function takes in a seeker and a dictionary of URLs, and returns a dictionary of issues for
-        each URL, along with an overview of the number of issues encountered.
-        
-        :param seeker: The parameter "seeker" is a string that represents the name of the seeker or the
-        person who is running the code
-        :type seeker: str
-        :param urls: The `urls` parameter is a dictionary containing project names as keys and their
-        corresponding URLs as values
-        :type urls: dict
-        :return: a dictionary containing the issues found in the provided URLs. If no issues are found,
-        an empty dictionary is returned. The dictionary is nested within another dictionary with the key
-        'seeker'.
-        """
-        site_issues = ddict(dict)
-        
-        for proj, url in urls.items():
-            if url != '':
-                try:
-                    res = requests.get(url, timeout=self.timeout)
-                    if res.elapsed > timedelta(seconds=10):
-                        site_issues[proj]['time'] = res.elapsed
-                        self.overview['sites_time'][proj] += 1
-                        self.overview['time_average'].append(res.elapsed.seconds)
-                                
-                    if res.status_code != 200:
-                        site_issues[proj]['status'] = res.status_code
-                        self.overview['sites_status'][proj] += 1
-                        
-                except requests.exceptions.Timeout:
-                    site_issues[proj]['timeout'] = f'URL timeout at {self.timeout}s'
-                    self.overview['sites_timeout'][proj] += 1
-                    
-                except Exception as e:
-                    site_issues[proj]['bad_url'] = str(e)
-                    self.overview['sites_bad_url'][proj] += 1
-            else:
-                site_issues[proj]['no-link'] = True
-                self.overview['sites_no_url'][proj] += 1
+    def __build_url_index(self) -> dict:
+        """
+        This function canonicalizes every project url and groups the projects that point at the same
+        site, so each unique url is only probed once no matter how many seekers list it.
+        
+        :return: a dictionary of canonical urls to the list of (coach, seeker, project) that use it,
+        projects with no url are listed under an empty string.
+        """
+        url_index = ddict(list)
+        
+        for coach, seekers in self.seekers_by_coach.items():
+            for seeker in seekers.values():
+                for proj, project in seeker.projects.items():
+                    url = canonicalize_url(self.__validate_url(project.url))
+                    url_index[url].append((coach, seeker.name, proj))
+        
+        return url_index
+    
+    def __get_issues_from_result(self, res: dict) -> dict:
+        """
+        This function turns the result of probing a url into the issues found for it.
+        
+        :param res: The `res` parameter is the result dictionary returned by `Prober.probe`
+        :type res: dict
+        :return: a dictionary of the `Issue`s found for the url to their value, if no issues are found
+        it is empty.
+        """
+        issues = dict()
+        
+        if res['error'] == 'timeout':
+            issues[Issue.TIMEOUT] = res['message']
+            
+        elif res['error'] == 'bad_url':
+            issues[Issue.BAD_URL] = res['message']
             
-        return {seeker: site_issues} if site_issues else {}
-    
-    def __threading_get_all_issues(self, coach: str) -> dict:
-        """
-        This function uses multithreading to gather all issues from URLs associated with a given coach.
-        
-        :param coach: The coach parameter is a string representing the name of the coach for whom we
-        want to get all the issues
-        :type coach: str
-        :return: a dictionary containing all the issues gathered from the URLs of the seekers assigned
-        to the given coach.
-        """
-        seekers = self.sites_by_coach[coach]
-        all_issues = dict()
-        
-        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2) as pool:
-            futures = list()
-            for seeker in seekers:
-                urls = {
-                        'solo': self.__validate_url(seekers[seeker]['solo']),
-                        'capstone': self.__validate_url(seekers[seeker]['capstone']),
-                        'group': self.__validate_url(seekers[seeker]['group'])
-                    }
-                futures.append(pool.submit(self.__get_issues_from_urls, seeker, urls))
+        else:
+            if res['elapsed'] > 10:
+                issues[Issue.TIME] = res['elapsed']
+                
+            if res['status'] != 200:
+                issues[Issue.STATUS] = res['status']
+            elif res.get('signature'):
+                issues[Issue.CONTENT] = res['signature'] + (' (same page as last run)' if res.get('content') == 'same' else '')
+        
+        return issues
+    
+    def __count_issues(self, proj: str, issues: dict) -> None:
+        """
+        This function adds a project's issues to the overview's counts.
+        """
+        for issue, key in [(Issue.TIME, 'sites_time'), (Issue.STATUS, 'sites_status'), (Issue.TIMEOUT, 'sites_timeout'), (Issue.BAD_URL, 'sites_bad_url'), (Issue.NO_LINK, 'sites_no_url'), (Issue.CONTENT, 'sites_content')]:
+            if issue in issues:
+                self.overview[key][proj] += 1
+    
+    def __record_metrics(self, metrics: MetricsCollector, tags: set, res: dict) -> None:
+        """
+        This function records a result's response time under each of its project types, and the time of
+        every network phase that happened under the phase's name.
+        """
+        if res['elapsed'] is not None:
+            metrics.record(tags, res['elapsed'])
             
-            with alive_bar(len(futures), title=f"Gathering threads for {coach}") as bar:
-                for f in futures:
-                    all_issues.update(f.result())
-                    bar()
+        for phase, secs in (res.get('phases') or {}).items():
+            if secs > 0:
+                metrics.record([phase], secs)
+    
+    def __probe_url(self, url: str, headers: dict, tags: set, metrics: MetricsCollector, previous: dict = None) -> dict:
+        """
+        This function probes a single url on one of the engine's worker threads and records its times
+        in that worker's histograms. The timeout comes from how fast the url's host has been so far, and
+        is cut short if the run's deadline is closer. When the page was fingerprinted, whether its
+        `content` is the 'same' as the `previous` run's fingerprint or 'changed' is added to the result.
+        """
+        timeout = self.timeouts.timeout_for(url)
+        remaining = max(0.1, self.deadline_at - monotonic()) if self.deadline_at else None
+        cut_short = remaining is not None and (timeout is None or remaining < timeout)
+        
+        res = self.prober.probe(url, headers, remaining if cut_short else timeout)
+        if not cut_short: # a timeout cut short by the deadline says nothing about the host
+            self.timeouts.record(url, res, timeout)
+        self.__record_metrics(metrics, tags, res)
+        if url in self.warmed:
+            res['warmup'] = self.warmed[url]
+        if previous and res.get('fingerprint'):
+            res['content'] = 'same' if res['fingerprint'] == previous['fingerprint'] else 'changed'
         
-        return all_issues
+        return res
     
+    def __wake(self, url: str) -> dict:
+        """
+        This function sends a url its wake-up probe, the elapsed time is the whole probe since a cold
+        start can hold up a HEAD that the GET after it doesn't wait on. The timeout is cut short if the
+        run's deadline is closer.
+        """
+        timeout = self.timeout
+        if self.deadline_at:
+            remaining = max(0.1, self.deadline_at - monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        
+        start = perf_counter()
+        res = self.prober.probe(url, timeout=timeout)
+        if res['elapsed'] is not None:
+            res['elapsed'] = round(perf_counter() - start, 6)
+        
+        return res
+    
+    def __warm_up(self, urls: list) -> None:
+        """
+        This function wakes up every url on a platform that puts idle sites to sleep, all at once, then
+        waits `warmup_delay` before the sites are probed for real. What each wake-up request found (the
+        cold start) is kept in `warmed` and added to the url's result as its `warmup`.
+        
+        :param urls: The `urls` parameter is the list of urls about to be probed
+        :type urls: list
+        """
+        sleepers = [url for url in urls if cold_start(url)]
+        if not self.warmup or not sleepers or (self.deadline_at and monotonic() >= self.deadline_at):
+            return
+        
+        print(f'Waking up {len(sleepers)} sites on platforms that put idle sites to sleep')
+        # sites on a platform are woken up together, so the host cap is lifted and only the rate is kept
+        scheduler = HostScheduler(max_per_host=self.concurrency, start_per_host=self.concurrency)
+        engine = ProbeEngine(self.__wake, self.concurrency, scheduler, self.deadline_at, {'status': None, 'elapsed': None, 'error': 'timeout', 'message': 'The run\'s deadline was reached before the site woke up'})
+        for url, res in engine.run({url: url for url in sleepers}).items():
+            self.warmed[url] = {key: res[key] for key in ['status', 'elapsed', 'error', 'message']}
+        
+        delay = self.warmup_delay
+        if self.deadline_at:
+            delay = min(delay, max(0.0, self.deadline_at - monotonic()))
+        sleep(delay)
+    
+    def __count_warmup(self, results: dict) -> None:
+        """
+        This function adds the cold start numbers of the woken up urls to the overview, the urls that only
+        had issues while they were waking up are counted as recovered.
+        """
+        cold = LatencyHistogram()
+        recovered = 0
+        for res in results.values():
+            if res.get('warmup'):
+                if res['warmup']['elapsed'] is not None:
+                    cold.record(res['warmup']['elapsed'])
+                if self.__get_issues_from_result(res['warmup']) and not self.__get_issues_from_result(res):
+                    recovered += 1
+        
+        if cold.count or recovered:
+            self.overview['warmup'] = {'cold': cold.summary(), 'recovered': recovered}
+    
+    def __shard_path(self, i: int, n: int) -> str:
+        """
+        This function returns the path of the file the i-th of n shards writes its results to.
+        """
+        return os.path.join(RES, f'{"not200club "+str(date.today())}.shard-{i}-of-{n}.jsonl')
+    
+    def __load_shards(self) -> dict:
+        """
+        This function reads the results of every shard of today's sharded run from the res folder. When
+        shard files of runs with a different number of shards are found, the most recent run is used.
+        
+        :return: a dictionary of every url the shards have a result for to that result, and a dictionary
+        of tags to the shards' merged latency histograms.
+        """
+        pattern = re.compile(re.escape(f'{"not200club "+str(date.today())}.shard-') + r'(\d+)-of-(\d+)\.jsonl')
+        found = ddict(dict)
+        for f in os.listdir(RES):
+            if match := pattern.fullmatch(f):
+                found[int(match[2])][int(match[1])] = os.path.getmtime(os.path.join(RES, f))
+                
+        if not found:
+            raise Exception('MERGE ERROR - There are no shard files from today in the res folder to merge!')
+        
+        n = max(found, key=lambda n: max(found[n].values()))
+        missing = sorted(set(range(1, n + 1)) - set(found[n]))
+        if missing:
+            raise Exception(f'MERGE ERROR - Shard(s) {missing} of {n} are missing from the res folder!')
+        
+        results = dict()
+        histograms = ddict(LatencyHistogram)
+        for i in range(1, n + 1):
+            shard = RunJournal(path=self.__shard_path(i, n), read_only=True)
+            results.update(shard.results)
+            for tag, histogram in shard.histograms.items():
+                histograms[tag].merge(LatencyHistogram.from_dict(histogram))
+        
+        return results, histograms
+    
+    def __resolve_hosts(self, urls: list) -> dict:
+        """
+        This function looks up the host of every url at once before any are probed, the answers are kept
+        for the whole run so every connection to a host reuses them.
+        
+        :param urls: The `urls` parameter is the list of urls about to be probed
+        :type urls: list
+        :return: a dictionary of the urls whose host doesn't exist to their `bad_url` result, these don't
+        need to be probed.
+        """
+        start = perf_counter()
+        hosts = {url: urlsplit(url).hostname for url in urls}
+        missing = self.dns.resolve_all(host for host in hosts.values() if host)
+        print(f'Resolved {len(set(hosts.values()))} hosts in {perf_counter() - start:.2f}s, {len(missing)} of them don\'t exist')
+        
+        results = dict()
+        for url, host in hosts.items():
+            if host in missing:
+                results[url] = {'status': None, 'elapsed': None, 'error': 'bad_url', 'message': f'Failed to resolve \'{host}\', the name doesn\'t exist', 'retry_after': None, 'phases': dict.fromkeys(PHASES, 0.0)}
+        
+        return results
+    
+    def __probe_urls(self, url_index: dict, on_done = None) -> dict:
+        """
+        This function gets a result for every unique url, from the probe cache when it can be trusted or
+        from the run journal when resuming, otherwise by sending it through the probe engine. Every new
+        result is written to the run journal as soon as it comes in.
+        
+        :param url_index: The `url_index` parameter is the dictionary built by `__build_url_index`
+        :type url_index: dict
+        :param on_done: The `on_done` parameter is an optional callable given every url and its result as
+        soon as it's known, the ones that don't need probing before probing starts
+        :return: a dictionary of every unique url to its result, in the shape `Prober.probe` returns.
+        """
+        urls = [url for url in url_index if url]
+        if self.shard:
+            urls = [url for url in urls if shard_of(url, self.shard[1]) == self.shard[0]]
+        rows = {(coach, seeker, proj): url for url, refs in url_index.items() for coach, seeker, proj in refs}
+        cache = ProbeCache(self.cache_ttl)
+        
+        results = cache.fresh(urls)
+        if results:
+            print(f'Skipping {len(results)} urls that were healthy within the last {self.cache_ttl}')
+            
+        if self.delta:
+            # only rows that are new, changed url or coach, failed last time, or weren't checked in a while are probed again
+            carried = cache.carried(urls, rows, DELTA_MAX_AGE)
+            print(f'Delta run, carrying forward {len(carried)} unchanged healthy urls from the last run')
+            results.update(carried)
+        
+        merged, shard_latency = dict(), dict()
+        if self.merge:
+            shard_results, shard_latency = self.__load_shards()
+            merged = {url: res for url, res in shard_results.items() if url in url_index and url not in results}
+            results.update(merged)
+            print(f'Merged the results of {len(merged)} urls from the shards, {len(urls) - len(results)} urls are missing and will be probed')
+        
+        journal = RunJournal(self.resume, self.__shard_path(*self.shard) if self.shard else None)
+        replayed = {url: res for url, res in journal.results.items() if url in url_index and url not in results}
+        if self.shard: # the shard file needs every result of the shard, not just the ones it probes
+            for url, res in results.items():
+                if url not in journal.results:
+                    journal.record(url, res)
+        if journal.resumed:
+            print(f'Resuming run {journal.run_id}, {len(replayed)} urls were already probed')
+        elif self.resume:
+            print('There is no unfinished run from today to resume, starting a new one')
+        results.update(replayed)
+        
+        # every url is recorded once under each project type it's used for
+        metrics = MetricsCollector()
+        tags = {url: {proj for coach, seeker, proj in url_index[url]} for url in urls}
+        for url, res in results.items():
+            if url not in merged: # the shards' histograms already have them, with every retry the shards made
+                self.__record_metrics(metrics, tags[url], res)
+        
+        unresolved = self.__resolve_hosts([url for url in urls if url not in results])
+        for url, res in unresolved.items():
+            journal.record(url, res)
+        results.update(unresolved)
+        
+        if on_done:
+            for url, res in results.items():
+                on_done(url, res)
+        
+        validators = cache.validators(urls)
+        fingerprints = cache.fingerprints(urls) if self.content_kb else dict()
+        # the urls that were slow or failed last time go last, so with a deadline the stragglers are the ones cut off
+        last_elapsed = cache.last_elapsed(urls)
+        jobs = sorted((url for url in urls if url not in results), key=lambda url: float('inf') if last_elapsed.get(url, 0) is None else last_elapsed.get(url, 0))
+        
+        self.__warm_up(jobs)
+        cutoff = {'status': None, 'elapsed': None, 'error': 'timeout', 'message': 'The run\'s deadline was reached before the site answered', 'retry_after': None, 'phases': dict.fromkeys(PHASES, 0.0), 'cut_off': True}
+        engine = ProbeEngine(lambda url: self.__probe_url(url, validators.get(url), tags[url], metrics, fingerprints.get(url)), self.concurrency, self.scheduler, self.deadline_at, cutoff, self.telemetry)
+        def record(url: str, res: dict) -> None:
+            journal.record(url, res)
+            if on_done:
+                on_done(url, res)
+        
+        results.update(engine.run({url: url for url in jobs}, record))
+        if on_done: # the urls cut off by the deadline
+            for url, res in results.items():
+                on_done(url, res)
+        if engine.cut_off:
+            print(f'The deadline was reached, {engine.cut_off} urls were not probed and are reported as timeouts')
+        
+        latency = metrics.merge()
+        for tag, histogram in shard_latency.items():
+            latency[tag].merge(histogram)
+        if self.shard:
+            journal.record_histograms(latency)
+        journal.close(finished=True)
+        
+        self.overview['latency'] = {proj: latency[proj].summary() for proj in ['solo', 'capstone', 'group']}
+        self.overview['phases'] = {phase: latency[phase].summary() for phase in PHASES}
+        self.__count_warmup(results)
+        if self.content_kb:
+            self.overview['content_changed'] = sum(res.get('content') == 'changed' for res in results.values())
+        if self.scheduler.throttled:
+            print(f'Hosts throttled {self.scheduler.throttled} probes, those were retried after backing off')
+        
+        cache.store(results, {url for url in urls if not self.__get_issues_from_result(results[url])})
+        if not self.shard: # a shard only knows its own urls, the merge run keeps the rest of the cache up to date
+            cache.store_rows(rows)
+            cache.evict(urls)
+        cache.close()
+        
+        return results
+    
+    def __get_all_issues(self) -> None:
+        """
+        This function sends every unique project url of every coach through one shared probe engine and
+        fans the issues found back out to the project of every seeker in `seekers_by_coach` that uses the
+        url as the results come in. Every coach's sheet and json are written by the pipeline's writer as
+        soon as the last of its urls is in, while the other coaches are still probing. A site used by
+        several seekers for the same project type is only counted once in the overview.
+        """
+        url_index = self.__build_url_index()
+        urls = [url for url in url_index if url]
+        
+        self.overview['urls_total'] = sum(len(refs) for url, refs in url_index.items() if url)
+        self.overview['urls_unique'] = len(urls)
+        if self.overview['urls_total']:
+            print(f"Probing {len(urls)} unique urls for {self.overview['urls_total']} project links ({1 - len(urls) / self.overview['urls_total']:.1%} deduplicated)")
+        
+        self.url_index = url_index
+        self.coach_order = {coach: idx for idx, coach in enumerate(self.seekers_by_coach)}
+        pipeline = CoachPipeline({url: {coach for coach, seeker, proj in refs} for url, refs in url_index.items()}, self.__apply_result, lambda coach: self.__timed('sheets', self.__finish_coach, coach))
+        try:
+            pipeline.done('', None) # the projects without a url don't wait on anything
+            results = self.url_results = self.__probe_urls(url_index, pipeline.done)
+        finally:
+            pipeline.close()
+        self.overview['urls_cut_off'] = sum(bool(res.get('cut_off')) for res in results.values())
+        
+        for url, refs in url_index.items():
+            issues = self.__get_issues_from_result(results[url]) if url else {Issue.NO_LINK: True}
+            counted = set()
+            for coach, seeker, proj in refs:
+                if not url or proj not in counted: # no-links are counted for every seeker, sites once per project type
+                    self.__count_issues(proj, issues)
+                    counted.add(proj)
+        
+        self.overview['seeker_with_issue'] = sum(seeker.has_issues for seekers in self.seekers_by_coach.values() for seeker in seekers.values())
+    
+    def __apply_result(self, url: str, res: dict) -> None:
+        """
+        This function gives the issues found for a url to the project of every seeker that uses it.
+        
+        :param url: The `url` parameter is the canonical url, '' for the projects with no url
+        :type url: str
+        :param res: The `res` parameter is the url's result, None for the projects with no url
+        :type res: dict
+        """
+        res = res or dict()
+        issues = self.__get_issues_from_result(res) if url else {Issue.NO_LINK: True}
+        for coach, seeker, proj in self.url_index[url]:
+            project = self.seekers_by_coach[coach][seeker].projects[proj]
+            project.issues = issues or None # every seeker using the url shares the same issues
+            project.phases = res.get('phases')
+            project.warmup = res.get('warmup')
+    
+    def __finish_coach(self, coach: str) -> None:
+        """
+        This function writes a coach whose urls are all in to their sheet, at the sheet's place in the
+        report's order, and serializes their part of the json.
+        """
+        seekers = self.__seekers_with_issues(coach)
+        
+        position = self.coach_order[coach]
+        index = bisect_left(self.sheets_written, position)
+        insort(self.sheets_written, position)
+        self.dtx.write_coach_sheet(coach, seekers, index)
+        self.json_parts[coach] = json.dumps({seeker.name: seeker.to_json() for seeker in seekers})
+    
+    def __seekers_with_issues(self, coach: str) -> list:
+        """
+        This function returns the seekers of a coach that have an issue with any of their projects.
+        """
+        return [seeker for seeker in self.seekers_by_coach[coach].values() if seeker.has_issues]
+    
+    
+    def __timed(self, stage: str, func, *args) -> None:
+        """
+        This function runs one stage of the run and adds the seconds it took to `stage_times`.
+        """
+        self.telemetry.stage = stage
+        start = perf_counter()
+        try:
+            func(*args)
+        finally:
+            self.stage_times[stage] = self.stage_times.get(stage, 0.0) + perf_counter() - start
     
     def __test_urls_and_write_to_xlsx(self) -> None:
         """
-        The function iterates through a list of coaches, retrieves issues for each coach, and writes the
-        information to an Excel file.
+        The function probes the urls of every coach at once, writing each coach's issues to the Excel
+        file as soon as they're all in. The 'sheets' time is the writer's, it overlaps the 'probe' time.
         """
-
-        # for coach in ['Josiah Leon']:
-        for coach in self.sites_by_coach:
-            self.all_coach_issues[coach] = self.__threading_get_all_issues(coach)
-            self.dtx.write_coach_sheet(coach, self.all_coach_issues[coach], self.sites_by_coach, self.overview)
+        self.__timed('probe', self.__get_all_issues)
         
     def __output_json(self) -> None:
-                        
-        for coach in self.all_coach_issues:
-            for seeker in self.all_coach_issues[coach]:
-                self.all_coach_issues[coach][seeker]['email'] = self.sites_by_coach[coach][seeker]['email']
-                for proj in self.all_coach_issues[coach][seeker]:
-                    if proj == 'email':
-                            continue
-                    for issue in self.all_coach_issues[coach][seeker][proj]:
-                        if isinstance(self.all_coach_issues[coach][seeker][proj][issue], timedelta):
-                            self.all_coach_issues[coach][seeker][proj][issue] = str(self.all_coach_issues[coach][seeker][proj][issue].total_seconds())
-        
-        self.all_coach_issues['date'] = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
-        
-        with open(os.path.join(RES, f'{"not200club "+str(date.today())}.json'), 'w') as file:
-            json.dump(self.all_coach_issues, file)
+        """
+        This method writes every coach's seekers with issues, the date and the overview to the day's json.
+        The coaches were serialized as they finished, they are put together in the report's order the same
+        way `json.dump` would write them.
+        """
+        parts = [f'{json.dumps(coach)}: {self.json_parts[coach]}' for coach in self.seekers_by_coach]
+        parts.append(f'"date": {json.dumps(datetime.now().strftime("%m/%d/%Y, %H:%M:%S"))}')
+        parts.append(f'"overview": {json.dumps(self.overview)}')
+        
+        self.json_path = os.path.join(RES, f'{"not200club "+str(date.today())}.json')
+        with open(self.json_path, 'w') as file:
+            file.write('{' + ', '.join(parts) + '}')
+    
+    def __record_history(self) -> None:
+        """
+        This method saves the run to the run history, the uploader and the emailer find its outputs there.
+        """
+        history = RunHistory()
+        history.record(self.seekers_by_coach, self.url_index, self.url_results, self.overview, self.json_path, self.dtx.output_path)
+        history.close()
             
     def __upload_json(self) -> None:
         """
         This method uploads the most recent JSON data to firebase.
         """
-        up = Uploader()
+        up = Uploader(self.upload_mode)
         up.upload_data()
     
+    def __start_deadline(self) -> None:
+        """
+        The function starts the clock on the run's deadline, probing has to be done a bit before it so
+        there's time left to write the results.
+        """
+        if self.deadline and self.deadline_at is None:
+            self.deadline_at = monotonic() + self.deadline * (1 - DEADLINE_RESERVE)
+    
+    def run_shard(self) -> None:
+        """
+        The function probes this run's shard of the unique urls and writes their results to the shard's
+        file in the res folder, the report's age isn't checked.
+        """
+        self.__start_deadline()
+        self.__timed('read', self.__grab_data_from_file)
+        self.__timed('probe', self.__probe_urls, self.__build_url_index())
+        print(f'Shard {self.shard[0]} of {self.shard[1]} is done, merge the shards with --merge once they all are')
+    
+    @classmethod
+    def main_local_workers(cls, workers: int, **kwargs) -> 'Not200Club':
+        """
+        The function runs the script as `workers` shards in a pool of processes on this machine, then
+        merges their results into the usual xlsx and json. The per host limit is split between the
+        workers so a host isn't sent more than a single process would send it.
+        
+        :param workers: The `workers` parameter is the number of processes (and shards) to run
+        :type workers: int
+        :param kwargs: The `kwargs` are passed on to every `Not200Club` of the run
+        :return: the `Not200Club` of the merge run.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        
+        n2c = cls(merge=True, **kwargs)
+        if n2c.__validation_check():
+            n2c.__start_deadline() # the shards count towards the merge run's deadline
+            # the telemetry only covers this process, the shards would fight over its port and file
+            shard_kwargs = dict(kwargs, host_limit=max(1, kwargs.get('host_limit', 32) // workers), metrics_port=None, metrics_file=None)
+            with n2c.telemetry.exporting(n2c.metrics_port, n2c.metrics_file, n2c.metrics_host):
+                with ProcessPoolExecutor(workers) as pool:
+                    n2c.__timed('shards', lambda: list(pool.map(_run_shard, [(i, workers) for i in range(1, workers + 1)], [shard_kwargs] * workers)))
+                n2c.__run()
+        
+        return n2c
+    
+    def __run(self) -> None:
+        """
+        The function runs every stage of the script, the seconds every stage took are kept in `stage_times`.
+        """
+        self.__start_deadline()
+        self.__timed('read', self.__grab_data_from_file)
+        self.__test_urls_and_write_to_xlsx()
+        self.__timed('overview', self.dtx.fill_issue_legend, self.timeout)
+        self.__timed('overview', self.dtx.fill_overview, self.overview, self.total_seekers, self.timeout)
+        self.__timed('save', self.dtx.save)
+        self.__timed('json', self.__output_json)
+        self.__timed('history', self.__record_history)
+        self.__timed('upload', self.__upload_json)
+    
     def main(self) -> None:
         """
         The main function performs various tasks including validation checks, grabbing data from a file,
         filling an issue legend, testing URLs and writing to an Excel file, and filling an overview.
+        The seconds every stage took are kept in `stage_times`. A shard run only probes its shard. The
+        live telemetry is served and/or written while it runs, when it was asked for.
         """
         if self.__validation_check():
-            self.__grab_data_from_file()
-            self.__test_urls_and_write_to_xlsx()
-            self.dtx.fill_issue_legend(self.timeout)
-            self.dtx.fill_overview(self.overview, self.total_seekers, self.timeout)
-            self.dtx.save()
-            self.__output_json()
-            self.__upload_json()
+            with self.telemetry.exporting(self.metrics_port, self.metrics_file, self.metrics_host):
+                if self.shard:
+                    self.run_shard()
+                else:
+                    self.__run()
+ 
+
+def _run_shard(shard: tuple, kwargs: dict) -> None:
+    """
+    This function runs a single shard in a worker process of `Not200Club.main_local_workers`.
+    """
+    Not200Club(shard=shard, **kwargs).run_shard()
  
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checks the health of every seeker\'s project sites in the target report.')
+    parser.add_argument('--delta', action='store_true', help='only probe projects that are new, changed url, or had issues in the last run')
+    parser.add_argument('--cache-ttl', type=float, default=0, metavar='HOURS', help='skip urls that were healthy within this many hours (default 0)')
+    parser.add_argument('--resume', action='store_true', help='pick up the last run where it stopped instead of probing everything again')
+    parser.add_argument('--no-warmup', action='store_true', help='don\'t wake up sites on platforms that sleep before probing them')
+    parser.add_argument('--warmup-delay', type=float, default=5, metavar='SECONDS', help='seconds between waking sites up and probing them (default 5)')
+    parser.add_argument('--deadline', type=float, metavar='MINUTES', help='finish the run within this many minutes, urls not probed by then are reported as timeouts')
+    parser.add_argument('--upload-mode', default='document', choices=UPLOAD_MODES, help='upload the json as one document, or as a document for every coach that changed (default document)')
+    parser.add_argument('--content-check', type=int, nargs='?', const=CONTENT_KB, default=0, metavar='KB', help=f'read the first KB of every page (default {CONTENT_KB}) to catch platform error pages and empty pages served with a 200')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT', help='serve the run\'s live telemetry at http://HOST:PORT/metrics in the Prometheus text format')
+    parser.add_argument('--metrics-host', default='127.0.0.1', metavar='HOST', help='the address to serve the telemetry on, 0.0.0.0 to scrape it from outside a container (default 127.0.0.1)')
+    parser.add_argument('--metrics-file', metavar='PATH', help='write the run\'s live telemetry to this file every few seconds, for the node exporter\'s textfile collector')
+    sharding = parser.add_mutually_exclusive_group()
+    sharding.add_argument('--shard', type=parse_shard, metavar='I/N', help='only probe the i-th of n shards of the urls and write them to a shard file, for running on several machines')
+    sharding.add_argument('--merge', action='store_true', help='combine today\'s shard files into the xlsx and json')
+    sharding.add_argument('--local-workers', type=int, metavar='N', help='run N shards in a pool of processes and merge them')
+    args = parser.parse_args()
+    
     Not200Club.validate()
 
     start = time()
-    n2c = Not200Club(timeout = 60)
-    n2c.main()
+    kwargs = dict(timeout = 60, cache_ttl = timedelta(hours=args.cache_ttl), delta = args.delta, resume = args.resume, deadline = args.deadline and args.deadline * 60, warmup = not args.no_warmup, warmup_delay = args.warmup_delay, upload_mode = args.upload_mode, metrics_port = args.metrics_port, metrics_file = args.metrics_file, metrics_host = args.metrics_host, content_kb = args.content_check)
+    if args.local_workers:
+        Not200Club.main_local_workers(args.local_workers, **kwargs)
+    else:
+        n2c = Not200Club(shard = args.shard, merge = args.merge, **kwargs)
+        n2c.main()
     
     print(f'\nTotal Time to complete: {timedelta(seconds=time()-start)}s')
\ No newline at end of file
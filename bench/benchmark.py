@@ -0,0 +1,192 @@
+'''
+Runs the whole Not 200 Club pipeline against a local web farm and reports how fast it went, so changes
+to the checker can be compared run to run. From the repo's root:
+
+    python -m bench.benchmark --seekers 5000 --coaches 50
+'''
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+from time import perf_counter
+
+from openpyxl import Workbook
+
+from bench.web_farm import WebFarm
+
+import Not_200_Club
+import util.data_to_xlsx
+import util.probe_cache
+import util.run_history
+import util.run_journal
+from Not_200_Club import Not200Club
+
+HEADERS = [
+    'Placement: Placement Name', 'Owner Name', 'Status', 'Student Account: Solo Project Live Link',
+    'Student Account: Capstone Project Live Link', 'Student Account: Group Project Live Link', 'Email',
+]
+# how often each behavior shows up in the report, close to a real run where most sites are fine
+MIX = {'ok': 0.68, 'missing': 0.08, 'busy': 0.03, 'crashed': 0.02, 'slow': 0.06, 'hang': 0.02, 'big': 0.06, 'reset': 0.02, None: 0.03}
+# seekers of a group project share its url
+GROUP_SIZE = 4
+
+
+class BenchClub(Not200Club):
+
+    def _Not200Club__upload_json(self) -> None:
+        pass
+
+
+def write_report(path:str, farm:WebFarm, seekers:int, coaches:int, seed:int = 200) -> None:
+    """
+    The function writes a synthetic target report with a project url on the farm for every project of
+    every seeker, the behavior of every site is picked from `MIX` (None is a project with no url).
+
+    :param path: The `path` parameter is the xlsx file to write
+    :type path: str
+    :param farm: The `farm` parameter is the started web farm the urls point at
+    :type farm: WebFarm
+    :param seekers: The `seekers` parameter is the number of seekers in the report
+    :type seekers: int
+    :param coaches: The `coaches` parameter is the number of coaches the seekers are split between
+    :type coaches: int
+    :param seed: The `seed` parameter seeds the behaviors so the same arguments give the same report
+    :type seed: int (optional)
+    """
+    rand = random.Random(seed)
+    behaviors, weights = list(MIX), list(MIX.values())
+
+    def site(idx:int, name:str) -> str:
+        behavior = rand.choices(behaviors, weights)[0]
+        return farm.url(idx, behavior, name) if behavior else None
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(HEADERS)
+
+    group = None
+    for idx in range(seekers):
+        if idx % GROUP_SIZE == 0:
+            group = site(idx // GROUP_SIZE, f'group-{idx // GROUP_SIZE}')
+        ws.append([
+            f'Seeker {idx}', f'Coach {idx % coaches}', 'Greenlit',
+            site(idx, f'solo-{idx}'), site(idx + 1, f'capstone-{idx}'), group, f'seeker{idx}@example.com',
+        ])
+
+    wb.save(path)
+
+
+def peak_rss_mb() -> float:
+    """
+    The function returns the peak resident memory of this process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1) # bytes on macOS, KB elsewhere
+
+
+def run(seekers:int = 2000, coaches:int = 40, hosts:int = 16, timeout:float = 5, concurrency:int = 256,
+        probe_mode:str = 'light', out:str = None, local_workers:int = None, deadline:float = None) -> dict:
+    """
+    The `run` function starts a web farm, writes a report for it and runs `Not200Club.main` on it with
+    the res and target folders moved to a temporary folder (or `out`) and the upload skipped. With
+    `local_workers` it's run through `Not200Club.main_local_workers` instead.
+
+    :return: a dictionary of the run's numbers, the wall time and every stage's time are in seconds.
+    """
+    with WebFarm(hosts, slow=min(1.5, timeout / 2), hang=timeout + 2) as farm, tempfile.TemporaryDirectory() as tmp:
+        root = out or tmp
+        target, res = os.path.join(root, 'target'), os.path.join(root, 'res')
+        os.makedirs(target, exist_ok=True)
+        os.makedirs(res, exist_ok=True)
+        for module in (Not_200_Club, util.data_to_xlsx, util.probe_cache, util.run_history, util.run_journal):
+            module.RES = res
+        Not_200_Club.TARGET = util.data_to_xlsx.TARGET = target
+
+        write_report(os.path.join(target, 'bench report.xlsx'), farm, seekers, coaches)
+
+        start = perf_counter()
+        kwargs = dict(timeout=timeout, concurrency=concurrency, probe_mode=probe_mode, deadline=deadline)
+        if local_workers:
+            n2c = BenchClub.main_local_workers(local_workers, **kwargs)
+        else:
+            n2c = BenchClub(**kwargs)
+            n2c.main()
+        wall = perf_counter() - start
+
+    probe_time = n2c.stage_times.get('probe', 0) + n2c.stage_times.get('shards', 0) or wall # the shards do the probing of a sharded run
+    return {
+        'seekers': seekers,
+        'coaches': coaches,
+        'hosts': hosts,
+        'concurrency': concurrency,
+        'local_workers': local_workers,
+        'deadline': deadline,
+        'probe_mode': probe_mode,
+        'urls_total': n2c.overview['urls_total'],
+        'urls_unique': n2c.overview['urls_unique'],
+        'urls_cut_off': n2c.overview['urls_cut_off'],
+        'wall': round(wall, 3),
+        # the urls the deadline cut off were never probed, counting them would make a deadline look fast
+        'probes_per_sec': round((n2c.overview['urls_unique'] - n2c.overview['urls_cut_off']) / probe_time, 1),
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': {stage: round(secs, 3) for stage, secs in n2c.stage_times.items()},
+    }
+
+
+def compare(report:dict, baseline:dict, tolerance:float) -> list:
+    """
+    The function compares a run to a baseline run.
+
+    :return: a list of the numbers that got worse by more than the tolerance (a fraction), empty if none did.
+    """
+    regressions = list()
+    if report['probes_per_sec'] < baseline['probes_per_sec'] * (1 - tolerance):
+        regressions.append(f"probes/sec dropped from {baseline['probes_per_sec']} to {report['probes_per_sec']}")
+    for key in ('wall', 'peak_rss_mb'):
+        if report[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f'{key} went from {baseline[key]} to {report[key]}')
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the checker against a local web farm.')
+    parser.add_argument('--seekers', type=int, default=2000, help='seekers in the synthetic report (default 2000)')
+    parser.add_argument('--coaches', type=int, default=40, help='coaches the seekers are split between (default 40)')
+    parser.add_argument('--hosts', type=int, default=16, help='servers in the web farm (default 16)')
+    parser.add_argument('--timeout', type=float, default=5, help='probe timeout in seconds (default 5)')
+    parser.add_argument('--concurrency', type=int, default=256, help='urls probed at the same time (default 256)')
+    parser.add_argument('--probe-mode', default='light', choices=('light', 'full'))
+    parser.add_argument('--local-workers', type=int, metavar='N', help='run the checker as N sharded processes')
+    parser.add_argument('--deadline', type=float, metavar='SECONDS', help='give the run a deadline')
+    parser.add_argument('--out', help='keep the report and outputs in this folder instead of a temporary one')
+    parser.add_argument('--json', metavar='PATH', help='write the numbers to this file')
+    parser.add_argument('--baseline', metavar='PATH', help='compare to the numbers of an earlier --json run, exits 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='how much worse than the baseline is allowed (default 0.2)')
+    args = parser.parse_args()
+
+    report = run(args.seekers, args.coaches, args.hosts, args.timeout, args.concurrency, args.probe_mode, args.out, args.local_workers, args.deadline)
+
+    print(f"\n{report['seekers']} seekers, {report['urls_unique']} unique urls ({report['urls_total']} links) on {report['hosts']} hosts")
+    print(f"Wall time:   {report['wall']}s")
+    print(f"Probes/sec:  {report['probes_per_sec']}")
+    if report['urls_cut_off']:
+        print(f"Cut off:     {report['urls_cut_off']} urls by the deadline, not counted in probes/sec")
+    print(f"Peak RSS:    {report['peak_rss_mb']} MB")
+    for stage, secs in report['stages'].items():
+        print(f'  {stage:<10} {secs}s')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION - {regression}')
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,176 @@
+import socket
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Event, Process, Queue
+from time import sleep
+
+# what a site of the farm does is picked by the first part of its path, http://127.0.0.x:port/<behavior>/...
+BEHAVIORS = ('ok', 'missing', 'busy', 'crashed', 'slow', 'hang', 'big', 'reset', 'errorpage')
+# what heroku answers with (and a 200) when the app behind a site crashed
+ERROR_PAGE = b'<!DOCTYPE html><html><head><title>Application Error</title></head><body><iframe src="//www.herokucdn.com/error-pages/application-error.html"></iframe></body></html>'
+
+
+class FarmHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive, like most real hosts
+
+    # set on the handler class made for every farm
+    slow = 1.5
+    hang = 65.0
+    big = 2 * 1024 * 1024
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+    def __respond(self, status:int, body:bytes = b'ok', headers:dict = None) -> None:
+        """
+        The function sends the response, the body is left out for HEAD requests.
+        """
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+
+    def __reset(self) -> None:
+        """
+        The function drops the connection with a tcp reset instead of answering.
+        """
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        self.close_connection = True
+
+
+    def do_GET(self) -> None:
+        behavior = self.path.strip('/').split('/')[0]
+
+        if behavior == 'missing':
+            self.__respond(404, b'not found')
+        elif behavior == 'busy':
+            self.__respond(503, b'busy', {'Retry-After': '0'})
+        elif behavior == 'crashed': # a dead app on a platform, a bare 503
+            self.__respond(503, b'Application Error')
+        elif behavior == 'slow':
+            sleep(self.slow)
+            self.__respond(200)
+        elif behavior == 'hang':
+            sleep(self.hang)
+            self.__respond(200)
+        elif behavior == 'big':
+            self.__respond(200, b'x' * self.big)
+        elif behavior == 'reset':
+            self.__reset()
+        elif behavior == 'errorpage':
+            self.__respond(200, ERROR_PAGE)
+        else:
+            self.__respond(200)
+
+    do_HEAD = do_GET
+
+
+def _serve(hosts:int, slow:float, hang:float, big:int, ready:Queue, stop:Event) -> None:
+    """
+    The function runs the farm's servers in the farm's process until `stop` is set, the address of every
+    server is put on `ready` once they are all listening.
+    """
+    handler = type('Handler', (FarmHandler,), {'slow': slow, 'hang': hang, 'big': big})
+    servers = list()
+
+    for idx in range(hosts):
+        # every server gets its own loopback address so the scheduler sees it as its own host, systems
+        # that only route 127.0.0.1 get their own port on it instead
+        try:
+            server = ThreadingHTTPServer((f'127.0.0.{idx + 1}', 0), handler)
+        except OSError:
+            server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        server.daemon_threads = True
+        server.request_queue_size = 1024
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+    ready.put([f'http://{host}:{port}' for host, port in (server.server_address for server in servers)])
+    stop.wait()
+
+    for server in servers:
+        server.shutdown()
+
+
+class WebFarm:
+
+    def __init__(self, hosts:int = 16, slow:float = 1.5, hang:float = 65.0, big:int = 2 * 1024 * 1024) -> None:
+        """
+        The WebFarm stands in for the internet in benchmarks, it runs a set of local http servers in their
+        own process (so they don't share the checker's memory or GIL) and every site on them does what its
+        path asks for: answer fast ('ok'), 404 ('missing'), 503 with a Retry-After ('busy'), a bare 503
+        like a crashed app ('crashed'), answer late ('slow'), never answer in time ('hang'), send a large
+        body ('big'), reset the connection ('reset') or answer with a platform's error page ('errorpage').
+
+        :param hosts: The `hosts` parameter is the number of servers (hosts) in the farm
+        :type hosts: int (optional)
+        :param slow: The `slow` parameter is the seconds a 'slow' site takes to answer
+        :type slow: float (optional)
+        :param hang: The `hang` parameter is the seconds a 'hang' site takes to answer, it should be longer
+        than the timeout of the run
+        :type hang: float (optional)
+        :param big: The `big` parameter is the size in bytes of a 'big' site's body
+        :type big: int (optional)
+        """
+        self.hosts = hosts
+        self.slow = slow
+        self.hang = hang
+        self.big = big
+        self.bases = list()
+        self.__stop = Event()
+        self.__process = None
+
+
+    def __enter__(self) -> 'WebFarm':
+        self.start()
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+    def start(self) -> None:
+        """
+        The `start` function starts the farm's process and waits until every server is listening.
+        """
+        ready = Queue()
+        self.__process = Process(target=_serve, args=(self.hosts, self.slow, self.hang, self.big, ready, self.__stop), daemon=True)
+        self.__process.start()
+        self.bases = ready.get(timeout=30)
+
+
+    def stop(self) -> None:
+        """
+        The `stop` function shuts the servers down and waits for the farm's process to exit.
+        """
+        self.__stop.set()
+        if self.__process is not None:
+            self.__process.join(timeout=10)
+            if self.__process.is_alive(): # a 'hang' request can keep it busy, nothing of it is needed anymore
+                self.__process.kill()
+
+
+    def url(self, idx:int, behavior:str, site:str) -> str:
+        """
+        The `url` function builds the url of a site on the farm.
+
+        :param idx: The `idx` parameter picks the host, it wraps around the number of hosts
+        :type idx: int
+        :param behavior: The `behavior` parameter is what the site does, one of `BEHAVIORS`
+        :type behavior: str
+        :param site: The `site` parameter is the rest of the path, to keep sites apart
+        :type site: str
+        :return: the url of the site.
+        """
+        if behavior not in BEHAVIORS:
+            raise ValueError(f'WEB FARM ERROR - ({behavior}) is not a behavior, pick from {BEHAVIORS}')
+
+        return f'{self.bases[idx % len(self.bases)]}/{behavior}/{site}'
@@ -27,7 +27,7 @@ const Home = () => {
   const createCoaches = () => {
     let coaches = [];
     for (let coach in coachData) {
-      if (coach === 'date') continue
+      if (coach === 'date' || coach === 'overview') continue
       coaches.push(
         <option value={coach} key={coach}>{coach}</option>
       );
@@ -22,7 +22,7 @@ const Stats = () => {
         for (let doc of data) {
             let count = 0;
             for (let coach in doc) {
-                if (coach === 'date') continue;
+                if (coach === 'date' || coach === 'overview') continue;
                 for (let seeker in doc[coach]) {
                     if (Object.values(doc[coach][seeker][proj]).length !== 0) {
                         count++;
@@ -40,7 +40,7 @@ const Stats = () => {
         let swo = 0;
 
         for (let coach in data) {
-            if (coach === 'date') continue;
+            if (coach === 'date' || coach === 'overview') continue;
             for (let seeker in data[coach]) {
                 if (Object.values(data[coach][seeker][proj]).length === 0) {
                     swo++;
@@ -32,7 +32,7 @@ const LargeOut = ({coachData}) => {
             message.push(`### ${seeker}:`)
 
             for (let proj in coachData[seeker]) {
-                if (Object.values(coachData[seeker][proj]).length === 0 || proj === 'email') continue;
+                if (Object.values(coachData[seeker][proj]).length === 0 || proj === 'email' || proj === 'timings' || proj === 'warmup' || proj === 'status') continue;
                 message.push(`* ${proj}: ${parseIssues(Object.values(coachData[seeker][proj]))}`)
             }
 
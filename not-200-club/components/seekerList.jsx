@@ -15,7 +15,7 @@ const SeekerList = ({coachData, seenSeekers}) => {
             ];
     
             for (let proj in projs) {
-                if (Object.values(projs[proj]).length === 0) continue;
+                if (Object.values(projs[proj]).length === 0 || proj === 'email' || proj === 'timings' || proj === 'warmup' || proj === 'status') continue;
                 message.push(`### ${proj}:`)
                 for (let issue in projs[proj]) {
                     message.push(`  * ${(projs[proj][issue] === true) ? 'No Link in salesforce' : issue+' '+projs[proj][issue]}`)
@@ -102,7 +102,7 @@ const SeekerList = ({coachData, seenSeekers}) => {
                     <select className='mx-2 text-black rounded' onChange={e => (setIssueType(e.target.value))}>
                         <option defaultValue value="all">All</option>
                         {
-                            ['status', 'time', 'no-link', 'timeout', 'bad_url'].map(issue => (
+                            ['status', 'time', 'no-link', 'timeout', 'bad_url', 'content'].map(issue => (
                                 <option value={issue}>{issue}</option>
                             ))
                         }
@@ -1,13 +1,17 @@
 import firebase_app from "./config";
+import getRuns from "./getRuns";
 import { getFirestore, getDocs, orderBy, query, collection, where, limit } from "firebase/firestore";
 
 const db = getFirestore(firebase_app)
 
 /**
- * this function hits the firestore database for the all documents.
+ * this function hits the firestore database for the six most recent runs, or the six most recent healthData documents if no run was uploaded per coach.
  * @returns the all documents in firestore
  */
 export default async function getLastSixReports() {
+    const runs = await getRuns(6);
+    if (runs.length !== 0) return runs;
+
     const q = query(collection(db, 'healthData'), orderBy('date', 'desc'), limit(6));
     const qsnap = await getDocs(q);
     
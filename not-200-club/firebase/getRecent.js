@@ -1,13 +1,17 @@
 import firebase_app from "./config";
+import getRuns from "./getRuns";
 import { getFirestore, getDocs, orderBy, query, collection, limit } from "firebase/firestore";
 
 const db = getFirestore(firebase_app)
 
 /**
- * this function hits the firestore database for the two most recent documents.
+ * this function hits the firestore database for the two most recent runs, or the two most recent healthData documents if no run was uploaded per coach.
  * @returns the two most recent documents in firestore
  */
 export default async function getRecent() {
+    const runs = await getRuns(2);
+    if (runs.length !== 0) return runs;
+
     const q = query(collection(db, 'healthData'), orderBy('date', 'desc'), limit(2));
     const qsnap = await getDocs(q);
     
@@ -0,0 +1,36 @@
+import firebase_app from "./config";
+import { getFirestore, getDocs, getDoc, doc, orderBy, query, collection, limit } from "firebase/firestore";
+
+const db = getFirestore(firebase_app)
+
+/**
+ * this function hits the firestore database for the most recent run summaries and the coach documents they point at,
+ * runs uploaded with `--upload-mode coaches` share the documents of coaches that didn't change so each one is only fetched once.
+ * @param {number} count - how many runs to get
+ * @returns the runs, most recent first, in the same shape as a healthData document
+ */
+export default async function getRuns(count) {
+    const q = query(collection(db, 'healthRuns'), orderBy('date', 'desc'), limit(count));
+    const qsnap = await getDocs(q);
+
+    let runs = [];
+    qsnap.forEach(doc => {
+        runs.push(doc.data())
+    })
+
+    // the coach documents are fetched in parallel, one that's missing (a run whose upload was cut short) is left empty
+    const ids = new Set(runs.flatMap(run => Object.values(run.coaches)));
+    const coachDocs = {};
+    const snaps = await Promise.all([...ids].map(id => getDoc(doc(db, 'coachHealth', id))));
+    snaps.forEach(snap => {
+        coachDocs[snap.id] = snap.exists() ? snap.data().seekers : {};
+    });
+
+    return runs.map(run => {
+        let data = {date: run.date, overview: run.overview};
+        for (let coach in run.coaches) {
+            data[coach] = coachDocs[run.coaches[coach]];
+        }
+        return data;
+    });
+};
@@ -8,6 +8,7 @@ export const getNames = (data) => {
     let res = new Set();
 
     for (let coach in data) {
+        if (coach === 'date' || coach === 'overview') continue;
         let seekers = data[coach];
         for (let seeker in seekers) {
             res.add(seeker.toLowerCase());
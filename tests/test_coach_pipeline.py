@@ -0,0 +1,53 @@
+import pytest
+import sys
+import threading
+
+sys.path.append('../not_200_club')
+
+from util.coach_pipeline import CoachPipeline
+
+
+
+def test_coach_finishes_after_its_last_url():
+    applied, finished = list(), list()
+    step = threading.Event()
+    def finish(coach):
+        finished.append(coach)
+        step.set()
+
+    pipeline = CoachPipeline({'a': {'Coach A'}, 'shared': {'Coach A', 'Coach B'}, 'b': {'Coach B'}}, lambda url, res: applied.append(url), finish)
+    pipeline.done('a', {})
+    pipeline.done('shared', {})
+    assert step.wait(5) and finished == ['Coach A']
+
+    pipeline.done('shared', {}) # a url that is done twice is only applied once
+    pipeline.done('b', {})
+    pipeline.close()
+    assert finished == ['Coach A', 'Coach B']
+    assert applied == ['a', 'shared', 'b']
+
+def test_close_raises_for_missing_urls_and_writer_errors():
+    pipeline = CoachPipeline({'a': {'Coach A'}}, lambda url, res: None, lambda coach: None)
+    with pytest.raises(RuntimeError):
+        pipeline.close()
+
+    def finish(coach):
+        raise ValueError(coach)
+    pipeline = CoachPipeline({'a': {'Coach A'}, 'b': {'Coach B'}}, lambda url, res: None, finish)
+    pipeline.done('a', {})
+    pipeline.done('b', {})
+    with pytest.raises(ValueError):
+        pipeline.close()
+
+def test_done_never_waits_on_the_writer():
+    release = threading.Event()
+    pipeline = CoachPipeline({str(i): {f'Coach {i}'} for i in range(100)}, lambda url, res: None, lambda coach: release.wait(5))
+
+    done = threading.Thread(target=lambda: [pipeline.done(str(i), {}) for i in range(100)], daemon=True)
+    done.start()
+    done.join(2) # the writer is stuck on the first coach the whole time
+    assert not done.is_alive()
+
+    release.set()
+    pipeline.close()
+    assert pipeline.finished == 100
@@ -0,0 +1,28 @@
+import pytest
+import sys
+
+import openpyxl
+
+sys.path.append('../not_200_club')
+
+from util.data_to_xlsx import MAX_WIDTH, ColumnWidths
+
+
+
+def test_column_widths_use_the_longest_line():
+    widths = ColumnWidths()
+    widths.measure(['Seeker One', None, 'status: 404\ntime: 0:00:12.500000'])
+    widths.measure(['Seeker', 'Greenlit', 'x' * 500])
+    
+    assert widths.widths == {1: 10, 2: 8, 3: 500}
+
+def test_column_widths_are_applied_to_a_write_only_sheet():
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Coach')
+    widths = ColumnWidths()
+    widths.measure(['a', 'timeout: URL timeout at 15s\nno-link: True', 'x' * 500])
+    widths.apply(sheet)
+    
+    assert sheet.column_dimensions['A'].width == 1
+    assert sheet.column_dimensions['B'].width == len('timeout: URL timeout at 15s')
+    assert sheet.column_dimensions['C'].width == MAX_WIDTH
@@ -0,0 +1,34 @@
+import pytest
+import socket
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.dns_cache import DNSCache
+
+
+
+def test_resolve_all_finds_missing_hosts():
+    dns = DNSCache()
+    
+    assert dns.resolve_all(['localhost', 'nonexistent.invalid', 'localhost']) == {'nonexistent.invalid'}
+    assert ('127.0.0.1', 8080) in [address for *_, address in dns.getaddrinfo('localhost', 8080)]
+    with pytest.raises(socket.gaierror):
+        dns.getaddrinfo('nonexistent.invalid', 80)
+
+def test_answers_are_cached_until_the_ttl(monkeypatch):
+    lookups = list()
+    def getaddrinfo(host, *args):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 0))]
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    
+    dns = DNSCache(ttl=60)
+    dns.resolve_all(['seeker.onrender.com'])
+    assert dns.getaddrinfo('seeker.onrender.com', 443)[0][4] == ('10.0.0.1', 443)
+    assert lookups == ['seeker.onrender.com']
+    
+    expired = DNSCache(ttl=0)
+    expired.getaddrinfo('seeker.onrender.com', 443)
+    expired.getaddrinfo('seeker.onrender.com', 443)
+    assert len(lookups) == 3
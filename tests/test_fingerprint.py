@@ -0,0 +1,51 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.fingerprint import Fingerprint, fingerprint_stream
+from util.probe_cache import ProbeCache
+
+PAGE = b'<html><head><title>Application Error</title></head><body>' + b' ' * 5000 + b'</body></html>'
+
+
+
+def test_signature_split_between_chunks():
+    chunks = [PAGE[i:i + 30] for i in range(0, len(PAGE), 30)]
+    result = fingerprint_stream(chunks)
+
+    assert result['signature'] == 'heroku application error'
+    assert result == fingerprint_stream([PAGE]) # the hash doesn't depend on how the body was chunked
+
+def test_only_the_first_kb_are_read():
+    pulled = list()
+    def chunks():
+        for i in range(100):
+            pulled.append(i)
+            yield b'x' * 1024
+
+    fingerprint = Fingerprint(4)
+    for chunk in chunks():
+        if not fingerprint.update(chunk):
+            break
+    assert fingerprint.size == 4 * 1024 and len(pulled) == 4
+    assert fingerprint.result()['signature'] is None
+    assert fingerprint_stream([b'x' * 4096, b'Application Error'], 4)['signature'] is None
+
+def test_empty_page():
+    assert fingerprint_stream([b'  \n', b''])['signature'] == 'empty page'
+    assert fingerprint_stream([])['signature'] == 'empty page'
+
+def test_a_single_page_app_shell_is_a_normal_page():
+    # the html of a Vite or CRA build has no text until its script runs, it can't be told apart from a broken one
+    shell = (b'<!doctype html><html><head><title>React App</title><script type="module" src="/assets/index.js"></script></head>'
+             b'<body><noscript>You need to enable JavaScript to run this app.</noscript><div id="root"></div></body></html>')
+    assert fingerprint_stream([shell[i:i + 7] for i in range(0, len(shell), 7)])['signature'] is None
+
+def test_probe_cache_keeps_the_fingerprint_when_the_body_was_not_read(tmp_path):
+    cache = ProbeCache(path=str(tmp_path / 'cache.sqlite3'))
+    cache.store({'https://down.herokuapp.com': {'status': 200, 'elapsed': 0.1, 'fingerprint': 'abc', 'signature': 'heroku application error'}}, set())
+    cache.store({'https://down.herokuapp.com': {'status': 200, 'elapsed': 0.2}}, set())
+
+    assert cache.fingerprints(['https://down.herokuapp.com', 'https://new.dev']) == {'https://down.herokuapp.com': {'fingerprint': 'abc', 'signature': 'heroku application error'}}
+    cache.close()
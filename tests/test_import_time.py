@@ -0,0 +1,20 @@
+import os
+import pytest
+import subprocess
+import sys
+
+sys.path.append('../not_200_club')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+# the dependencies only the stages that need them load
+HEAVY = ('openpyxl', 'requests', 'urllib3', 'firebase_admin', 'google.cloud', 'alive_progress', 'dotenv')
+
+
+
+def run_python(code:str) -> subprocess.CompletedProcess:
+    env = {key: value for key, value in os.environ.items() if key != 'FIREBASE_CRED'}
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+def test_import_needs_no_credentials_and_no_heavy_dependencies():
+    out = run_python('import sys, Not_200_Club; Not_200_Club.Not200Club(None); print(" ".join(sys.modules))').stdout.split()
+    assert [module for module in out if module.startswith(HEAVY)] == []
@@ -0,0 +1,32 @@
+import pytest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('../not_200_club')
+
+from util.metrics import LatencyHistogram, MetricsCollector
+
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+    
+    assert histogram.count == 1000
+    assert histogram.max == 1.0
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.04)
+    assert histogram.percentile(90) == pytest.approx(0.9, rel=0.04)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.04)
+    assert LatencyHistogram().summary()['p50'] == 0.0
+
+def test_metrics_collector_merges_every_worker():
+    metrics = MetricsCollector()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: metrics.record({'solo', 'group'} if i % 2 else {'solo'}, i / 100), range(1000)))
+    
+    merged = metrics.merge()
+    assert merged['solo'].count == 1000
+    assert merged['group'].count == 500
+    assert merged['solo'].max == 9.99
+    assert merged['solo'].summary()['total'] == pytest.approx(sum(i / 100 for i in range(1000)), rel=0.001)
@@ -1,5 +1,6 @@
 import pytest
 import sys
+from time import monotonic
 
 sys.path.append('../not_200_club')
 
@@ -16,4 +17,16 @@ def test_validate_url():
     assert n2c._Not200Club__validate_url('https://www.google.com') == 'https://www.google.com'
     assert n2c._Not200Club__validate_url('') == ''
     assert n2c._Not200Club__validate_url('www.google.com/search?q=python') == 'https://www.google.com/search?q=python'
-    assert n2c._Not200Club__validate_url('http://www.google.com/search?q=python') == 'http://www.google.com/search?q=python'
\ No newline at end of file
+    assert n2c._Not200Club__validate_url('http://www.google.com/search?q=python') == 'http://www.google.com/search?q=python'
+def test_wake_up_probes_keep_to_the_deadline():
+    n2c = Not200Club(60, deadline=30)
+    timeouts = list()
+    n2c.prober.probe = lambda url, headers = None, timeout = None: timeouts.append(timeout) or {'status': 200, 'elapsed': 0.1, 'error': None, 'message': None}
+    
+    n2c.deadline_at = monotonic() + 2
+    n2c._Not200Club__wake('https://seeker.onrender.com')
+    assert 1 < timeouts[0] <= 2
+    
+    n2c.deadline_at = monotonic() - 1 # the deadline already passed, nothing is woken up
+    n2c._Not200Club__warm_up(['https://seeker.onrender.com'])
+    assert len(timeouts) == 1 and n2c.warmed == {}
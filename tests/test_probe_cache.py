@@ -0,0 +1,63 @@
+import pytest
+import sqlite3
+import sys
+from datetime import timedelta
+
+sys.path.append('../not_200_club')
+
+from util.probe_cache import ProbeCache
+
+
+
+def test_probe_cache_fresh_validators_and_evict(tmp_path):
+    cache = ProbeCache(timedelta(hours=1), str(tmp_path / 'cache.sqlite3'))
+    cache.store({
+        'https://up.onrender.com': {'status': 200, 'elapsed': 0.3, 'etag': '"abc"', 'last_modified': None},
+        'https://down.onrender.com': {'status': 404, 'elapsed': 0.2, 'etag': '"def"', 'last_modified': None},
+    }, {'https://up.onrender.com'})
+    
+    urls = ['https://up.onrender.com', 'https://down.onrender.com']
+    assert list(cache.fresh(urls)) == ['https://up.onrender.com']
+    assert cache.validators(urls) == {'https://up.onrender.com': {'If-None-Match': '"abc"'}}
+    
+    assert cache.evict(['https://up.onrender.com']) == 1
+    assert cache.fresh(urls)['https://up.onrender.com']['status'] == 200
+    cache.close()
+
+def test_probe_cache_ttl_zero_probes_everything(tmp_path):
+    cache = ProbeCache(path=str(tmp_path / 'cache.sqlite3'))
+    cache.store({'https://up.onrender.com': {'status': 200, 'elapsed': 0.3}}, {'https://up.onrender.com'})
+    assert cache.fresh(['https://up.onrender.com']) == {}
+    cache.close()
+
+def test_delta_carries_only_unchanged_recent_healthy_rows(tmp_path):
+    cache = ProbeCache(path=str(tmp_path / 'cache.sqlite3'))
+    urls = ['https://a.onrender.com', 'https://b.onrender.com', 'https://c.onrender.com', 'https://d.onrender.com']
+    cache.store({url: {'status': 200, 'elapsed': 0.3} for url in urls}, set(urls) - {'https://d.onrender.com'})
+    rows = {('Coach 0', 'Seeker 0', 'solo'): urls[0], ('Coach 0', 'Seeker 1', 'solo'): urls[1],
+            ('Coach 0', 'Seeker 2', 'solo'): urls[2], ('Coach 0', 'Seeker 3', 'solo'): urls[3]}
+    cache.store_rows(rows)
+    
+    # Seeker 1 moved coach, Seeker 2 changed url and d had issues last run, only a is left unchanged and healthy
+    rows = dict(rows)
+    rows[('Coach 1', 'Seeker 1', 'solo')] = rows.pop(('Coach 0', 'Seeker 1', 'solo'))
+    rows[('Coach 0', 'Seeker 2', 'solo')] = 'https://e.onrender.com'
+    urls = list(dict.fromkeys(rows.values()))
+    assert list(cache.carried(urls, rows, timedelta(days=7))) == ['https://a.onrender.com']
+    
+    # a carried result gets too old and is probed again
+    cache.db.execute('UPDATE probes SET checked_at = checked_at - ?', (timedelta(days=8).total_seconds(),))
+    assert cache.carried(urls, rows, timedelta(days=7)) == {}
+    cache.close()
+
+def test_rows_from_before_the_coach_key_are_dropped(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE rows (seeker TEXT NOT NULL, proj TEXT NOT NULL, url TEXT NOT NULL, PRIMARY KEY (seeker, proj))')
+    db.execute("INSERT INTO rows VALUES ('Seeker 0', 'solo', 'https://a.onrender.com')")
+    db.commit()
+    db.close()
+    
+    cache = ProbeCache(path=path)
+    assert cache.previous_rows() == {}
+    cache.close()
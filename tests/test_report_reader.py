@@ -0,0 +1,32 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.report_reader import map_headers, read_report
+
+
+
+def test_map_headers_by_name_and_order():
+    headers = ['Email', 'Owner Name', 'Placement: Placement Name', 'Status', 'Student Account: Group Project Live Link',
+               'Student Account: Solo Project Live Link', 'Student Account: Capstone Project Live Link']
+    assert map_headers(headers) == {'seeker': 2, 'coach': 1, 'status': 3, 'solo': 5, 'capstone': 6, 'group': 4, 'email': 0}
+    assert map_headers(['a', 'b', 'c', 'd', 'e', 'f', 'g'])['email'] == 6
+    
+    with pytest.raises(Exception):
+        map_headers(['Owner Name', 'Status'])
+
+def test_read_report_csv(tmp_path):
+    path = tmp_path / 'report.csv'
+    path.write_text(
+        'Owner Name,Placement: Placement Name,Status,Student Account: Solo Project Live Link,Student Account: Capstone Project Live Link,Student Account: Group Project Live Link,Email\n'
+        'Josiah Leon,John Smith,Greenlit,https://fakeurl.com/,,fakeurl3.com,fake@mail.com\n'
+        ' ,Jane Smith,Greenlit,,,,\n'
+        ',,,,,,\n'
+    )
+    rows = list(read_report(str(path)))
+    
+    assert len(rows) == 2
+    assert rows[0] == {'seeker': 'John Smith', 'coach': 'Josiah Leon', 'status': 'Greenlit', 'solo': 'https://fakeurl.com/',
+                       'capstone': '', 'group': 'fakeurl3.com', 'email': 'fake@mail.com'}
+    assert rows[1]['coach'] == 'Placements'
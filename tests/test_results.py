@@ -0,0 +1,46 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.results import Issue, ProjectResult, SeekerResult
+
+
+
+def test_project_cell():
+    assert ProjectResult('https://a.com').cell() == 'No Issues Found'
+    assert ProjectResult(issues={Issue.TIME: 12.5, Issue.STATUS: 404}).cell() == 'time: 0:00:12.500000\nstatus: 404'
+    assert ProjectResult(issues={Issue.NO_LINK: True}).cell() == 'no-link: True'
+
+def test_red_zone():
+    assert not Issue.TIME.red_zone
+    assert all(issue.red_zone for issue in Issue if issue is not Issue.TIME)
+
+def test_seeker_row_and_issues():
+    seeker = SeekerResult('Ada', 'Coach A', 'Greenlit', 'ada@example.com', {'solo': 'https://a.com'})
+    assert not seeker.has_issues
+    seeker.projects['group'].issues = {Issue.TIMEOUT: 'Read timed out'}
+    assert seeker.has_issues
+    assert seeker.row() == ['Ada', 'Greenlit', 'No Issues Found', 'No Issues Found', 'timeout: Read timed out']
+
+def test_statuses_are_interned():
+    a = SeekerResult('Ada', ''.join(['Coach ', 'A']), ''.join(['Green', 'lit']))
+    b = SeekerResult('Bob', ''.join(['Coach ', 'A']), ''.join(['Green', 'lit']))
+    assert a.coach is b.coach
+    assert a.status is b.status
+
+def test_json_round_trip():
+    seeker = SeekerResult('Ada', 'Coach A', 'Greenlit', 'ada@example.com')
+    seeker.projects['solo'].issues = {Issue.TIME: 11.0, Issue.STATUS: 503}
+    seeker.projects['solo'].phases = {'dns': 0.01, 'ttfb': 11.0}
+    seeker.projects['solo'].warmup = {'status': 503}
+
+    data = seeker.to_json()
+    assert data['solo'] == {'time': '11.0', 'status': 503}
+    assert data['capstone'] == {}
+    assert data['timings'] == {'solo': {'dns': 0.01, 'ttfb': 11.0}}
+    assert data['warmup'] == {'solo': {'status': 503}}
+
+    back = SeekerResult.from_json('Coach A', 'Ada', data)
+    assert back.row() == seeker.row()
+    assert back.to_json() == data
@@ -0,0 +1,63 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.results import Issue, SeekerResult
+from util.run_history import RunHistory
+
+
+
+def record_run(history, issues:dict, path:str = None) -> int:
+    seekers_by_coach = {'Coach A': dict(), 'Coach B': dict()}
+    url_index = {'': []}
+    results = dict()
+    for i, coach in enumerate(['Coach A', 'Coach A', 'Coach B']):
+        name = f'Seeker {i}'
+        url = f'https://seeker{i}.onrender.com'
+        seeker = seekers_by_coach[coach][name] = SeekerResult(name, coach, 'Greenlit', f'{i}@example.com', {'solo': url})
+        seeker.projects['solo'].issues = issues.get(name)
+        url_index[url] = [(coach, name, 'solo')]
+        url_index[''] += [(coach, name, 'capstone'), (coach, name, 'group')]
+        results[url] = {'status': 503 if issues.get(name) else 200, 'elapsed': 0.5, 'error': None}
+        for proj in ['capstone', 'group']:
+            seeker.projects[proj].issues = {Issue.NO_LINK: True} if i == 2 else None
+
+    return history.record(seekers_by_coach, url_index, results, {'seeker_with_issue': len(issues)}, path)
+
+def test_latest_and_coaches(tmp_path):
+    history = RunHistory(str(tmp_path / 'history.sqlite3'))
+    assert history.latest() is None
+
+    record_run(history, {'Seeker 0': {Issue.STATUS: 503}}, 'first.json')
+    run_id = record_run(history, {'Seeker 1': {Issue.TIME: 12.0}}, 'second.json')
+
+    latest = history.latest()
+    assert (latest['id'], latest['json_path'], latest['overview']) == (run_id, 'second.json', {'seeker_with_issue': 1})
+
+    coaches = history.coaches(run_id)
+    assert set(coaches) == {'Coach A', 'Coach B'}
+    assert [seeker.name for seeker in coaches['Coach A']] == ['Seeker 1']
+    assert coaches['Coach A'][0].projects['solo'].issues == {Issue.TIME: 12.0}
+    assert coaches['Coach B'][0].projects['group'].issues == {Issue.NO_LINK: True}
+    assert coaches['Coach B'][0].status == 'Greenlit'
+    history.close()
+
+def test_time_series_and_down(tmp_path):
+    history = RunHistory(str(tmp_path / 'history.sqlite3'))
+    record_run(history, {'Seeker 0': {Issue.STATUS: 503}})
+    record_run(history, {'Seeker 0': {Issue.STATUS: 503}, 'Seeker 1': {Issue.STATUS: 404}})
+    record_run(history, {'Seeker 0': {Issue.TIMEOUT: 'timed out'}, 'Seeker 1': {Issue.STATUS: 404}})
+
+    assert history.down(3) == [
+        {'coach': 'Coach A', 'seeker': 'Seeker 0', 'proj': 'solo'},
+        {'coach': 'Coach B', 'seeker': 'Seeker 2', 'proj': 'capstone'},
+        {'coach': 'Coach B', 'seeker': 'Seeker 2', 'proj': 'group'},
+    ]
+    assert len(history.down(2)) == 4
+    assert history.down(4) == []
+
+    solo = [row for row in history.seeker('Seeker 0') if row['proj'] == 'solo']
+    assert [row['issues'] for row in solo] == [{'timeout': 'timed out'}, {'status': 503}, {'status': 503}]
+    assert [row['status'] for row in history.url('https://seeker1.onrender.com', limit=2)] == [503, 503]
+    history.close()
@@ -0,0 +1,53 @@
+import json
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.run_journal import RunJournal
+
+
+
+def test_resume_replays_the_last_run(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path=path)
+    journal.record('https://up.onrender.com', {'status': 200, 'elapsed': 0.3, 'error': None})
+    journal.close()
+    
+    with open(path, 'a') as file:
+        file.write('{"run": "' + journal.run_id + '", "url": "https://half')
+    
+    resumed = RunJournal(resume=True, path=path)
+    assert resumed.run_id == journal.run_id
+    assert resumed.results == {'https://up.onrender.com': {'status': 200, 'elapsed': 0.3, 'error': None}}
+    resumed.record('https://down.onrender.com', {'status': 404, 'elapsed': 0.1, 'error': None})
+    resumed.close()
+    
+    assert len(RunJournal(resume=True, path=path).results) == 2
+
+def test_new_run_starts_a_new_journal(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path=path)
+    journal.record('https://up.onrender.com', {'status': 200})
+    journal.close()
+    
+    assert RunJournal(path=path).results == {}
+    assert RunJournal(resume=True, path=path).results == {}
+
+def test_a_finished_or_old_run_is_not_resumed(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path=path)
+    journal.record('https://up.onrender.com', {'status': 200})
+    journal.close(finished=True)
+    
+    resumed = RunJournal(resume=True, path=path)
+    assert not resumed.resumed and resumed.results == {}
+    resumed.close()
+    assert RunJournal(path=path, read_only=True).results == {} # the finished run was started over
+    
+    with open(path, 'w') as file:
+        file.write(json.dumps({'run': 'old', 'started': '2026-01-01T09:00:00'}) + '\n')
+        file.write(json.dumps({'run': 'old', 'url': 'https://up.onrender.com', 'result': {'status': 200}}) + '\n')
+    assert RunJournal(path=path, read_only=True).results == {'https://up.onrender.com': {'status': 200}}
+    resumed = RunJournal(resume=True, path=path)
+    assert not resumed.resumed and resumed.run_id != 'old' and resumed.results == {}
@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+import sys
+import threading
+
+sys.path.append('../not_200_club')
+
+from util.scheduler import HostScheduler, cold_start, host_key, parse_retry_after
+
+
+
+def test_host_key():
+    assert host_key('https://seeker-one.onrender.com/about') == 'onrender.com'
+    assert host_key('https://seeker.github.io/portfolio') == 'github.io'
+    assert host_key('https://www.seekersite.dev') == 'seekersite.dev'
+    assert host_key('http://127.0.0.1:8080') == '127.0.0.1'
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+
+def test_cold_start_platforms():
+    assert cold_start('https://seeker.onrender.com/')
+    assert cold_start('https://seeker-app.herokuapp.com')
+    assert not cold_start('https://seeker.github.io')
+    assert not cold_start('https://seeker.dev')
+
+def test_acquire_cut_off_by_a_deadline_never_wedges_the_host():
+    # waiters whose deadline lands while the host is paused used to leave the host's lock taken for good
+    url = 'https://seeker.onrender.com'
+    ok = {'status': 200, 'elapsed': 0.1, 'error': None}
+
+    async def waiter(scheduler, timeout):
+        try:
+            key = await asyncio.wait_for(scheduler.acquire(url), timeout)
+        except asyncio.TimeoutError:
+            return
+        await scheduler.release(key, ok, 0)
+
+    async def rounds():
+        for _ in range(20):
+            scheduler = HostScheduler(max_per_host=8, start_per_host=8, rate=1e6)
+            await scheduler.release(await scheduler.acquire(url), {'status': 503, 'elapsed': 0.1, 'error': None, 'retry_after': 0.005}, 0)
+            await asyncio.gather(*(waiter(scheduler, 0.004 + i * 0.00005) for i in range(64)))
+            await scheduler.release(await scheduler.acquire(url), ok, 0)
+            assert scheduler.hosts['onrender.com'].in_flight == 0
+
+    errors = list()
+    def run():
+        try:
+            asyncio.run(rounds())
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True) # a wedged loop can't be cancelled, so it's waited on from here
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive(), 'a waiter cut off by its deadline wedged the host'
+    assert errors == []
+
+def test_a_timeout_does_not_back_off_the_platform():
+    async def run():
+        scheduler = HostScheduler(max_per_host=8, start_per_host=8)
+        key = await scheduler.acquire('https://dead-seeker.onrender.com')
+        await scheduler.release(key, {'status': None, 'elapsed': None, 'error': 'timeout'}, 0)
+        return scheduler.hosts['onrender.com'].limit
+
+    assert asyncio.run(run()) == 8
+
+OK = {'status': 200, 'elapsed': 0.1, 'error': None}
+BUSY = {'status': 429, 'elapsed': 0.1, 'error': None, 'retry_after': 0.05}
+
+def test_a_bare_503_from_one_site_leaves_the_platform_alone():
+    async def run():
+        scheduler = HostScheduler(max_per_host=8, start_per_host=8, rate=1e6)
+        state = scheduler.hosts['onrender.com']
+        for _ in range(5): # a crashed app's error page, no Retry-After
+            key = await scheduler.acquire('https://dead-seeker.onrender.com')
+            assert not await scheduler.release(key, {'status': 503, 'elapsed': 0.1, 'error': None, 'retry_after': None}, 0)
+        assert state.limit == 8 and state.blocked_until == 0 and scheduler.throttled == 0
+
+        start = asyncio.get_running_loop().time()
+        await scheduler.release(await scheduler.acquire('https://live-seeker.onrender.com'), OK, 0)
+        assert asyncio.get_running_loop().time() - start < 0.05
+
+        key = await scheduler.acquire('https://busy-seeker.onrender.com') # a 503 that asks us to come back is throttling
+        assert await scheduler.release(key, {'status': 503, 'elapsed': 0.1, 'error': None, 'retry_after': 0}, 0)
+        assert state.limit == 4
+
+    asyncio.run(run())
+
+def test_acquire_holds_the_cap_and_release_wakes_a_waiter():
+    async def run():
+        scheduler = HostScheduler(max_per_host=2, start_per_host=2, rate=1e6)
+        keys = [await scheduler.acquire('https://a.github.io'), await scheduler.acquire('https://b.github.io')]
+        third = asyncio.create_task(scheduler.acquire('https://c.github.io'))
+        await asyncio.sleep(0.02)
+        assert not third.done() # the platform is at its cap
+        assert await scheduler.acquire('https://seeker.dev') == 'seeker.dev' # other hosts aren't held up
+
+        await scheduler.release(keys[0], OK, 0)
+        assert await asyncio.wait_for(third, 1) == 'github.io'
+        assert scheduler.hosts['github.io'].in_flight == 2
+
+    asyncio.run(run())
+
+def test_throttling_halves_the_cap_and_fast_answers_widen_it():
+    async def run():
+        scheduler = HostScheduler(max_per_host=8, start_per_host=8, rate=1e6)
+        state = scheduler.hosts['seeker.dev']
+        await scheduler.release(await scheduler.acquire('https://seeker.dev'), dict(BUSY, retry_after=0), 0)
+        assert state.limit == 4 and scheduler.throttled == 1
+
+        for _ in range(4):
+            await scheduler.release(await scheduler.acquire('https://seeker.dev'), OK, 0)
+        assert 4 < state.limit < 5 # additive, about one more slot for every `limit` fast answers
+        await scheduler.release(await scheduler.acquire('https://seeker.dev'), {'status': 200, 'elapsed': 5.0, 'error': None}, 0)
+        assert 4 < state.limit < 5 # a slow answer doesn't widen it
+
+        for _ in range(10):
+            await scheduler.release(await scheduler.acquire('https://seeker.dev'), dict(BUSY, retry_after=0), 0)
+        assert state.limit == 1 # never under a single slot
+
+    asyncio.run(run())
+
+def test_retry_after_pauses_the_host_and_retries_are_counted():
+    async def run():
+        scheduler = HostScheduler(rate=1e6, max_retries=2)
+        key = await scheduler.acquire('https://seeker.dev')
+        assert await scheduler.release(key, BUSY, 0) # throttled, try it again
+
+        start = asyncio.get_running_loop().time()
+        key = await scheduler.acquire('https://seeker.dev')
+        assert asyncio.get_running_loop().time() - start >= 0.04 # waited out the Retry-After
+        assert await scheduler.release(key, BUSY, 1)
+
+        key = await scheduler.acquire('https://seeker.dev')
+        assert not await scheduler.release(key, dict(BUSY, retry_after=0), 2) # out of retries, the 429 is reported
+        key = await scheduler.acquire('https://seeker.dev')
+        assert not await scheduler.release(key, OK, 0)
+
+    asyncio.run(run())
+
+def test_token_bucket_spaces_out_a_burst():
+    async def run():
+        scheduler = HostScheduler(max_per_host=32, start_per_host=32, rate=50)
+        start = asyncio.get_running_loop().time()
+        for _ in range(60): # 50 come out of the bucket at once, the last 10 at 50 a second
+            await scheduler.release(await scheduler.acquire('https://seeker.dev'), OK, 0)
+        return asyncio.get_running_loop().time() - start
+
+    assert 0.15 < asyncio.run(run()) < 1
@@ -0,0 +1,39 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.metrics import LatencyHistogram
+from util.run_journal import RunJournal
+from util.shards import parse_shard, shard_of
+
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    assert parse_shard(' 1 / 1 ') == (1, 1)
+    for bad in ['0/4', '5/4', '2', 'a/b', '']:
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+def test_shard_of_splits_every_url_once():
+    urls = [f'https://seeker{i}.onrender.com' for i in range(1000)]
+    shards = [shard_of(url, 4) for url in urls]
+    
+    assert shards == [shard_of(url, 4) for url in urls]
+    assert set(shards) == {1, 2, 3, 4}
+    assert all(150 < shards.count(i) < 350 for i in range(1, 5))
+
+def test_shard_histograms_survive_the_journal(tmp_path):
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    
+    path = str(tmp_path / 'shard.jsonl')
+    journal = RunJournal(path=path)
+    journal.record('https://up.onrender.com', {'status': 200})
+    journal.record_histograms({'solo': histogram})
+    journal.close()
+    
+    replayed = LatencyHistogram.from_dict(RunJournal(resume=True, path=path).histograms['solo'])
+    assert replayed.summary() == histogram.summary()
@@ -0,0 +1,113 @@
+import pytest
+import smtplib
+import socket
+import sys
+from email.mime.text import MIMEText
+
+sys.path.append('../not_200_club')
+
+from util.smtp_delivery import DeliveryEngine
+
+aiosmtpd = pytest.importorskip('aiosmtpd.controller')
+
+
+
+class Handler:
+    def __init__(self):
+        self.delivered = list()
+        self.tries = dict()
+        self.sessions = 0
+    
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+    
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        self.tries[address] = self.tries.get(address, 0) + 1
+        if address.startswith('flaky') and self.tries[address] == 1:
+            return '451 try again later'
+        if address.startswith('gone'):
+            return '550 no such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    handler = Handler()
+    controller = aiosmtpd.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+def delivery(name, to):
+    message = MIMEText(f'Hey {name}')
+    message['From'], message['To'] = 'n2c@example.com', to
+    return {'name': name, 'from': 'n2c@example.com', 'to': to, 'message': message}
+
+def test_send_all_retries_and_reports(smtp):
+    handler, port = smtp
+    engine = DeliveryEngine('127.0.0.1', port, 'none', connections=3, retries=2, backoff=0.01)
+    deliveries = [delivery(f'Coach {i}', f'coach{i}@example.com') for i in range(10)]
+    deliveries += [delivery('Flaky', 'flaky@example.com'), delivery('Gone', 'gone@example.com')]
+    
+    done = list()
+    report = engine.send_all(deliveries, done.append)
+    
+    assert len(done) == 12
+    assert [row['name'] for row in report] == [d['name'] for d in deliveries]
+    assert sorted(handler.delivered) == sorted([f'coach{i}@example.com' for i in range(10)] + ['flaky@example.com'])
+    assert report[10]['status'] == 'sent' and report[10]['attempts'] == 2
+    assert report[11]['status'] == 'failed' and report[11]['attempts'] == 1
+    assert '550' in report[11]['error']
+
+def test_unreachable_server_fails_every_delivery():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    
+    report = DeliveryEngine('127.0.0.1', port, 'none', retries=1, backoff=0.01).send_all([delivery('Coach', 'coach@example.com')])
+    assert report[0]['status'] == 'failed'
+    assert report[0]['attempts'] == 2
+
+def test_a_refused_recipient_keeps_the_connection(smtp):
+    handler, port = smtp
+    engine = DeliveryEngine('127.0.0.1', port, 'none', connections=1, retries=2, backoff=0.01)
+    deliveries = [delivery('Gone', 'gone@example.com'), delivery('Flaky', 'flaky@example.com'), delivery('Coach', 'coach@example.com')]
+    
+    report = engine.send_all(deliveries)
+    
+    assert [row['status'] for row in report] == ['failed', 'sent', 'sent']
+    assert handler.sessions == 1
+
+def test_a_rejected_login_closes_the_connection(monkeypatch):
+    from aiosmtpd.smtp import AuthResult
+    
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    controller = aiosmtpd.Controller(Handler(), hostname='127.0.0.1', port=port, auth_require_tls=False,
+                                     authenticator=lambda *args: AuthResult(success=False, handled=False))
+    controller.start()
+    
+    opened = list()
+    connect = smtplib.SMTP.connect
+    def tracked(self, *args, **kwargs):
+        opened.append(self)
+        return connect(self, *args, **kwargs)
+    monkeypatch.setattr(smtplib.SMTP, 'connect', tracked)
+    try:
+        report = DeliveryEngine('127.0.0.1', port, 'none', 'n2c', 'wrong', backoff=0.01).send_all([delivery('Coach', 'coach@example.com')])
+    finally:
+        controller.stop()
+    
+    assert report[0]['status'] == 'failed' and 'SMTPAuthenticationError' in report[0]['error']
+    assert len(opened) == 1 and opened[0].sock is None # a 535 isn't retried, and the socket wasn't left open
@@ -0,0 +1,53 @@
+import pytest
+import socket
+import sys
+from urllib.request import urlopen
+
+sys.path.append('../not_200_club')
+
+from util.telemetry import Telemetry
+
+
+
+def probed(telemetry, url, result):
+    telemetry.started()
+    telemetry.finished(url, result)
+
+def test_render_counts_hosts_and_histogram():
+    telemetry = Telemetry()
+    telemetry.stage = 'probe'
+    telemetry.begin(4, lambda: 1)
+    probed(telemetry, 'https://a.onrender.com', {'status': 200, 'elapsed': 0.2, 'error': None})
+    probed(telemetry, 'https://b.onrender.com', {'status': 503, 'elapsed': 3.0, 'error': None})
+    probed(telemetry, 'https://seeker.dev', {'status': None, 'elapsed': None, 'error': 'timeout'})
+    telemetry.completed()
+    telemetry.completed(cut_off=True)
+    text = telemetry.render()
+
+    assert 'not200_stage{stage="probe"} 1' in text
+    assert 'not200_urls_done_total 2' in text
+    assert 'not200_urls_cut_off_total 1' in text
+    assert 'not200_queue_depth 1' in text
+    assert 'not200_probes_in_flight 0' in text
+    assert 'not200_host_probes_total{host="onrender.com"} 2' in text
+    assert 'not200_host_error_ratio{host="onrender.com"} 0.5' in text
+    assert 'not200_host_error_ratio{host="seeker.dev"} 1' in text
+    assert 'not200_probe_duration_seconds_bucket{le="0.25"} 1' in text
+    assert 'not200_probe_duration_seconds_bucket{le="+Inf"} 2' in text
+    assert 'not200_probe_duration_seconds_count 2' in text
+
+def test_exporting_serves_and_writes_the_textfile(tmp_path):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    path = str(tmp_path / 'not200club.prom')
+
+    telemetry = Telemetry()
+    with telemetry.exporting(port, path, interval=60):
+        telemetry.begin(1)
+        with urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+            assert 'not200_urls_total 1' in response.read().decode()
+        telemetry.completed()
+
+    with open(path) as file: # written one last time on the way out
+        assert 'not200_urls_done_total 1' in file.read()
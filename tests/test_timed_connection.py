@@ -0,0 +1,52 @@
+import pytest
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append('../not_200_club')
+
+from util.prober import Prober
+from util.timed_connection import PHASES
+
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '5')
+        self.end_headers()
+        self.wfile.write(b'hello')
+
+    do_HEAD = do_GET
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{srv.server_address[1]}/'
+    srv.shutdown()
+
+def test_probe_times_every_phase(server):
+    prober = Prober(timeout=5)
+    first = prober.probe(server)
+    second = prober.probe(server)
+    
+    assert first['status'] == 200
+    assert set(first['phases']) == set(PHASES)
+    assert first['phases']['connect'] > 0
+    assert first['phases']['ttfb'] > 0
+    # the second probe reuses the keep-alive connection of the first
+    assert second['phases']['connect'] == 0
+    assert second['phases']['ttfb'] > 0
+
+def test_full_probe_times_the_transfer(server):
+    res = Prober(timeout=5, mode='full').probe(server)
+    
+    assert res['status'] == 200
+    assert res['phases']['tls'] == 0
+    assert res['phases']['transfer'] >= 0
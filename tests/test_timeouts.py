@@ -0,0 +1,39 @@
+import pytest
+import sys
+from time import monotonic, sleep
+
+sys.path.append('../not_200_club')
+
+from util.probe_engine import ProbeEngine
+from util.timeouts import TimeoutPolicy
+
+
+
+def test_timeout_follows_the_host():
+    policy = TimeoutPolicy(cap=60, floor=15, multiple=4, min_samples=8)
+    assert policy.timeout_for('https://a.onrender.com') == 60
+    
+    for i in range(20):
+        policy.record(f'https://seeker{i}.onrender.com', {'error': None, 'elapsed': 0.5}, 60)
+    assert policy.timeout_for('https://new.onrender.com') == 15
+    assert policy.timeout_for('https://new.herokuapp.com') == 60
+    
+    for i in range(20):
+        policy.record(f'https://seeker{i}.herokuapp.com', {'error': 'timeout', 'elapsed': None}, 60)
+    assert policy.timeout_for('https://new.herokuapp.com') == 60
+
+def test_no_cap_means_no_timeout():
+    policy = TimeoutPolicy(cap=None)
+    for i in range(20):
+        policy.record(f'https://seeker{i}.onrender.com', {'error': None, 'elapsed': 0.5}, None)
+    assert policy.timeout_for('https://new.onrender.com') is None
+
+def test_engine_cuts_off_jobs_at_the_deadline():
+    done = list()
+    engine = ProbeEngine(lambda url: sleep(0.2) or {'status': 200}, concurrency=2, deadline=monotonic() + 0.3, cutoff_result={'error': 'timeout'})
+    results = engine.run({i: f'https://{i}.com' for i in range(10)}, lambda key, res: done.append(key))
+    
+    assert len(results) == 10
+    assert engine.cut_off == len([res for res in results.values() if res == {'error': 'timeout'}])
+    assert 4 <= engine.cut_off <= 8
+    assert len(done) == 10 - engine.cut_off
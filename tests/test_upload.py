@@ -0,0 +1,74 @@
+import json
+import os
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+import upload
+import util.run_history
+from upload import COACHES, RUNS, Uploader
+from util.upload_backends import MemoryBackend, chunk_docs
+
+
+
+def write_output(res, coaches:dict, date:str) -> None:
+    data = dict(coaches)
+    data['date'] = date
+    data['overview'] = {'seeker_with_issue': sum(len(seekers) for seekers in coaches.values())}
+    path = os.path.join(res, f'not200club {date[:2]}.json')
+    with open(path, 'w') as file:
+        json.dump(data, file)
+    
+    history = util.run_history.RunHistory()
+    history.record(dict(), dict(), dict(), data['overview'], path)
+    history.close()
+
+def test_only_changed_coaches_are_written(tmp_path, monkeypatch):
+    monkeypatch.setattr(util.run_history, 'RES', str(tmp_path))
+    backend = MemoryBackend()
+    coaches = {f'Coach {i}': {f'Seeker {i}': {'solo': {'status': 404}}} for i in range(3)}
+
+    write_output(tmp_path, coaches, '10/17/2026, 09:00:00')
+    Uploader('coaches', backend).upload_data()
+    assert len(backend.collections[COACHES]) == 3
+
+    coaches['Coach 1'] = {}
+    write_output(tmp_path, coaches, '10/18/2026, 09:00:00')
+    Uploader('coaches', backend).upload_data()
+
+    assert backend.batches[-2] == (COACHES, [backend.collections[RUNS]['2026-10-18T09:00:00']['coaches']['Coach 1']])
+    summary = backend.latest(RUNS)
+    assert set(summary['coaches']) == {'Coach 0', 'Coach 1', 'Coach 2'}
+    assert backend.collections[COACHES][summary['coaches']['Coach 1']] == {'coach': 'Coach 1', 'seekers': {}}
+    assert 'healthData' not in backend.collections
+
+def test_timings_alone_dont_rewrite_a_coach(tmp_path, monkeypatch):
+    monkeypatch.setattr(util.run_history, 'RES', str(tmp_path))
+    backend = MemoryBackend()
+    seeker = {'solo': {'status': 404}, 'status': 'active', 'timings': {'solo': {'total': 1.2}}, 'warmup': {'solo': 0.3}}
+
+    write_output(tmp_path, {'Coach 0': {'Seeker 0': seeker}}, '10/18/2026, 09:00:00')
+    Uploader('coaches', backend).upload_data()
+    seeker = dict(seeker, timings={'solo': {'total': 4.8}}, warmup={'solo': 0.9})
+    write_output(tmp_path, {'Coach 0': {'Seeker 0': seeker}}, '10/18/2026, 15:00:00')
+    Uploader('coaches', backend).upload_data()
+
+    assert [collection for collection, _ in backend.batches] == [COACHES, RUNS, RUNS]
+    assert len(backend.collections[RUNS]) == 2 # the second run of the day doesn't replace the first
+    assert backend.collections[COACHES][backend.latest(RUNS)['coaches']['Coach 0']]['seekers'] == {
+        'Seeker 0': {'solo': {'status': 404}, 'status': 'active'}}
+
+def test_document_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(util.run_history, 'RES', str(tmp_path))
+    backend = MemoryBackend()
+    write_output(tmp_path, {'Coach 0': {}}, '10/18/2026, 09:00:00')
+    Uploader(backend=backend).upload_data()
+    assert list(backend.collections) == ['healthData']
+
+def test_chunk_docs():
+    docs = {str(i): {'seekers': 'x' * 100} for i in range(1200)}
+    assert [len(batch) for batch in chunk_docs(docs)] == [500, 500, 200]
+    assert [len(batch) for batch in chunk_docs(docs, max_bytes=1200)] == [10] * 120
+    with pytest.raises(ValueError):
+        list(chunk_docs({'big': {'seekers': 'x' * 2 * 1024 * 1024}}))
@@ -0,0 +1,19 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from util.urls import canonicalize_url
+
+
+
+def test_canonicalize_url():
+    assert canonicalize_url('') == ''
+    assert canonicalize_url(None) == ''
+    assert canonicalize_url('https://Seeker.OnRender.com/') == 'https://seeker.onrender.com'
+    assert canonicalize_url('HTTPS://seeker.github.io/portfolio/#about') == 'https://seeker.github.io/portfolio'
+    assert canonicalize_url('https://app.herokuapp.com:443/search?q=Python') == 'https://app.herokuapp.com/search?q=Python'
+    assert canonicalize_url('http://localhost:8080//') == 'http://localhost:8080'
+
+def test_canonicalize_url_dedups_group_links():
+    assert canonicalize_url('https://group.netlify.app/') == canonicalize_url(' https://GROUP.netlify.app#home ')
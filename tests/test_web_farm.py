@@ -0,0 +1,44 @@
+import pytest
+import sys
+
+sys.path.append('../not_200_club')
+
+from bench.benchmark import compare
+from bench.web_farm import WebFarm
+from util.prober import Prober
+
+
+
+@pytest.fixture(scope='module')
+def farm():
+    with WebFarm(hosts=2, slow=0.2, hang=2) as farm:
+        yield farm
+
+def test_web_farm_behaviors(farm):
+    prober = Prober(timeout=1)
+    
+    assert len(farm.bases) == 2
+    assert prober.probe(farm.url(0, 'ok', 'a'))['status'] == 200
+    assert prober.probe(farm.url(1, 'missing', 'a'))['status'] == 404
+    assert prober.probe(farm.url(0, 'busy', 'a'))['retry_after'] == 0
+    assert prober.probe(farm.url(1, 'crashed', 'a'))['retry_after'] is None
+    assert prober.probe(farm.url(1, 'hang', 'a'))['error'] == 'timeout'
+    assert prober.probe(farm.url(0, 'reset', 'a'))['error'] == 'bad_url'
+    assert prober.probe(farm.url(1, 'slow', 'a'))['elapsed'] >= 0.2
+    with pytest.raises(ValueError):
+        farm.url(0, 'teapot', 'a')
+
+def test_content_check_catches_error_pages(farm):
+    prober = Prober(timeout=1, content_kb=16)
+    
+    down = prober.probe(farm.url(0, 'errorpage', 'a'))
+    assert down['status'] == 200 and down['signature'] == 'heroku application error'
+    up = prober.probe(farm.url(1, 'ok', 'a'))
+    assert up['signature'] is None and up['fingerprint'] != down['fingerprint']
+    assert prober.probe(farm.url(1, 'big', 'a'))['phases']['transfer'] < 1 # only the first 16KB are read
+
+def test_compare_finds_regressions():
+    baseline = {'probes_per_sec': 100, 'wall': 10, 'peak_rss_mb': 80}
+    
+    assert compare({'probes_per_sec': 90, 'wall': 11, 'peak_rss_mb': 85}, baseline, 0.2) == []
+    assert len(compare({'probes_per_sec': 70, 'wall': 13, 'peak_rss_mb': 80}, baseline, 0.2)) == 2
@@ -5,41 +5,66 @@ to firestore for the frontend.
 
 import json
 import os
+from datetime import datetime
 
-import firebase_admin
-from dotenv import load_dotenv
-from firebase_admin import credentials, firestore
-
-# loading the local .env file
-load_dotenv()
+from util.run_history import RunHistory
+from util.upload_backends import FirestoreBackend, chunk_docs, content_hash
 
 # Constants
-DIR = os.path.dirname(os.path.realpath(__file__))
-RES = os.path.join(DIR, 'res')
-FIRESTORE_CRED = json.loads(os.getenv("FIREBASE_CRED"))
+UPLOAD_MODES = ('document', 'coaches')
+# the collections of the 'coaches' upload mode, a summary of every run and a document for every coach
+RUNS = 'healthRuns'
+COACHES = 'coachHealth'
+# the keys of a seeker that change on every run (how long the probes took), they're left out of the coach
+# documents so a coach whose seekers' sites didn't change keeps the same document
+PER_RUN_KEYS = ('timings', 'warmup')
 
 
 class Uploader:
     
     def __get_most_recent_json(self) -> None:
         """
-        This Python function finds the most recent JSON file in a directory and sets the file path.
+        This function looks the most recent run up in the run history and sets the file path to its json.
         """
-        files = os.listdir(RES)
-        most_recent_file = [0, '']
+        history = RunHistory()
+        run = history.latest()
+        history.close()
         
-        for f in files:
-            t = os.path.getmtime(os.path.join(RES, f))
-            if f.endswith('json') and t > most_recent_file[0]:
-                most_recent_file = [t, f]
+        if run is None or not run['json_path']:
+            raise FileNotFoundError('UPLOAD ERROR - the run history has no runs, run the Not 200 Club first')
         
-        self.file_path = os.path.join(RES, most_recent_file[1])
+        self.file_path = run['json_path']
     
-    def __init__(self) -> None:
-        # setting up firebase connection
-        cred = credentials.Certificate(FIRESTORE_CRED)
-        self.app = firebase_admin.initialize_app(cred)
-        self.db = firestore.client()
+    def __init__(self, mode: str = 'document', backend = None) -> None:
+        """
+        The Uploader sends the most recent json output to the frontend's database.
+        
+        :param mode: The `mode` parameter is how the output is uploaded, 'document' adds the whole output
+        as one `healthData` document, 'coaches' writes a document for every coach whose data changed
+        since the last run and a small summary document of the run
+        :type mode: str (optional)
+        :param backend: The `backend` parameter is where the documents are written, defaults to Firestore
+        with the credentials in FIREBASE_CRED, a `MemoryBackend` stands in for it in the tests
+        """
+        if mode not in UPLOAD_MODES:
+            raise ValueError(f'UPLOAD MODE ERROR - ({mode}) is not an upload mode, pick from {UPLOAD_MODES}')
+        self.mode = mode
+        
+        if backend is None:
+            # firebase and the .env are only loaded when something is really uploaded, importing this is free
+            import firebase_admin
+            from dotenv import load_dotenv
+            from firebase_admin import credentials, firestore
+            
+            load_dotenv() # loading the local .env file
+            if not os.getenv('FIREBASE_CRED'):
+                raise ValueError('UPLOAD ERROR - FIREBASE_CRED is not set, add the firebase credentials to the .env')
+            
+            # setting up firebase connection
+            cred = credentials.Certificate(json.loads(os.getenv('FIREBASE_CRED')))
+            self.app = firebase_admin.initialize_app(cred)
+            backend = FirestoreBackend(firestore.client())
+        self.backend = backend
         
         # getting data to upload
         self.file_path = ''
@@ -47,18 +72,57 @@ class Uploader:
         
     def upload_data(self) -> None:
         """
-        The `upload_data` function reads JSON data from a file and adds it to a collection in a
-        database.
+        The `upload_data` function reads JSON data from a file and uploads it to the database the way
+        the upload mode says.
         """
-        coll = self.db.collection('healthData')
         data = None
         
         # turn self.json into dict via the data var
         with open(self.file_path, 'r') as f:
             data = json.loads(f.read())
             
-        coll.add(data)
+        if self.mode == 'coaches':
+            self.upload_coaches(data)
+        else:
+            self.backend.add('healthData', data)
         print('data sent!')
+        
+    def upload_coaches(self, data: dict) -> dict:
+        """
+        The `upload_coaches` function writes every coach's seekers to their own document in batches and
+        then the run's summary. A coach's document id is the hash of its content, so only the coaches
+        whose seekers changed since the last run are written, the rest are already there (the timings of
+        the seekers change on every run, they stay in the json output). The summary is keyed by the time
+        of the run and has the date, the overview and the id of every coach's document, the frontend reads the summary
+        and then just the coach documents it needs.
+        
+        :param data: The `data` parameter is the json output of a run
+        :type data: dict
+        :return: the summary of the run that was written.
+        """
+        previous = set(((self.backend.latest(RUNS) or dict()).get('coaches') or dict()).values())
+        ran_at = datetime.strptime(data['date'], '%m/%d/%Y, %H:%M:%S')
+        
+        coaches, docs = dict(), dict()
+        for coach, seekers in data.items():
+            if coach in {'date', 'overview'}:
+                continue
+            seekers = {seeker: {key: value for key, value in projs.items() if key not in PER_RUN_KEYS}
+                       for seeker, projs in seekers.items()}
+            doc = {'coach': coach, 'seekers': seekers}
+            doc_id = coaches[coach] = content_hash(doc)
+            if doc_id not in previous:
+                docs[doc_id] = doc
+                
+        for batch in chunk_docs(docs):
+            self.backend.commit(COACHES, batch)
+        
+        # the summary goes last so it never points at a coach document that isn't written yet
+        summary = {'date': ran_at, 'overview': data['overview'], 'coaches': coaches}
+        self.backend.commit(RUNS, {ran_at.strftime('%Y-%m-%dT%H:%M:%S'): summary})
+        
+        print(f'{len(docs)}/{len(coaches)} coaches changed since the last run')
+        return summary
     
 if __name__ == '__main__':
     print('this will send the most recent json to the data, do you want to continue?')
@@ -0,0 +1,91 @@
+import threading
+from collections import defaultdict as ddict
+from queue import SimpleQueue
+
+
+class CoachPipeline:
+
+    def __init__(self, coaches_by_url:dict, apply, finish) -> None:
+        """
+        The CoachPipeline connects the probing to the writing of every coach's outputs. Every result is
+        applied as soon as it comes in, and once the last url a coach is waiting on is in, the coach is
+        put on a queue and finished by a writer thread while the other coaches are still probing. The
+        queue is never full (there's only one entry per coach), so handing a coach off never blocks the
+        probe engine's event loop when the writer falls behind.
+
+        :param coaches_by_url: The `coaches_by_url` parameter is a dictionary of every unique url to the
+        coaches that have a project on it
+        :type coaches_by_url: dict
+        :param apply: The `apply` parameter is a callable given every url and its result as it comes in,
+        it's called from the thread the result came in on
+        :param finish: The `finish` parameter is a callable given every coach once all of its urls are
+        in, it's called from the writer thread, one coach at a time
+        """
+        self.apply = apply
+        self.finish = finish
+        self.waiting = {url: set(coaches) for url, coaches in coaches_by_url.items()}
+        self.pending = ddict(set)
+        for url, coaches in self.waiting.items():
+            for coach in coaches:
+                self.pending[coach].add(url)
+        self.finished = 0
+        self.__queue = SimpleQueue()
+        self.__lock = threading.Lock()
+        self.__errors = list()
+        self.__writer = threading.Thread(target=self.__drain, name='coach-writer', daemon=True)
+        self.__writer.start()
+
+
+    def __drain(self) -> None:
+        """
+        The function finishes the coaches on the queue until it's closed.
+        """
+        while (coach := self.__queue.get()) is not None:
+            try:
+                if not self.__errors:
+                    self.finish(coach)
+                    self.finished += 1
+            except Exception as e:
+                self.__errors.append(e)
+
+
+    def done(self, url:str, result:dict) -> None:
+        """
+        The `done` function applies a url's result and queues every coach that was only waiting on it,
+        a url that was already done is skipped. It never waits on the writer.
+
+        :param url: The `url` parameter is the url that is done
+        :type url: str
+        :param result: The `result` parameter is the url's result
+        :type result: dict
+        """
+        with self.__lock:
+            coaches = self.waiting.pop(url, None)
+            if coaches is None:
+                return
+            self.apply(url, result)
+
+            ready = list()
+            for coach in coaches:
+                self.pending[coach].discard(url)
+                if not self.pending[coach]:
+                    ready.append(coach)
+
+        for coach in ready:
+            self.__queue.put(coach)
+
+
+    def close(self) -> None:
+        """
+        The `close` function waits for the writer to finish every queued coach, every url has to be done
+        by then.
+
+        :raises: the first error the writer ran into, and a RuntimeError if a coach is still waiting on a url.
+        """
+        self.__queue.put(None)
+        self.__writer.join()
+
+        if self.__errors:
+            raise self.__errors[0]
+        if self.waiting:
+            raise RuntimeError(f'PIPELINE ERROR - {len(self.waiting)} urls never came in, their coaches weren\'t written')
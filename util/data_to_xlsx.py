@@ -1,154 +1,236 @@
+import json
 import os
 from datetime import date, datetime
-from statistics import mean, median, mode
 
 import openpyxl
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.utils import get_column_letter
 
 # Constants
 DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 TARGET = os.path.join(DIR, 'target')
 RES = os.path.join(DIR, 'res')
+# no column is made wider than this many characters
+MAX_WIDTH = 200
 
-class DTX:
+
+class ColumnWidths:
     
     def __init__(self) -> None:
-        self.workbook = openpyxl.Workbook()
-        self.workbook.remove(self.workbook.active)
+        """
+        The ColumnWidths keeps the width every column of a sheet needs, it's given every row as the row is
+        built so the values are only looked at once. A multi-line value (like a project's issues) only
+        needs to be as wide as its longest line. Write-only sheets fix their columns when their first row
+        goes in, so the widths are applied once before the rows are streamed out.
+        """
+        self.widths = dict()
+        
+        
+    def measure(self, row:list) -> list:
+        """
+        The `measure` function widens the columns to fit a row's values.
+        
+        :param row: The `row` parameter is a list of values (or cells)
+        :type row: list
+        :return: the same row, so rows can be measured as they're built.
+        """
+        widths = self.widths
+        for col, val in enumerate(row, start=1):
+            val = val.value if isinstance(val, Cell) else val
+            if val is None:
+                continue
+            text = str(val)
+            width = max(map(len, text.split('\n'))) if '\n' in text else len(text)
+            if width > widths.get(col, 0):
+                widths[col] = width
+                
+        return row
+        
+        
+    def apply(self, sheet) -> None:
+        """
+        The `apply` function sets the widths on a sheet, up to `MAX_WIDTH`.
+        """
+        for col, width in self.widths.items():
+            sheet.column_dimensions[get_column_letter(col)].width = min(width, MAX_WIDTH)
+
+
+class DTX:
+    
+    def __init__(self, start_time:datetime = None) -> None:
+        """
+        :param start_time: The `start_time` parameter is when the run started, it's written on the sheets,
+        defaults to now
+        :type start_time: datetime (optional)
+        """
+        # write-only workbooks stream every sheet out once, instead of keeping every cell in memory
+        self.workbook = openpyxl.Workbook(write_only=True)
         self.output_path = os.path.join(RES, f'{"not200club "+str(date.today())}.xlsx')
-        self.start_time = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+        self.record_path = os.path.join(RES, f'{"not200club "+str(date.today())}.coaches.jsonl')
+        self.start_time = (start_time or datetime.now()).strftime("%m/%d/%Y, %H:%M:%S")
+        self.recorded = False
         
         
     def save(self) -> None:
         """
-        The `save` function saves the workbook to the specified output path.
+        The `save` function saves the workbook to the specified output path, a write-only workbook can
+        only be saved once so this should be the last thing done with it.
         """
         self.workbook.save(self.output_path)
        
        
-    def __fit_to_data(self, sheet):
+    def __write_rows(self, sheet, rows:list, widths:ColumnWidths = None) -> None:
         """
-        The function `__fit_to_data` adjusts the width of columns in a sheet based on the length of the
-        data in each column, with a maximum width limit of 200 characters.
+        The function `__write_rows` sizes the columns of a sheet to fit the rows and then writes the rows
+        to it. Write-only sheets need their column widths set before the first row is written.
         
-        :param sheet: The `sheet` parameter in the `__fit_to_data` method is expected to be a worksheet
-        object where the data is stored. This method is designed to adjust the column widths in the
-        worksheet based on the length of the data in each column
+        :param sheet: The `sheet` parameter is the write-only worksheet to write to
+        :param rows: The `rows` parameter is the list of rows to write, each row being a list of values
+        (or cells)
+        :type rows: list
+        :param widths: The `widths` parameter is the `ColumnWidths` the rows were already measured with as
+        they were built, they're measured here if it isn't given
+        :type widths: ColumnWidths (optional)
         """
-        for column_cells in sheet.columns:
-            length = max(len(str(cell.value)) for cell in column_cells)
-            length = min(length, 200)  # Limit column width to 200
-            sheet.column_dimensions[column_cells[0].column_letter].width = length 
+        if widths is None:
+            widths = ColumnWidths()
+            for row in rows:
+                widths.measure(row)
+        widths.apply(sheet)
+            
+        for row in rows:
+            sheet.append(row)
       
       
-    def __create_coach_sheet(self, coach:str):
+    def __coach_headers(self, sheet) -> list:
         """
-        The function creates a new sheet in a workbook with specified bolded column headers and returns the
-        sheet.
+        The function creates the bolded column headers of a coach sheet.
         
-        :param coach: The "coach" parameter is a string that represents the name of the coach for whom
-        the sheet is being created
-        :type coach: str
-        :return: a sheet object.
+        :param sheet: The `sheet` parameter is the coach's write-only worksheet the headers belong to
+        :return: the header row as a list of cells.
         """
-        sheet = self.workbook.create_sheet(title=coach)
-        
         bold_font = openpyxl.styles.Font(bold=True)
+        headers = list()
         
-        for index, header in enumerate(["Seeker Name", "Seeker Status", "Solo Issues", "Capstone Issues", "Group Issues"], start=1):
-            sheet.cell(row=1, column=index, value=header).font = bold_font
+        for header in ["Seeker Name", "Seeker Status", "Solo Issues", "Capstone Issues", "Group Issues"]:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.font = bold_font
+            headers.append(cell)
         
-        return sheet
+        return headers
         
         
-    def write_coach_sheet(self, coach:str, issues:list, sites_by_coach:dict, overview:dict) -> None:
+    def __record_coach(self, coach:str, rows:list) -> None:
+        """
+        The function appends a finished coach's rows to the day's record file, so the sheets written
+        before a crash can be rebuilt with `DTX.recover` without rewriting the workbook after every coach.
         """
-        The function `write_coach_sheet` writes information about seekers, their issues, and status to a
-        coach's sheet in an Excel workbook.
+        with open(self.record_path, 'a' if self.recorded else 'w') as file: # a new run starts a new record
+            file.write(json.dumps({'coach': coach, 'rows': rows}) + '\n')
+        self.recorded = True
+            
+            
+    @classmethod
+    def recover(cls, record_path:str = None) -> 'DTX':
+        """
+        The `recover` function rebuilds the coach sheets from a record file and saves them to the
+        workbook, for when a run died before it could save.
+        
+        :param record_path: The `record_path` parameter is the record file to rebuild from, defaults to
+        today's record
+        :type record_path: str (optional)
+        :return: the DTX the workbook was rebuilt in.
+        """
+        dtx = cls()
+        record_path = record_path or dtx.record_path
+        
+        coaches = dict()
+        with open(record_path, 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError: # the run died half way through writing this line
+                    break
+                coaches[record['coach']] = record['rows']
+                
+        for coach, rows in coaches.items():
+            sheet = dtx.workbook.create_sheet(title=coach)
+            dtx.__write_rows(sheet, [dtx.__coach_headers(sheet)] + rows)
+                
+        dtx.save()
+        return dtx
+        
+        
+    def write_coach_sheet(self, coach:str, seekers:list, index:int = None) -> None:
+        """
+        The function `write_coach_sheet` writes the seekers with issues of a coach, their status and the
+        issues of each of their projects to the coach's sheet in the Excel workbook.
         
         :param coach: The `coach` parameter is a string representing the name of the coach for whom the
         coach sheet is being generated
         :type coach: str
-        :param issues: The `issues` parameter in the `write_coach_sheet` method is expected to be a
-        dictionary where the keys are seekers and the values are dictionaries containing project-related
-        issues. The structure of the `issues` dictionary should be like this:
-        :type issues: list
-        :param sites_by_coach: The `sites_by_coach` parameter is a dictionary that contains information
-        about the status of seekers assigned to a specific coach. The keys in this dictionary are coach
-        names, and the values are dictionaries with seeker names as keys and status information as
-        values. The status information could include details such as the seeker
-        :type sites_by_coach: dict
-        :param overview: The `overview` parameter in the `write_coach_sheet` method is a dictionary that
-        keeps track of the number of seekers with issues. It is updated within the loop to increment the
-        count of seekers with issues. This count is used for generating an overview of the data at the
-        end of the method
-        :type overview: dict
-        """
-        row = 2
-        sheet = self.__create_coach_sheet(coach)
-        
-        for seeker, issues in issues.items():
-            status = sites_by_coach[coach][seeker]['status']
-            overview['seeker_with_issue'] += 1
-            
-            col = 3
-            sheet.cell(row=row, column=1, value=seeker)
-            sheet.cell(row=row, column=2, value=status)
-            for proj in ['solo', 'capstone', 'group']:
-                if issues[proj]:
-                    val = '\n'.join([f"{key}: {value}" for key, value in issues[proj].items()])
-                else:
-                    val = 'No Issues Found'
-                    
-                sheet.cell(row=row, column=col, value=val)
-                col += 1
-            row += 1
+        :param seekers: The `seekers` parameter is the list of the coach's `SeekerResult`s that have an
+        issue with at least one of their projects
+        :type seekers: list
+        :param index: The `index` parameter is where the sheet goes among the sheets written so far, at
+        the end if not given
+        :type index: int (optional)
+        """
+        sheet = self.workbook.create_sheet(title=coach, index=index)
+        widths = ColumnWidths()
+        headers = widths.measure(self.__coach_headers(sheet))
+        rows = [widths.measure(seeker.row()) for seeker in seekers]
                 
-        self.__fit_to_data(sheet)
-            
-        self.workbook.save(self.output_path)
+        self.__write_rows(sheet, [headers] + rows, widths)
+        self.__record_coach(coach, rows)
         
     def fill_overview(self, overview:dict, total_seekers:int, timeout:int) -> None:
         """
         This function fills in an Excel sheet with various statistics related to website loading issues.
         """
         sheet = self.workbook.create_sheet(title='Overview', index=0)
+        rows = list()
         
-        sheet.cell(row=1, column=1, value='TOTAL SEEKERS WITH ISSUES')
-        sheet.cell(row=1, column=2, value=f"{overview['seeker_with_issue']}/{total_seekers}")
-        sheet.cell(row=1, column=4, value=f'Script ran at {self.start_time} for this sheet')
-        
-        sheet.cell(row=2, column=1, value='SITES WITH TIMES 10s>')
-        sheet.cell(row=2, column=2, value=f'Total: {sum(overview["sites_time"].values())}')
-        sheet.cell(row=2, column=3, value=f'Solo: {overview["sites_time"]["solo"]}')
-        sheet.cell(row=2, column=4, value=f'Capstone: {overview["sites_time"]["capstone"]}')
-        sheet.cell(row=2, column=5, value=f'Group: {overview["sites_time"]["group"]}')
-        
-        sheet.cell(row=3, column=1, value='LOADING TIME STATS')
-        if overview['time_average']:
-            sheet.cell(row=3, column=2, value=f'Mean: {round(mean(overview["time_average"]), 2)}s')
-            sheet.cell(row=3, column=3, value=f'Mode: {round(mode(overview["time_average"]), 2)}s')
-            sheet.cell(row=3, column=4, value=f'Median: {round(median(overview["time_average"]), 2)}s')
-        else:
-            sheet.cell(row=3, column=2, value='No loading issues found')
+        rows.append(['TOTAL SEEKERS WITH ISSUES', f"{overview['seeker_with_issue']}/{total_seekers}", None, f'Script ran at {self.start_time} for this sheet'])
+        
+        rows.append(['SITES WITH TIMES 10s>', f'Total: {sum(overview["sites_time"].values())}', f'Solo: {overview["sites_time"]["solo"]}', f'Capstone: {overview["sites_time"]["capstone"]}', f'Group: {overview["sites_time"]["group"]}'])
+        
+        for proj in ['solo', 'capstone', 'group']:
+            stats = overview['latency'].get(proj)
+            if stats and stats['count']:
+                rows.append([f'{proj.upper()} LOADING TIME STATS', f"p50: {stats['p50']}s", f"p90: {stats['p90']}s", f"p99: {stats['p99']}s", f"Max: {stats['max']}s"])
+            else:
+                rows.append([f'{proj.upper()} LOADING TIME STATS', 'No loading times recorded'])
             
         
         if timeout:
-            sheet.cell(row=4, column=1, value='SITES THAT TIMEOUT')
-            sheet.cell(row=4, column=2, value=f"Total: {sum(overview['sites_timeout'].values())}")
-            sheet.cell(row=4, column=3, value=f"Solo: {overview['sites_timeout']['solo']}")
-            sheet.cell(row=4, column=4, value=f"Capstone: {overview['sites_timeout']['capstone']}")
-            sheet.cell(row=4, column=5, value=f"Group: {overview['sites_timeout']['group']}")
+            rows.append(['SITES THAT TIMEOUT', f"Total: {sum(overview['sites_timeout'].values())}", f"Solo: {overview['sites_timeout']['solo']}", f"Capstone: {overview['sites_timeout']['capstone']}", f"Group: {overview['sites_timeout']['group']}"])
         else:
-            sheet.cell(row=4, column=1, value='TIMEOUT NOT SET')
+            rows.append(['TIMEOUT NOT SET'])
+            
+        for group, key in [('SITES WITH NO URLS', 'sites_no_url'), ("SITES WITH BAD URLS", 'sites_bad_url'), ('SITES WITH BAD STATUS', 'sites_status')]:
+            rows.append([group, f"Total: {sum(overview[key].values())}", f"Solo: {overview[key]['solo']}", f"Capstone: {overview[key]['capstone']}", f"Group: {overview[key]['group']}"])
+        if overview.get('content_changed') is not None: # only there when the content check ran
+            key = 'sites_content'
+            rows.append(['SITES SHOWING AN ERROR PAGE', f"Total: {sum(overview[key].values())}", f"Solo: {overview[key]['solo']}", f"Capstone: {overview[key]['capstone']}", f"Group: {overview[key]['group']}", f"Pages changed since last run: {overview['content_changed']}"])
             
-        for row, group, key in [(5, 'SITES WITH NO URLS', 'sites_no_url'), (6, "SITES WITH BAD URLS", 'sites_bad_url'), (7, 'SITES WITH BAD STATUS', 'sites_status')]:
-            sheet.cell(row=row, column=1, value=group)
-            sheet.cell(row=row, column=2, value=f"Total: {sum(overview[key].values())}")
-            sheet.cell(row=row, column=3, value=f"Solo: {overview[key]['solo']}")
-            sheet.cell(row=row, column=4, value=f"Capstone: {overview[key]['capstone']}")
-            sheet.cell(row=row, column=5, value=f"Group: {overview[key]['group']}")
+        # where the probing time went, the totals add up every probe and the p90 is of the probes the phase happened in
+        phases = overview['phases']
+        if phases:
+            rows.append(['NETWORK TIME TOTALS'] + [f"{phase.upper()}: {stats['total']}s" for phase, stats in phases.items()])
+            rows.append(['NETWORK TIME P90'] + [f"{phase.upper()}: {stats['p90']}s" for phase, stats in phases.items()])
             
-        self.__fit_to_data(sheet)
+        # sites on platforms that sleep are woken up before they're probed, this is what their cold starts looked like
+        warmup = overview.get('warmup')
+        if warmup:
+            cold = warmup['cold']
+            rows.append(['COLD STARTS', f"Woken up: {cold['count']}", f"p50: {cold['p50']}s", f"p90: {cold['p90']}s", f"Max: {cold['max']}s", f"Only had issues while asleep: {warmup['recovered']}"])
+            
+        rows.append(['UNIQUE URLS PROBED', f"{overview['urls_unique']}/{overview['urls_total']}"])
+        if overview['urls_total']:
+            rows[-1].append(f"Deduplicated: {1 - overview['urls_unique'] / overview['urls_total']:.1%}")
+            
+        self.__write_rows(sheet, rows)
         
     def fill_issue_legend(self, timeout:int) -> None:
         """
@@ -157,23 +239,18 @@ class DTX:
         """
         sheet = self.workbook.create_sheet(title='Issue Legend', index=0)
         
-        sheet.cell(row=1, column=1, value='Issue Type')
-        sheet.cell(row=1, column=2, value="Explained")
-        sheet.cell(row=1, column=3, value=f'Script ran at {self.start_time} for this sheet')
-        
-        sheet.cell(row=2, column=1, value='Status')
-        sheet.cell(row=2, column=2, value='Will most likely be a 404 or a 503 - both mean the site is down')
+        self.__write_rows(sheet, [
+            ['Issue Type', 'Explained', f'Script ran at {self.start_time} for this sheet'],
+            ['Status', 'Will most likely be a 404 or a 503 - both mean the site is down'],
+            ['Bad URL', 'The site\'s URL doesn\'t work, The script was unable to even try to check it'],
+            ['Time', 'The amount of time in seconds it took to get a response from the site (time to first byte unless the full probe mode is used) - it needs to have taken longer than 10s to be listed'],
+            ['Timeout', f'The site took longer than its timeout (up to {timeout}s, less on hosts whose sites answer quickly) or the run\'s deadline was reached before it answered'],
+            ['No-link', 'Means there was no url listed in saleforce for that project'],
+            ['Content', 'The site answered with a 200 but the page is a hosting platform\'s error page (application error, site not found...) or is empty - only checked with --content-check'],
+        ])
         
-        sheet.cell(row=3, column=1, value='Bad URL')
-        sheet.cell(row=3, column=2, value='The site\'s URL doesn\'t work, The script was unable to even try to check it')
         
-        sheet.cell(row=4, column=1, value='Time')
-        sheet.cell(row=4, column=2, value='The amount of time in seconds it took to get a response from the site - it needs to have taken longer than 10s to be listed')
-        
-        sheet.cell(row=5, column=1, value='Timeout')
-        sheet.cell(row=5, column=2, value=f'The site took longer than the given timeout({timeout}s) and gave up on the site')
-        
-        sheet.cell(row=6, column=1, value='No-link')
-        sheet.cell(row=6, column=2, value='Means there was no url listed in saleforce for that project')
-
-        self.__fit_to_data(sheet)
\ No newline at end of file
+if __name__ == '__main__':
+    # rebuilds today's workbook from the coaches that finished before a run died
+    dtx = DTX.recover()
+    print(f'recovered the finished coaches to {dtx.output_path}')
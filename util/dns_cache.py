@@ -0,0 +1,94 @@
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+# the answers that mean the name doesn't exist (or has no address), not that the lookup failed
+MISSING = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+
+class DNSCache:
+
+    def __init__(self, ttl:float = 300.0, workers:int = 64) -> None:
+        """
+        The DNSCache resolves every host once for the whole run and hands the answer to every connection
+        made to it. Names that don't exist are remembered too, so they fail right away instead of tying
+        up a worker on another lookup. It's safe to share between threads.
+
+        The system resolver doesn't give out the records' TTLs, so every answer is kept for `ttl` seconds.
+
+        :param ttl: The `ttl` parameter is the seconds an answer is trusted for before the host is looked
+        up again, defaults to 300
+        :type ttl: float (optional)
+        :param workers: The `workers` parameter is how many hosts `resolve_all` looks up at the same time
+        :type workers: int (optional)
+        """
+        self.ttl = ttl
+        self.workers = workers
+        self.__answers = dict()
+        self.__lock = threading.Lock()
+
+
+    def __lookup(self, host:str) -> tuple:
+        """
+        The function looks a host up with the system resolver and caches the answer.
+
+        :return: the (addresses, error) answer, the addresses are a list of (family, address) and the
+        error is the `socket.gaierror` of a name that doesn't exist, one of them is None.
+        """
+        try:
+            answer = ([(family, address[0]) for family, *_, address in socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)], None)
+        except socket.gaierror as e:
+            if e.errno not in MISSING: # the resolver failed, not the name, the next connection tries again
+                raise
+            answer = (None, e)
+
+        with self.__lock:
+            self.__answers[host] = (monotonic() + self.ttl, answer)
+        return answer
+
+
+    def __answer(self, host:str) -> tuple:
+        """
+        The function returns the cached answer of a host, looking it up if there isn't one or it expired.
+        """
+        with self.__lock:
+            expires, answer = self.__answers.get(host, (0, None))
+
+        if monotonic() >= expires:
+            answer = self.__lookup(host)
+
+        return answer
+
+
+    def resolve_all(self, hosts) -> set:
+        """
+        The `resolve_all` function looks every host up at the same time and caches the answers.
+
+        :param hosts: The `hosts` parameter is the host names to resolve
+        :return: the set of hosts that don't exist.
+        """
+        def resolve(host:str) -> bool:
+            try:
+                return self.__answer(host)[1] is not None
+            except socket.gaierror:
+                return False
+
+        hosts = list(set(hosts))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return {host for host, missing in zip(hosts, pool.map(resolve, hosts)) if missing}
+
+
+    def getaddrinfo(self, host:str, port:int, family:int = 0, type:int = 0, proto:int = 0, flags:int = 0) -> list:
+        """
+        The `getaddrinfo` function is a drop-in for `socket.getaddrinfo` that answers from the cache.
+
+        :return: the addresses of the host in the same shape `socket.getaddrinfo` returns them, a name
+        that doesn't exist raises the `socket.gaierror` of its lookup.
+        """
+        addresses, error = self.__answer(host)
+        if error is not None:
+            raise error
+
+        return [(fam, type or socket.SOCK_STREAM, proto, '', (address, port) if fam == socket.AF_INET else (address, port, 0, 0))
+                for fam, address in addresses if family in (0, fam)]
@@ -1,16 +1,15 @@
+import csv
 import os
-import smtplib
-import ssl
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-import openpyxl
-from alive_progress import alive_bar
 from dotenv import load_dotenv
 
-# loading the local .env file
-load_dotenv()
+from util.results import Issue
+from util.run_history import RunHistory
+from util.smtp_delivery import DeliveryEngine
+from util.telemetry import progress_bar
 
 # Constants
 DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
@@ -33,21 +32,19 @@ class Emailer:
         if not os.path.exists(os.path.join(DIR, '.env')):
             raise BaseException('No .env - No emails or login info')
     
-    def __get_recent_file_path(self) -> None:
+    def __get_recent_run(self) -> None:
         """
-        The function finds the most recent file in res folder and sets the
-        `file_path` attribute to the path of that file.
+        The function looks the most recent run up in the run history and sets the `run` attribute to it
+        and the `file_path` attribute to the path of its json output.
         """
         self.__validate_folder_and_env() # validates that the folder exists and isn't empty
-        files = os.listdir(RES) # get the files from the RES folder
-        most_recent_file = [0, '']
-        for f in files:
-            t = os.path.getmtime(os.path.join(RES, f))
-            if t > most_recent_file[0]: # keep track of the most recent file
-                most_recent_file = [t, f]
+        self.history = RunHistory()
+        self.run = self.history.latest()
+        if self.run is None:
+            raise BaseException('run history is empty')
                 
-        self.file_path = os.path.join(RES, most_recent_file[1]) # when we find it, save it's path to as one of our instance variables
-        self.__validate_file_timestamp() # check that the file we just grab was created today
+        self.file_path = self.run['json_path'] # the delivery report is saved next to it
+        self.__validate_file_timestamp() # check that the run we just grab was ran today
         
     
     
@@ -65,10 +62,10 @@ class Emailer:
     
     def __validate_file_timestamp(self) -> None:
         """
-        The function validates if the file's creation date matches today's date and prompts the user for
+        The function validates if the run's date matches today's date and prompts the user for
         confirmation before proceeding with the emailer if not.
         """
-        d = datetime.fromtimestamp(os.path.getctime(self.file_path)) # get the datetime for the target file and today
+        d = self.run['ran_at'] # get the datetime for the run and today
         today = datetime.now()
         
         if not all([today.day == d.day, today.month == d.month, today.year == d.year]): # unless the file was created today it asks the script runner if they are sure they want to run it.
@@ -82,70 +79,113 @@ class Emailer:
             
     
     
-    def __init__(self) -> None:
-        self.__get_recent_file_path()
+    def __init__(self, host:str = None, port:int = None, security:str = None, connections:int = 4, retries:int = 3, backoff:float = 2.0) -> None:
+        """
+        The Emailer sends every coach with an email in the .env the summary of their seekers in the most
+        recent run in the run history.
+        
+        :param host: The `host` parameter is the SMTP server to send through, defaults to the `email_host`
+        in the .env or smtp.gmail.com
+        :type host: str (optional)
+        :param port: The `port` parameter is the SMTP server's port, defaults to the `email_port` in the
+        .env or 465
+        :type port: int (optional)
+        :param security: The `security` parameter is 'ssl', 'starttls' or 'none', defaults to the
+        `email_security` in the .env or 'ssl'
+        :type security: str (optional)
+        :param connections: The `connections` parameter is how many SMTP connections send at once
+        :type connections: int (optional)
+        :param retries: The `retries` parameter is how many times an email that failed is tried again
+        :type retries: int (optional)
+        :param backoff: The `backoff` parameter is the seconds waited before the first retry, it doubles
+        with every retry
+        :type backoff: float (optional)
+        """
+        load_dotenv() # loading the local .env file
+        self.__get_recent_run()
         self.no_emails = list()
+        self.engine = DeliveryEngine(
+            host or os.getenv('email_host', 'smtp.gmail.com'),
+            int(port or os.getenv('email_port', 465)),
+            security or os.getenv('email_security', 'ssl'),
+            os.getenv('email_user'), os.getenv('email_password'), # the login info is stored in a .env for security
+            connections, retries, backoff,
+        )
+        self.report_path = os.path.splitext(self.file_path)[0] + '.delivery.csv'
         
         
     def scan_sheets(self) -> None:
         """
-        The `scan_sheets` function scans through sheets in an Excel workbook, skips certain sheets, and
-        sends data from other sheets via email.
+        The `scan_sheets` function goes over every coach of the most recent run, builds the email of every
+        coach with an email in the .env and then sends all of them at once. Whether each email went out is
+        written to the delivery report next to the run's json file.
         """
-        workbook = openpyxl.load_workbook(self.file_path) # opening up the xlsx file
-        context = ssl.create_default_context() # context for the emailing server
+        deliveries = list()
         
-        with smtplib.SMTP_SSL('smtp.gmail.com', port=465, context=context) as server: # starting up the server and logging in to our emailer account
-            server.login(os.getenv('email_user'), os.getenv('email_password')) # the login info is stored in a .env for security
+        for coach, seekers in self.history.coaches(self.run['id']).items(): # going over the coaches to build the emails
+            if coach == 'Placements': # we want to skip this one since it doesn't have a coach assigned to it
+                continue
+            elif os.getenv(self.__format_name(coach)) == None: # If we don't have an email associated with the coach we skip it
+                self.no_emails.append(coach) # also take note of it so we can notify the script runner later
+                continue
             
-            with alive_bar(len(workbook.worksheets)-3, title='Getting Coach\'s summary and emailing...') as bar: # setup for alive progress bc it looks nice
-                for sheet in workbook.worksheets: # going over the sheets to scrap the data and send the emails
-                    if sheet.title in {'Overview', 'Issue Legend', 'Placements'}: # we want to skip these three since they don't have a coach assigned to them
-                        continue
-                    elif os.getenv(self.__format_name(sheet.title)) == None: # If we don't have an email associated with the sheet we skip it
-                        self.no_emails.append(sheet.title) # also take note of it so we can notify the script runner later
-                        continue
-                    
-                    bar.title(f'Getting {sheet.title.split(" ")[0]}\'s summary and emailing...') # updating the alive progress bar with the curret sheet/coach
-                    self.get_data_and_email(sheet, server) # method for creating the email and sending it
-                    
-                    bar()
+            message = self.build_message(coach, seekers) # method for creating the email
+            deliveries.append({'name': coach, 'from': message['From'], 'to': message['To'], 'message': message})
+        
+        with progress_bar(len(deliveries), 'Emailing coach summaries...') as bar: # setup for alive progress bc it looks nice
+            report = self.engine.send_all(deliveries, lambda row: bar())
+        self.__write_report(report)
+        
+        failed = [row for row in report if row['status'] != 'sent']
+        print(f'{len(report) - len(failed)}/{len(report)} emails sent, the delivery report is at {self.report_path}')
+        for row in failed:
+            print(f"    - {row['name']} ({row['recipient']}) failed after {row['attempts']} tries: {row['error']}")
                 
-        if self.no_emails: # if we have sheets with no email, we listed them after
+        if self.no_emails: # if we have coaches with no email, we listed them after
             print('the following names didn\'t have a email listed')
             print(self.no_emails)
+            
+            
+    def __write_report(self, report:list) -> None:
+        """
+        The function writes a row for every email with whether it was sent, how many tries it took and
+        the last error it ran into.
+        """
+        with open(self.report_path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=['name', 'recipient', 'status', 'attempts', 'error', 'sent_at'])
+            writer.writeheader()
+            writer.writerows(report)
                 
             
                 
-    def get_data_and_email(self, sheet, server) -> None:
+    def build_message(self, coach:str, seekers:list) -> MIMEMultipart:
         """
-        This function retrieves data from a sheet, analyzes it, and sends an email with a summary of the
+        This function analyzes the results of a coach's seekers and builds the email with a summary of the
         analysis.
         
-        :param sheet: The `sheet` parameter is the spreadsheet object that contains the data. It is used
-        to iterate over the rows and retrieve the necessary information for the email
-        :param server: The `server` parameter is the SMTP server object that is used to send the email.
-        It should be an instance of the `smtplib.SMTP` class
+        :param coach: The `coach` parameter is the name of the coach the email is for
+        :type coach: str
+        :param seekers: The `seekers` parameter is the list of the coach's `SeekerResult`s with issues
+        :type seekers: list
+        :return: the email, addressed to the coach's email in the .env.
         """
         sender_email = os.getenv('email_user')
-        receiver_email = os.getenv(self.__format_name(sheet.title))
+        receiver_email = os.getenv(self.__format_name(coach))
         
         danger_zone = list()
         time = 0
         redzone = 0
         
-        for row in sheet.iter_rows():
-            name, status, solo, capstone, group = (x.value for x in row)
-            if status == 'Seeker Status': # this skips the first row of the sheet
-                continue
-            
-            if 'No Issues Found' not in (solo, capstone, group): # if all projects have something wrong with them, put the seeker in the danger_zone
-                danger_zone.append([name, status])
+        for seeker in seekers:
+            projects = seeker.projects.values()
+            if all(project.issues for project in projects): # if all projects have something wrong with them, put the seeker in the danger_zone
+                danger_zone.append([seeker.name, seeker.status])
                 
-            for proj in (solo, capstone, group): # grab misc data to put in the email
-                if proj.startswith('time:'):
+            for project in projects: # grab misc data to put in the email
+                issues = project.issues or dict()
+                if Issue.TIME in issues:
                     time += 1
-                if proj.split(':')[0] in ('timeout', 'status', 'bad_url', 'no-link'):
+                if any(issue.red_zone for issue in issues):
                     redzone += 1
             
         # construct the email, a plaintext and html version
@@ -154,7 +194,7 @@ class Emailer:
         message["From"] = sender_email
         message["To"] = receiver_email
         text = f'''\
-            Hey {sheet.title.split(' ')[0]},
+            Hey {coach.split(' ')[0]},
             
             Here is a summary of the site health check of your seekers!
             If you would like a more detailed view you can find the most recent health checks here:
@@ -173,7 +213,7 @@ class Emailer:
         html = f'''\
         <html>
             <body>
-                <p>Hey {sheet.title.split(' ')[0]},<br/><br/>
+                <p>Hey {coach.split(' ')[0]},<br/><br/>
                 Here is a summary of the site health check of your seekers!<br/>
                 If you would like a more detailed view you can find the most recent health checks <a href="https://drive.google.com/drive/u/1/folders/1IlVrDq3EJBUKzVdbLhpIjuzWyNcJ-m-I">here</a><br/><br/>
                 
@@ -197,7 +237,7 @@ class Emailer:
         message.attach(MIMEText(text, 'plain'))
         message.attach(MIMEText(html, 'html'))
         
-        server.sendmail(sender_email, receiver_email, message.as_string()) # send the email
+        return message
         
         
 if __name__ == '__main__':
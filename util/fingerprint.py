@@ -0,0 +1,90 @@
+import hashlib
+import re
+
+# how many KB of a page's body are read for its fingerprint by default
+CONTENT_KB = 16
+# the body is read in chunks of this many bytes, so at most one chunk of it is held at a time
+CHUNK_BYTES = 4096
+
+# the pages hosting platforms (and default servers) answer with, often with a 200, when the site itself
+# is down, was deleted or was never deployed
+SIGNATURES = (
+    ('heroku application error', re.compile(rb'herokucdn\.com/error-pages/application-error|<title>Application Error</title>', re.I)),
+    ('heroku no such app', re.compile(rb'herokucdn\.com/error-pages/no-such-app|There\'s nothing here, yet\.', re.I)),
+    ('render service suspended', re.compile(rb'This service has been suspended', re.I)),
+    ('github pages site not found', re.compile(rb'There isn\'t a GitHub Pages site here', re.I)),
+    ('netlify site not found', re.compile(rb'Looks like you\'ve followed a broken link or entered a URL that doesn\'t exist on this site|<title>Site not found</title>', re.I)),
+    ('vercel deployment not found', re.compile(rb'DEPLOYMENT_NOT_FOUND|The deployment could not be found on Vercel', re.I)),
+    ('vercel deployment paused', re.compile(rb'DEPLOYMENT_PAUSED|This deployment is temporarily paused', re.I)),
+    ('firebase site not found', re.compile(rb'<h1>Site Not Found</h1>', re.I)),
+    ('glitch project not running', re.compile(rb'This project isn\'t running|Well, you found a glitch', re.I)),
+    ('surge project not found', re.compile(rb'project not found.{0,200}surge', re.I | re.S)),
+    ('railway application not found', re.compile(rb'Application not found.{0,400}railway|The train has not arrived at the station', re.I | re.S)),
+    ('default server page', re.compile(rb'<title>Welcome to nginx!</title>|<title>Apache2 \w+ Default Page', re.I)),
+)
+# a signature can be split between two chunks, this much of the last chunk is searched again with the next
+OVERLAP_BYTES = 512
+
+
+class Fingerprint:
+
+    def __init__(self, content_kb:int = CONTENT_KB) -> None:
+        """
+        The Fingerprint is fed the first `content_kb` KB of a page's body a chunk at a time, it hashes them
+        and looks for the error pages of the known platforms in them as they come in. Only the end of the
+        last chunk is kept between chunks, so it takes the same memory no matter how big the page is.
+
+        :param content_kb: The `content_kb` parameter is how many KB of the body are read
+        :type content_kb: int (optional)
+        """
+        self.limit = content_kb * 1024
+        self.size = 0
+        self.signature = None
+        self.blank = True
+        self.__hash = hashlib.blake2b(digest_size=8)
+        self.__tail = b''
+
+
+    def update(self, chunk:bytes) -> bool:
+        """
+        The `update` function feeds the next chunk of the body in.
+
+        :param chunk: The `chunk` parameter is the next bytes of the body
+        :type chunk: bytes
+        :return: True while more of the body is wanted.
+        """
+        chunk = chunk[:self.limit - self.size]
+        self.__hash.update(chunk)
+        self.size += len(chunk)
+        if self.blank and chunk.strip():
+            self.blank = False
+
+        if self.signature is None:
+            window = self.__tail + chunk
+            self.signature = next((name for name, pattern in SIGNATURES if pattern.search(window)), None)
+            self.__tail = window[-OVERLAP_BYTES:]
+
+        return self.size < self.limit
+
+
+    def result(self) -> dict:
+        """
+        The `result` function returns the page's `fingerprint` (the hash of what was read) and the
+        `signature` it matched, 'empty page' for a body with nothing in it and None for a normal page.
+        """
+        return {'fingerprint': self.__hash.hexdigest(), 'signature': 'empty page' if self.blank else self.signature}
+
+
+def fingerprint_stream(chunks, content_kb:int = CONTENT_KB) -> dict:
+    """
+    The function fingerprints a body from an iterable of its chunks (like `Response.iter_content`), it
+    stops pulling chunks once `content_kb` KB are in.
+
+    :return: the result of the `Fingerprint`.
+    """
+    fingerprint = Fingerprint(content_kb)
+    for chunk in chunks:
+        if not fingerprint.update(chunk):
+            break
+
+    return fingerprint.result()
@@ -0,0 +1,190 @@
+import threading
+from collections import defaultdict as ddict
+from math import ceil, frexp
+
+# the network phases of every probe, see `util.timed_connection`
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer')
+
+
+class LatencyHistogram:
+
+    # every power of two of milliseconds is split into this many buckets, so any value is off by ~3% at most
+    SUB_BUCKETS = 32
+    # 2^20ms is over 17 minutes, anything slower lands in the last bucket (the max is still exact)
+    MAX_EXPONENT = 20
+
+    def __init__(self) -> None:
+        """
+        The LatencyHistogram is a fixed-bucket (HDR-style) histogram of response times, it takes the same
+        memory no matter how many values go in and two of them can be merged by adding their buckets.
+        """
+        self.counts = [0] * (1 + (self.MAX_EXPONENT + 1) * self.SUB_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+    def __bucket(self, ms:float) -> int:
+        """
+        The function finds the bucket a value in milliseconds falls in, values under 1ms share bucket 0.
+        """
+        if ms < 1:
+            return 0
+
+        mantissa, exponent = frexp(ms) # ms = mantissa * 2^exponent with 0.5 <= mantissa < 1
+        exponent -= 1
+        if exponent > self.MAX_EXPONENT:
+            return len(self.counts) - 1
+
+        return 1 + exponent * self.SUB_BUCKETS + int((mantissa * 2 - 1) * self.SUB_BUCKETS)
+
+
+    def __upper_bound(self, bucket:int) -> float:
+        """
+        The function returns the largest value in seconds that would land in the bucket.
+        """
+        if bucket == 0:
+            return 0.001
+
+        exponent, sub = divmod(bucket - 1, self.SUB_BUCKETS)
+        return 2 ** exponent * (1 + (sub + 1) / self.SUB_BUCKETS) / 1000
+
+
+    def record(self, seconds:float) -> None:
+        """
+        The `record` function adds a response time to the histogram.
+
+        :param seconds: The `seconds` parameter is the response time in seconds
+        :type seconds: float
+        """
+        self.counts[self.__bucket(seconds * 1000)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+    def merge(self, other:'LatencyHistogram') -> None:
+        """
+        The `merge` function adds every value of another histogram to this one.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+
+    def to_dict(self) -> dict:
+        """
+        The `to_dict` function returns the histogram as a json friendly dictionary, only the buckets that
+        have values are kept.
+        """
+        return {
+            'counts': {bucket: count for bucket, count in enumerate(self.counts) if count},
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+        }
+
+
+    @classmethod
+    def from_dict(cls, data:dict) -> 'LatencyHistogram':
+        """
+        The `from_dict` function builds a histogram back from the dictionary `to_dict` returned.
+        """
+        histogram = cls()
+        for bucket, count in data['counts'].items():
+            histogram.counts[int(bucket)] = count # json turns the keys into strings
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.max = data['max']
+
+        return histogram
+
+
+    def percentile(self, q:float) -> float:
+        """
+        The `percentile` function finds the response time that `q` percent of the values are at or under.
+
+        :param q: The `q` parameter is the percentile to find, from 0 to 100
+        :type q: float
+        :return: the response time in seconds, or 0 if the histogram is empty.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = max(1, ceil(q / 100 * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.__upper_bound(bucket), self.max)
+
+        return self.max
+
+
+    def summary(self) -> dict:
+        """
+        The `summary` function returns the count, p50, p90, p99, max and total of the histogram in seconds.
+        """
+        return {
+            'count': self.count,
+            'p50': round(self.percentile(50), 3),
+            'p90': round(self.percentile(90), 3),
+            'p99': round(self.percentile(99), 3),
+            'max': round(self.max, 3),
+            'total': round(self.total, 3),
+        }
+
+
+class MetricsCollector:
+
+    def __init__(self) -> None:
+        """
+        The MetricsCollector lets every worker thread record into its own histograms without any locking,
+        the per-worker histograms are only merged once everything is done.
+        """
+        self.__local = threading.local()
+        self.__shards = list()
+        self.__lock = threading.Lock()
+
+
+    def __shard(self) -> dict:
+        """
+        The function returns the calling thread's histograms, making them the first time it records.
+        """
+        shard = getattr(self.__local, 'shard', None)
+        if shard is None:
+            shard = self.__local.shard = ddict(LatencyHistogram)
+            with self.__lock: # only taken once per thread
+                self.__shards.append(shard)
+
+        return shard
+
+
+    def record(self, tags, seconds:float) -> None:
+        """
+        The `record` function adds a response time to the calling thread's histogram of every tag.
+
+        :param tags: The `tags` parameter is the names the response time is recorded under (the project
+        types of the url)
+        :param seconds: The `seconds` parameter is the response time in seconds
+        :type seconds: float
+        """
+        shard = self.__shard()
+        for tag in tags:
+            shard[tag].record(seconds)
+
+
+    def merge(self) -> dict:
+        """
+        The `merge` function combines the histograms of every worker, it should only be called once the
+        workers are done.
+
+        :return: a dictionary of tags to their merged `LatencyHistogram`.
+        """
+        merged = ddict(LatencyHistogram)
+        for shard in self.__shards:
+            for tag, histogram in shard.items():
+                merged[tag].merge(histogram)
+
+        return merged
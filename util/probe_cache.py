@@ -0,0 +1,228 @@
+import os
+import sqlite3
+from datetime import timedelta
+from time import time
+
+# Constants
+DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+RES = os.path.join(DIR, 'res')
+
+
+class ProbeCache:
+
+    def __init__(self, ttl:timedelta = timedelta(0), path:str = None) -> None:
+        """
+        The ProbeCache keeps the last probe result of every url between runs in a sqlite file in the res
+        folder. It's used to send conditional requests (a 304 means the site is up and unchanged) and to
+        skip sites that were healthy recently enough. It also keeps the url of every seeker's project from
+        the last run, so delta runs can tell which rows are new or changed, and the fingerprint of every
+        page the content check read so the next run can tell if it changed.
+
+        :param ttl: The `ttl` parameter is how long a healthy result is trusted for, urls that were healthy
+        within it aren't probed again, defaults to 0 (always probe)
+        :type ttl: timedelta (optional)
+        :param path: The `path` parameter is the sqlite file to use, defaults to res/probe_cache.sqlite3
+        :type path: str (optional)
+        """
+        self.ttl = ttl
+        self.path = path or os.path.join(RES, 'probe_cache.sqlite3')
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS probes (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                elapsed REAL,
+                etag TEXT,
+                last_modified TEXT,
+                healthy INTEGER NOT NULL,
+                checked_at REAL NOT NULL,
+                fingerprint TEXT,
+                signature TEXT
+            )
+        ''')
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(probes)')}
+        for column in ('fingerprint', 'signature'): # caches from before the content check don't have them
+            if column not in columns:
+                self.db.execute(f'ALTER TABLE probes ADD COLUMN {column} TEXT')
+        if 'coach' not in {row[1] for row in self.db.execute('PRAGMA table_info(rows)')}:
+            # rows from before they were keyed by coach can't be told apart, the next delta run probes everything
+            self.db.execute('DROP TABLE IF EXISTS rows')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS rows (
+                coach TEXT NOT NULL,
+                seeker TEXT NOT NULL,
+                proj TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (coach, seeker, proj)
+            )
+        ''')
+
+
+    def close(self) -> None:
+        """
+        The `close` function closes the connection to the sqlite file.
+        """
+        self.db.close()
+
+
+    def fresh(self, urls:list) -> dict:
+        """
+        The `fresh` function finds the urls that were healthy within the ttl.
+
+        :param urls: The `urls` parameter is the list of canonical urls of this run
+        :type urls: list
+        :return: a dictionary of those urls to their cached result, in the same shape `Prober.probe` returns.
+        """
+        if not self.ttl:
+            return dict()
+
+        return self.healthy(urls, time() - self.ttl.total_seconds())
+
+
+    def healthy(self, urls:list, since:float = 0) -> dict:
+        """
+        The `healthy` function finds the urls whose last probe was healthy.
+
+        :param urls: The `urls` parameter is the list of canonical urls to look up
+        :type urls: list
+        :param since: The `since` parameter is the oldest timestamp a result can have been checked at
+        :type since: float (optional)
+        :return: a dictionary of those urls to their cached result, in the same shape `Prober.probe` returns.
+        """
+        healthy = dict()
+        for url, status, elapsed in self.db.execute('SELECT url, status, elapsed FROM probes WHERE healthy = 1 AND checked_at >= ?', (since,)):
+            healthy[url] = {'status': status, 'elapsed': elapsed, 'error': None, 'message': None, 'retry_after': None, 'cached': True}
+
+        return {url: healthy[url] for url in urls if url in healthy}
+
+
+    def validators(self, urls:list) -> dict:
+        """
+        The `validators` function gets the conditional request headers for every url that has an ETag or
+        Last-Modified saved from a healthy response.
+
+        :return: a dictionary of urls to the headers to send with their next probe.
+        """
+        validators = dict()
+        for url, etag, last_modified in self.db.execute('SELECT url, etag, last_modified FROM probes WHERE healthy = 1'):
+            headers = dict()
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+            if headers:
+                validators[url] = headers
+
+        return {url: validators[url] for url in urls if url in validators}
+
+
+    def store(self, results:dict, healthy:set) -> None:
+        """
+        The `store` function saves the results of this run's probes.
+
+        :param results: The `results` parameter is a dictionary of urls to the result returned by `Prober.probe`
+        :type results: dict
+        :param healthy: The `healthy` parameter is the set of urls that had no issues
+        :type healthy: set
+        """
+        now = time()
+        rows = list()
+        for url, res in results.items():
+            if res.get('cached') or res.get('cut_off'): # nothing new was learned about it, keep the time it was actually checked
+                continue
+            rows.append((url, res['status'], res['elapsed'], res.get('etag'), res.get('last_modified'), url in healthy, now, res.get('fingerprint'), res.get('signature')))
+
+        # a probe that didn't read the body (a 304, or the content check is off) keeps the last fingerprint
+        with self.db:
+            self.db.executemany('''
+                INSERT INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET
+                    status = excluded.status, elapsed = excluded.elapsed, etag = excluded.etag, last_modified = excluded.last_modified,
+                    healthy = excluded.healthy, checked_at = excluded.checked_at,
+                    signature = CASE WHEN excluded.fingerprint IS NULL THEN probes.signature ELSE excluded.signature END,
+                    fingerprint = COALESCE(excluded.fingerprint, probes.fingerprint)
+            ''', rows)
+
+
+    def fingerprints(self, urls:list) -> dict:
+        """
+        The `fingerprints` function gets the fingerprint of every url's page from the last time its content
+        was checked.
+
+        :param urls: The `urls` parameter is the list of canonical urls to look up
+        :type urls: list
+        :return: a dictionary of the urls that have one to a dictionary of their `fingerprint` and the error
+        page `signature` it matched (None for a normal page).
+        """
+        fingerprints = {url: {'fingerprint': fingerprint, 'signature': signature} for url, fingerprint, signature in
+                        self.db.execute('SELECT url, fingerprint, signature FROM probes WHERE fingerprint IS NOT NULL')}
+        return {url: fingerprints[url] for url in urls if url in fingerprints}
+
+
+    def last_elapsed(self, urls:list) -> dict:
+        """
+        The `last_elapsed` function gets how long every url took the last time it was probed.
+
+        :param urls: The `urls` parameter is the list of canonical urls to look up
+        :type urls: list
+        :return: a dictionary of the urls that were probed before to their response time in seconds, None
+        for the ones that couldn't be reached.
+        """
+        elapsed = dict(self.db.execute('SELECT url, elapsed FROM probes'))
+        return {url: elapsed[url] for url in urls if url in elapsed}
+
+
+    def previous_rows(self) -> dict:
+        """
+        The `previous_rows` function gets the url every seeker's project had in the last run.
+
+        :return: a dictionary of (coach, seeker, project) to its canonical url.
+        """
+        return {(coach, seeker, proj): url for coach, seeker, proj, url in self.db.execute('SELECT coach, seeker, proj, url FROM rows')}
+
+
+    def carried(self, urls:list, rows:dict, max_age:timedelta) -> dict:
+        """
+        The `carried` function picks the urls a delta run doesn't probe, the ones whose every row is the
+        same as in the last run (same coach, seeker, project and url) and that were healthy when they were
+        last checked. A result is only carried for `max_age`, after that the url is probed again so a site
+        that went down while nobody changed its row is still found.
+
+        :param urls: The `urls` parameter is the list of canonical urls of this run
+        :type urls: list
+        :param rows: The `rows` parameter is a dictionary of (coach, seeker, project) to its canonical url
+        :type rows: dict
+        :param max_age: The `max_age` parameter is how long ago a carried result can have been checked
+        :type max_age: timedelta
+        :return: a dictionary of those urls to their cached result, in the same shape `Prober.probe` returns.
+        """
+        previous = self.previous_rows()
+        changed = {url for row, url in rows.items() if previous.get(row) != url}
+
+        return self.healthy([url for url in urls if url not in changed], time() - max_age.total_seconds())
+
+
+    def store_rows(self, rows:dict) -> None:
+        """
+        The `store_rows` function replaces the saved rows with the ones of this run.
+
+        :param rows: The `rows` parameter is a dictionary of (coach, seeker, project) to its canonical url
+        :type rows: dict
+        """
+        with self.db:
+            self.db.execute('DELETE FROM rows')
+            self.db.executemany('INSERT INTO rows VALUES (?, ?, ?, ?)', ((coach, seeker, proj, url) for (coach, seeker, proj), url in rows.items()))
+
+
+    def evict(self, urls:list) -> int:
+        """
+        The `evict` function drops every url that is no longer in the target report.
+
+        :param urls: The `urls` parameter is the list of canonical urls of this run
+        :type urls: list
+        :return: the number of urls dropped.
+        """
+        with self.db:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS current_urls (url TEXT PRIMARY KEY)')
+            self.db.execute('DELETE FROM current_urls')
+            self.db.executemany('INSERT OR IGNORE INTO current_urls VALUES (?)', ((url,) for url in urls))
+            return self.db.execute('DELETE FROM probes WHERE url NOT IN (SELECT url FROM current_urls)').rowcount
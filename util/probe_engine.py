@@ -0,0 +1,156 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+from util.telemetry import progress_bar
+
+
+class ProbeEngine:
+
+    def __init__(self, probe, concurrency:int = 256, scheduler = None, deadline:float = None, cutoff_result:dict = None, telemetry = None) -> None:
+        """
+        The ProbeEngine pushes every url of a run through one shared asyncio work queue, with a global
+        limit on how many probes are in flight at once.
+
+        :param probe: The `probe` parameter is a blocking callable that takes a single url and returns
+        the result for it, it is ran on the engine's worker threads
+        :param concurrency: The `concurrency` parameter is the max number of probes in flight at the
+        same time across the whole run, defaults to 256
+        :type concurrency: int (optional)
+        :param scheduler: The `scheduler` parameter is an optional `HostScheduler` that every probe has to
+        get a slot from, throttled urls it asks to retry are put back on the queue
+        :type scheduler: HostScheduler (optional)
+        :param deadline: The `deadline` parameter is the `time.monotonic` time the run has to be done by,
+        jobs that haven't started (or are still waiting on their host) by then are cut off, defaults to
+        None (no deadline)
+        :type deadline: float (optional)
+        :param cutoff_result: The `cutoff_result` parameter is the result every job that was cut off gets
+        :type cutoff_result: dict (optional)
+        :param telemetry: The `telemetry` parameter is an optional `Telemetry` that is kept up to date
+        with every probe and the depth of the queue
+        :type telemetry: Telemetry (optional)
+        """
+        self.probe = probe
+        self.concurrency = max(1, concurrency)
+        self.scheduler = scheduler
+        self.deadline = deadline
+        self.cutoff_result = cutoff_result or dict()
+        self.cut_off = 0
+        self.on_result = None
+        self.telemetry = telemetry
+
+
+    def remaining(self) -> float:
+        """
+        The `remaining` function returns the seconds left until the deadline, or None if there isn't one.
+        """
+        if self.deadline is None:
+            return None
+
+        return max(0.0, self.deadline - monotonic())
+
+
+    def run(self, jobs:dict, on_result = None) -> dict:
+        """
+        The `run` function probes every url in `jobs` and blocks until all of them are done.
+
+        :param jobs: The `jobs` parameter is a dictionary of keys to the url that should be probed for
+        that key, the keys can be anything hashable
+        :type jobs: dict
+        :param on_result: The `on_result` parameter is an optional callable that is given the key and
+        result of every job as soon as it is done, it's called from the event loop's thread. Jobs that
+        were cut off by the deadline were never probed, so they aren't passed to it
+        :return: a dictionary with the same keys as `jobs` and the probe's result for each url as values.
+        """
+        if not jobs:
+            return dict()
+
+        self.on_result = on_result
+        return asyncio.run(self.__run(jobs))
+
+
+    async def __probe(self, loop:asyncio.AbstractEventLoop, pool:ThreadPoolExecutor, url:str) -> dict:
+        """
+        The `__probe` coroutine runs a single probe on the thread pool.
+        """
+        if self.telemetry:
+            self.telemetry.started()
+        result = None
+        try:
+            result = await loop.run_in_executor(pool, self.probe, url)
+            return result
+        finally:
+            if self.telemetry:
+                self.telemetry.finished(url, result)
+
+
+    async def __worker(self, queue:asyncio.Queue, pool:ThreadPoolExecutor, results:dict, errors:list, bar) -> None:
+        """
+        The `__worker` coroutine keeps pulling jobs off the shared queue and runs the probe for each of
+        them on the thread pool until it is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            key, url, attempt = await queue.get()
+            retry = False
+            cut = False
+            try:
+                if self.remaining() == 0:
+                    cut = True
+                elif self.scheduler:
+                    try:
+                        host = await asyncio.wait_for(self.scheduler.acquire(url), self.remaining())
+                    except asyncio.TimeoutError:
+                        cut = True
+                    else:
+                        try:
+                            results[key] = await self.__probe(loop, pool, url)
+                        finally:
+                            retry = await self.scheduler.release(host, results.get(key), attempt)
+                else:
+                    results[key] = await self.__probe(loop, pool, url)
+                
+                if cut:
+                    results[key] = dict(self.cutoff_result)
+                    self.cut_off += 1
+                elif retry: # put it back before marking this one done so the queue never looks empty
+                    queue.put_nowait((key, url, attempt + 1))
+                elif self.on_result:
+                    self.on_result(key, results[key])
+            except Exception as e:
+                errors.append(e) # the probe is expected to handle its own errors, anything here is a bug
+            finally:
+                queue.task_done()
+                if not retry:
+                    bar()
+                    if self.telemetry:
+                        self.telemetry.completed(cut)
+
+
+    async def __run(self, jobs:dict) -> dict:
+        """
+        The `__run` coroutine fills the work queue, starts the workers and waits for the queue to drain.
+        """
+        queue = asyncio.Queue()
+        for key, url in jobs.items():
+            queue.put_nowait((key, url, 0))
+
+        results = dict()
+        errors = list()
+        worker_count = min(self.concurrency, len(jobs))
+        if self.telemetry:
+            self.telemetry.begin(len(jobs), queue.qsize)
+
+        with ThreadPoolExecutor(max_workers=worker_count) as pool, progress_bar(len(jobs), 'Probing sites...') as bar:
+            workers = [asyncio.create_task(self.__worker(queue, pool, results, errors, bar)) for _ in range(worker_count)]
+            await queue.join()
+
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if errors:
+            raise errors[0]
+
+        return results
@@ -0,0 +1,152 @@
+from http.cookiejar import DefaultCookiePolicy
+from time import perf_counter
+
+import requests
+
+from util.fingerprint import CHUNK_BYTES, fingerprint_stream
+from util.scheduler import THROTTLE_STATUS, parse_retry_after
+from util.timed_connection import TimedHTTPAdapter, add_time, start_timing, stop_timing
+
+MODES = ('light', 'full')
+
+
+class Prober:
+
+    def __init__(self, timeout:int = None, mode:str = 'light', pool_size:int = 256, resolver = None, content_kb:int = 0) -> None:
+        """
+        The Prober checks a single url and reports what it found, it's safe to share between threads.
+
+        :param timeout: The `timeout` parameter is the number of seconds to wait on a site before giving up
+        :type timeout: int (optional)
+        :param mode: The `mode` parameter picks how sites are checked. 'light' keeps a pool of keep-alive
+        connections for every host, tries a HEAD first and falls back to a GET that is closed as soon as
+        the headers are in, the reported time is the time to first byte. 'full' sends a GET and downloads
+        the whole page, which is closer to how the script used to check sites.
+        :type mode: str (optional)
+        :param pool_size: The `pool_size` parameter is the max number of connections kept open to a single
+        host, it should match the concurrency of the run
+        :type pool_size: int (optional)
+        :param resolver: The `resolver` parameter is a drop-in for `socket.getaddrinfo` hosts are looked up
+        with, like the `getaddrinfo` of the run's `DNSCache`, defaults to the system resolver
+        :param content_kb: The `content_kb` parameter turns on the content check, the first `content_kb` KB
+        of every page's body are streamed in and fingerprinted to catch the error pages platforms answer
+        with a 200. In 'light' mode the HEAD is skipped so the body comes with the first request, defaults
+        to 0 (no content check)
+        :type content_kb: int (optional)
+        """
+        if mode not in MODES:
+            raise ValueError(f'PROBE MODE ERROR - ({mode}) is not a probe mode, pick from {MODES}')
+
+        self.timeout = timeout
+        self.mode = mode
+        self.content_kb = content_kb
+        self.session = requests.Session()
+
+        # the session is shared by every worker thread, blocking cookies keeps them from racing on the jar
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = TimedHTTPAdapter(pool_connections=1024, pool_maxsize=pool_size, max_retries=0, resolver=resolver)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+
+    def __light_request(self, url:str, headers:dict, timeout:float) -> requests.Response:
+        """
+        The function sends a HEAD request to the url and only falls back to a streamed GET when the HEAD
+        doesn't come back with a 200 (or a 304), since plenty of hosts don't handle HEAD properly.
+        """
+        res = self.session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        res.close() # a HEAD has no body, so the connection goes back to the pool for the next probe
+
+        if res.status_code not in (200, 304):
+            res = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+            res.close() # closing before reading means the body is never downloaded
+
+        return res
+
+
+    def __content_request(self, url:str, headers:dict, timeout:float, result:dict) -> requests.Response:
+        """
+        The function sends a streamed GET request to the url and fingerprints the start of its body, the
+        rest of it is never downloaded.
+        """
+        res = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+        start = perf_counter()
+        try:
+            if res.status_code != 304: # a 304 has no body, the page is the one fingerprinted last time
+                result.update(fingerprint_stream(res.iter_content(CHUNK_BYTES), self.content_kb))
+        finally:
+            res.close()
+            add_time('transfer', perf_counter() - start)
+
+        return res
+
+
+    def __full_request(self, url:str, headers:dict, timeout:float) -> requests.Response:
+        """
+        The function sends a GET request to the url and downloads the whole body, timing the download.
+        """
+        res = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+        start = perf_counter()
+        try:
+            res.content
+        finally:
+            add_time('transfer', perf_counter() - start)
+
+        return res
+
+
+    def probe(self, url:str, headers:dict = None, timeout:float = None) -> dict:
+        """
+        The `probe` function checks the url and returns the result.
+
+        :param url: The `url` parameter is the validated url to check
+        :type url: str
+        :param headers: The `headers` parameter is the conditional request headers (If-None-Match,
+        If-Modified-Since) saved from the url's last healthy result, a 304 for them counts as a 200
+        :type headers: dict (optional)
+        :param timeout: The `timeout` parameter is the timeout for this probe, defaults to the prober's
+        :type timeout: float (optional)
+        :return: a dictionary with the response's `status` and `elapsed` seconds, or the `error`
+        ('timeout' or 'bad_url') and its `message` if the site couldn't be reached. Throttled responses
+        also have the seconds their `Retry-After` asked for in `retry_after`, and the response's ETag and
+        Last-Modified are kept in `etag` and `last_modified`. The seconds spent on every network phase
+        (dns, connect, tls, ttfb, transfer) across the probe's requests are in `phases`. With the content
+        check on, the page's `fingerprint` and the error page `signature` it matched are in the result.
+        """
+        result = {'status': None, 'elapsed': None, 'error': None, 'message': None, 'retry_after': None}
+        timeout = timeout or self.timeout
+        start_timing()
+
+        try:
+            if self.mode == 'full':
+                res = self.__full_request(url, headers, timeout)
+                if self.content_kb and res.status_code != 304:
+                    result.update(fingerprint_stream([res.content], self.content_kb))
+            elif self.content_kb:
+                res = self.__content_request(url, headers, timeout, result)
+            else:
+                res = self.__light_request(url, headers, timeout)
+
+            result['status'] = res.status_code
+            result['elapsed'] = res.elapsed.total_seconds()
+            result['etag'] = res.headers.get('ETag')
+            result['last_modified'] = res.headers.get('Last-Modified')
+
+            if res.status_code == 304 and headers: # nothing changed since the last healthy check
+                result['status'] = 200
+                result['etag'] = result['etag'] or headers.get('If-None-Match')
+                result['last_modified'] = result['last_modified'] or headers.get('If-Modified-Since')
+            if res.status_code in THROTTLE_STATUS:
+                result['retry_after'] = parse_retry_after(res.headers.get('Retry-After'))
+
+        except requests.exceptions.Timeout:
+            result['error'] = 'timeout'
+            result['message'] = f'URL timeout at {timeout:g}s' if timeout else 'URL timeout'
+
+        except Exception as e:
+            result['error'] = 'bad_url'
+            result['message'] = str(e)
+
+        result['phases'] = stop_timing()
+        return result
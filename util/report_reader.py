@@ -0,0 +1,97 @@
+import csv
+import os
+from warnings import simplefilter
+
+# the salesforce headers (and a few shorter names) each column can be found under, see the Readme
+COLUMNS = {
+    'seeker': ('placement: placement name', 'placement name', 'seeker name', 'seeker'),
+    'coach': ('owner name', 'coach name', 'coach'),
+    'status': ('status', 'seeker status'),
+    'solo': ('student account: solo project live link', 'solo project live link', 'solo url', 'solo'),
+    'capstone': ('student account: capstone project live link', 'capstone project live link', 'capstone url', 'capstone'),
+    'group': ('student account: group project live link', 'group project live link', 'group url', 'group'),
+    'email': ('email', 'seeker email'),
+}
+EXTENSIONS = ('.xlsx', '.csv')
+
+
+def map_headers(headers:list) -> dict:
+    """
+    The function finds the column index of every field from the report's header row. If none of the
+    headers are known the columns are expected in the Readme's order.
+    
+    :param headers: The `headers` parameter is the values of the report's first row
+    :type headers: list
+    :return: a dictionary of field names (seeker, coach, status, solo, capstone, group, email) to the
+    index of their column.
+    """
+    normalized = [str(header or '').strip().lower() for header in headers]
+    columns = dict()
+    
+    for field, names in COLUMNS.items():
+        for name in names:
+            if name in normalized:
+                columns[field] = normalized.index(name)
+                break
+            
+    if not columns:
+        return {field: idx for idx, field in enumerate(COLUMNS)}
+    
+    missing = [field for field in COLUMNS if field not in columns]
+    if missing:
+        raise Exception(f'HEADER ERROR - The report is missing the columns for {missing}, the headers found were:\n{headers}')
+    
+    return columns
+
+
+def _xlsx_rows(path:str):
+    """
+    The generator streams the values of every row in the xlsx's active sheet without loading the
+    whole workbook.
+    """
+    import openpyxl # only loaded for xlsx reports
+    
+    simplefilter("ignore") # both simplefilter lines supress the style warning openpyxl throws
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    simplefilter("default")
+    
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _csv_rows(path:str):
+    """
+    The generator streams the values of every row in the csv.
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        yield from csv.reader(file)
+
+
+def read_report(path:str):
+    """
+    The generator reads the target report one row at a time, so memory stays flat no matter how big
+    the export is. Both xlsx and csv exports are read, with the columns found by their header.
+    
+    :param path: The `path` parameter is the path of the report file
+    :type path: str
+    :return: yields a dictionary for every seeker with the seeker, coach, status, solo, capstone, group
+    and email fields.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise Exception(f'INVALID FILE TYPE ERROR - The report has to be one of {EXTENSIONS}, got ({os.path.basename(path)})')
+    
+    rows = _xlsx_rows(path) if ext == '.xlsx' else _csv_rows(path)
+    columns = map_headers(next(rows, []))
+    
+    for row in rows:
+        if not any(val not in (None, '') for val in row): # blank rows at the end of the export
+            continue
+        
+        curr_row = {field: (row[idx] if idx < len(row) else None) for field, idx in columns.items()}
+        if curr_row['coach'] in (None, ' ', ''):
+            curr_row['coach'] = 'Placements'
+            
+        yield curr_row
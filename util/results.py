@@ -0,0 +1,152 @@
+import sys
+from datetime import timedelta
+from enum import Enum
+
+PROJECTS = ('solo', 'capstone', 'group')
+
+
+class Issue(str, Enum):
+    TIME = 'time'
+    STATUS = 'status'
+    TIMEOUT = 'timeout'
+    BAD_URL = 'bad_url'
+    NO_LINK = 'no-link'
+    CONTENT = 'content'
+
+    @property
+    def red_zone(self) -> bool:
+        """
+        Every issue but a slow site means the site isn't working.
+        """
+        return self is not Issue.TIME
+
+
+class ProjectResult:
+    __slots__ = ('url', 'issues', 'phases', 'warmup')
+
+    def __init__(self, url:str = None, issues:dict = None, phases:dict = None, warmup:dict = None) -> None:
+        """
+        The ProjectResult is what was found for one of a seeker's projects.
+
+        :param url: The `url` parameter is the project's url as it is in the report
+        :type url: str (optional)
+        :param issues: The `issues` parameter is a dictionary of the `Issue`s found to their value, the
+        seconds the site took for a `TIME`, the status code for a `STATUS`, the error message for a
+        `TIMEOUT` or `BAD_URL`, True for a `NO_LINK` and the error page that was matched for a `CONTENT`,
+        None when nothing was found
+        :type issues: dict (optional)
+        :param phases: The `phases` parameter is the seconds the probe spent on every network phase
+        :type phases: dict (optional)
+        :param warmup: The `warmup` parameter is what the wake-up probe found when the site was woken up
+        :type warmup: dict (optional)
+        """
+        self.url = url or None
+        self.issues = issues or None
+        self.phases = phases
+        self.warmup = warmup
+
+
+    def cell(self) -> str:
+        """
+        The `cell` function returns the text of the project's cell in the coach's sheet.
+        """
+        if not self.issues:
+            return 'No Issues Found'
+
+        return '\n'.join(f'{issue.value}: {timedelta(seconds=value) if issue is Issue.TIME else value}' for issue, value in self.issues.items())
+
+
+    def to_json(self) -> dict:
+        """
+        The `to_json` function returns the project's issues the way they are in the json output.
+        """
+        return {issue.value: str(value) if issue is Issue.TIME else value for issue, value in (self.issues or dict()).items()}
+
+
+    @classmethod
+    def from_json(cls, data:dict) -> 'ProjectResult':
+        """
+        The `from_json` function builds a project's result back from its issues in the json output.
+        """
+        return cls(issues={Issue(issue): float(value) if issue == Issue.TIME else value for issue, value in data.items()})
+
+
+class SeekerResult:
+    __slots__ = ('name', 'coach', 'status', 'email', 'projects')
+
+    def __init__(self, name:str, coach:str, status:str = None, email:str = None, urls:dict = None) -> None:
+        """
+        The SeekerResult is a seeker from the report and what was found for each of their projects. The
+        coach and status are interned since thousands of seekers share a few dozen of them.
+
+        :param name: The `name` parameter is the seeker's name
+        :type name: str
+        :param coach: The `coach` parameter is the seeker's coach
+        :type coach: str
+        :param status: The `status` parameter is the seeker's status in the report
+        :type status: str (optional)
+        :param email: The `email` parameter is the seeker's email
+        :type email: str (optional)
+        :param urls: The `urls` parameter is a dictionary of the projects to their url in the report
+        :type urls: dict (optional)
+        """
+        self.name = name
+        self.coach = sys.intern(coach)
+        self.status = sys.intern(status) if isinstance(status, str) else status
+        self.email = email
+        self.projects = {proj: ProjectResult((urls or dict()).get(proj)) for proj in PROJECTS}
+
+
+    @property
+    def has_issues(self) -> bool:
+        """
+        True if any of the seeker's projects has an issue.
+        """
+        return any(project.issues for project in self.projects.values())
+
+
+    def row(self) -> list:
+        """
+        The `row` function returns the seeker's row in their coach's sheet.
+        """
+        return [self.name, self.status] + [self.projects[proj].cell() for proj in PROJECTS]
+
+
+    def to_json(self) -> dict:
+        """
+        The `to_json` function returns the seeker the way they are in the json output, the issues of
+        every project along with the seeker's status and email, the network timings of every project that
+        was probed and what the wake-up probes found for the projects that were woken up.
+        """
+        data = {proj: self.projects[proj].to_json() for proj in PROJECTS}
+        data['status'] = self.status
+        data['email'] = self.email
+        data['timings'] = {proj: project.phases for proj, project in self.projects.items() if project.phases}
+
+        warmup = {proj: project.warmup for proj, project in self.projects.items() if project.warmup}
+        if warmup:
+            data['warmup'] = warmup
+
+        return data
+
+
+    @classmethod
+    def from_json(cls, coach:str, name:str, data:dict) -> 'SeekerResult':
+        """
+        The `from_json` function builds a seeker back from their entry in the json output.
+
+        :param coach: The `coach` parameter is the coach the seeker is listed under
+        :type coach: str
+        :param name: The `name` parameter is the seeker's name
+        :type name: str
+        :param data: The `data` parameter is the seeker's entry
+        :type data: dict
+        :return: the seeker, their projects' urls aren't in the json so they are None.
+        """
+        seeker = cls(name, coach, data.get('status'), data.get('email'))
+        for proj in PROJECTS:
+            seeker.projects[proj] = ProjectResult.from_json(data.get(proj) or dict())
+            seeker.projects[proj].phases = (data.get('timings') or dict()).get(proj)
+            seeker.projects[proj].warmup = (data.get('warmup') or dict()).get(proj)
+
+        return seeker
@@ -0,0 +1,260 @@
+'''
+Every run's seekers and probe results are kept in res/run_history.sqlite3, the uploader and the emailer
+find the latest run here. From the repo's root:
+
+    python -m util.run_history runs
+    python -m util.run_history seeker "Jane Doe"
+    python -m util.run_history url https://jane.onrender.com
+    python -m util.run_history down --runs 3
+'''
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from util.results import ProjectResult, SeekerResult
+from util.urls import canonicalize_url
+
+# Constants
+DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+RES = os.path.join(DIR, 'res')
+
+
+class RunHistory:
+
+    def __init__(self, path:str = None) -> None:
+        """
+        The RunHistory keeps every run in a sqlite file in the res folder, a row for the run itself, every
+        seeker in the report, what was found for each of their projects and the probe result of every
+        unique url. The latest run is the last row of `runs` (one seek down its primary key) and the
+        results are indexed by seeker and by url, so looking a seeker or a site up over the runs doesn't
+        load any of the other runs.
+
+        :param path: The `path` parameter is the sqlite file to use, defaults to res/run_history.sqlite3
+        :type path: str (optional)
+        """
+        self.path = path or os.path.join(RES, 'run_history.sqlite3')
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ran_at TEXT NOT NULL,
+                json_path TEXT,
+                xlsx_path TEXT,
+                overview TEXT
+            );
+            CREATE TABLE IF NOT EXISTS seekers (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                coach TEXT NOT NULL,
+                seeker TEXT NOT NULL,
+                status TEXT,
+                email TEXT,
+                PRIMARY KEY (run_id, coach, seeker)
+            );
+            CREATE TABLE IF NOT EXISTS projects (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                coach TEXT NOT NULL,
+                seeker TEXT NOT NULL,
+                proj TEXT NOT NULL,
+                url TEXT,
+                issues TEXT,
+                red_zone INTEGER NOT NULL,
+                PRIMARY KEY (run_id, coach, seeker, proj)
+            );
+            CREATE TABLE IF NOT EXISTS probes (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                url TEXT NOT NULL,
+                status INTEGER,
+                elapsed REAL,
+                error TEXT,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS projects_by_seeker ON projects (seeker, run_id);
+            CREATE INDEX IF NOT EXISTS projects_by_url ON projects (url, run_id);
+            CREATE INDEX IF NOT EXISTS probes_by_url ON probes (url, run_id);
+        ''')
+
+
+    def close(self) -> None:
+        """
+        The `close` function closes the connection to the sqlite file.
+        """
+        self.db.close()
+
+
+    def record(self, seekers_by_coach:dict, url_index:dict, results:dict, overview:dict, json_path:str = None, xlsx_path:str = None) -> int:
+        """
+        The `record` function saves a finished run.
+
+        :param seekers_by_coach: The `seekers_by_coach` parameter is a dictionary of every coach to a
+        dictionary of their seekers' names to their `SeekerResult`
+        :type seekers_by_coach: dict
+        :param url_index: The `url_index` parameter is a dictionary of every canonical url to the
+        (coach, seeker, project) that use it, '' for the projects with no url
+        :type url_index: dict
+        :param results: The `results` parameter is a dictionary of every canonical url to its probe result
+        :type results: dict
+        :param overview: The `overview` parameter is the run's overview
+        :type overview: dict
+        :param json_path: The `json_path` parameter is the run's json output
+        :type json_path: str (optional)
+        :param xlsx_path: The `xlsx_path` parameter is the run's xlsx output
+        :type xlsx_path: str (optional)
+        :return: the id of the run.
+        """
+        with self.db:
+            run_id = self.db.execute('INSERT INTO runs (ran_at, json_path, xlsx_path, overview) VALUES (?, ?, ?, ?)',
+                                     (datetime.now().isoformat(timespec='seconds'), json_path, xlsx_path, json.dumps(overview))).lastrowid
+
+            self.db.executemany('INSERT INTO seekers VALUES (?, ?, ?, ?, ?)', (
+                (run_id, coach, seeker.name, seeker.status, seeker.email)
+                for coach, seekers in seekers_by_coach.items() for seeker in seekers.values()
+            ))
+
+            def projects():
+                for url, refs in url_index.items():
+                    for coach, name, proj in refs:
+                        project = seekers_by_coach[coach][name].projects[proj]
+                        red_zone = any(issue.red_zone for issue in project.issues or dict())
+                        yield (run_id, coach, name, proj, url or None, json.dumps(project.to_json()) if project.issues else None, red_zone)
+            self.db.executemany('INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?, ?)', projects())
+
+            self.db.executemany('INSERT INTO probes VALUES (?, ?, ?, ?, ?)', (
+                (run_id, url, res['status'], res['elapsed'], res['error']) for url, res in results.items()
+            ))
+
+        return run_id
+
+
+    def latest(self) -> dict:
+        """
+        The `latest` function gets the most recent run.
+
+        :return: a dictionary of the run's `id`, `ran_at` (a datetime), `json_path`, `xlsx_path` and
+        `overview`, None if no run was saved yet.
+        """
+        row = self.db.execute('SELECT * FROM runs ORDER BY id DESC LIMIT 1').fetchone()
+        if row is None:
+            return None
+
+        run = dict(row)
+        run['ran_at'] = datetime.fromisoformat(run['ran_at'])
+        run['overview'] = json.loads(run['overview']) if run['overview'] else None
+        return run
+
+
+    def runs(self, limit:int = 10) -> list:
+        """
+        The `runs` function gets the most recent runs, most recent first.
+        """
+        return [dict(row) for row in self.db.execute('SELECT id, ran_at, json_path, xlsx_path FROM runs ORDER BY id DESC LIMIT ?', (limit,))]
+
+
+    def coaches(self, run_id:int) -> dict:
+        """
+        The `coaches` function rebuilds the results of a run.
+
+        :param run_id: The `run_id` parameter is the id of the run
+        :type run_id: int
+        :return: a dictionary of every coach in the run to the list of their seekers with issues as
+        `SeekerResult`s, the coaches without any are there with an empty list.
+        """
+        coaches = {coach: dict() for coach, in self.db.execute('SELECT DISTINCT coach FROM seekers WHERE run_id = ?', (run_id,))}
+
+        rows = self.db.execute('''
+            SELECT p.coach, p.seeker, p.proj, p.url, p.issues, s.status, s.email FROM projects p
+            JOIN seekers s ON s.run_id = p.run_id AND s.coach = p.coach AND s.seeker = p.seeker
+            WHERE p.run_id = ? AND p.seeker IN (SELECT seeker FROM projects WHERE run_id = ? AND issues IS NOT NULL)
+        ''', (run_id, run_id))
+        for row in rows:
+            seeker = coaches[row['coach']].get(row['seeker'])
+            if seeker is None:
+                seeker = coaches[row['coach']][row['seeker']] = SeekerResult(row['seeker'], row['coach'], row['status'], row['email'])
+            seeker.projects[row['proj']] = ProjectResult.from_json(json.loads(row['issues']) if row['issues'] else dict())
+            seeker.projects[row['proj']].url = row['url']
+
+        return {coach: [seeker for seeker in seekers.values() if seeker.has_issues] for coach, seekers in coaches.items()}
+
+
+    def seeker(self, name:str, limit:int = 10) -> list:
+        """
+        The `seeker` function gets what was found for a seeker's projects in the most recent runs.
+
+        :return: a list of dictionaries with the run's `ran_at` and the `coach`, `proj`, `url` and
+        `issues` of each of the seeker's projects, most recent first.
+        """
+        rows = self.db.execute('''
+            SELECT r.ran_at, p.coach, p.proj, p.url, p.issues FROM projects p JOIN runs r ON r.id = p.run_id
+            WHERE p.seeker = ? AND p.run_id IN (SELECT DISTINCT run_id FROM projects WHERE seeker = ? ORDER BY run_id DESC LIMIT ?)
+            ORDER BY p.run_id DESC, p.proj
+        ''', (name, name, limit))
+        return [dict(row, issues=json.loads(row['issues']) if row['issues'] else dict()) for row in rows]
+
+
+    def url(self, url:str, limit:int = 10) -> list:
+        """
+        The `url` function gets the probe results of a url in the most recent runs it was probed in.
+
+        :return: a list of dictionaries with the run's `ran_at` and the `status`, `elapsed` and `error`
+        of the probe, most recent first.
+        """
+        rows = self.db.execute('''
+            SELECT r.ran_at, p.status, p.elapsed, p.error FROM probes p JOIN runs r ON r.id = p.run_id
+            WHERE p.url = ? ORDER BY p.run_id DESC LIMIT ?
+        ''', (url, limit))
+        return [dict(row) for row in rows]
+
+
+    def down(self, runs:int = 3) -> list:
+        """
+        The `down` function finds the projects that had a red zone issue (anything but a slow site) in
+        every one of the most recent runs.
+
+        :param runs: The `runs` parameter is how many of the most recent runs in a row they were down for
+        :type runs: int (optional)
+        :return: a list of dictionaries of the `coach`, `seeker` and `proj` of every project that was down.
+        """
+        recent = [row['id'] for row in self.db.execute('SELECT id FROM runs ORDER BY id DESC LIMIT ?', (runs,))]
+        if len(recent) < runs:
+            return list()
+
+        rows = self.db.execute(f'''
+            SELECT coach, seeker, proj FROM projects WHERE run_id IN ({', '.join('?' * runs)}) AND red_zone = 1
+            GROUP BY coach, seeker, proj HAVING COUNT(*) = ? ORDER BY coach, seeker, proj
+        ''', (*recent, runs))
+        return [dict(row) for row in rows]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Looks up past runs of the Not 200 Club.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('runs', help='list the most recent runs').add_argument('--limit', type=int, default=10)
+    seeker_parser = commands.add_parser('seeker', help='what was found for a seeker\'s projects run to run')
+    seeker_parser.add_argument('name')
+    seeker_parser.add_argument('--limit', type=int, default=10, help='runs to show (default 10)')
+    url_parser = commands.add_parser('url', help='how a site answered run to run')
+    url_parser.add_argument('url')
+    url_parser.add_argument('--limit', type=int, default=10, help='runs to show (default 10)')
+    commands.add_parser('down', help='projects with a red zone issue in each of the last runs').add_argument('--runs', type=int, default=3, help='runs in a row (default 3)')
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(RES, 'run_history.sqlite3')):
+        parser.exit(1, 'HISTORY ERROR - there is no run history in the res folder yet\n')
+    history = RunHistory()
+    if args.command == 'runs':
+        for run in history.runs(args.limit):
+            print(f"{run['id']:>5}  {run['ran_at']}  {run['json_path']}")
+    elif args.command == 'seeker':
+        for row in history.seeker(args.name, args.limit):
+            issues = ', '.join(f'{issue}: {value}' for issue, value in row['issues'].items()) or 'No Issues Found'
+            print(f"{row['ran_at']}  {row['proj']:<9} {issues}  ({row['url']})")
+    elif args.command == 'url':
+        for row in history.url(canonicalize_url(args.url), args.limit):
+            print(f"{row['ran_at']}  status: {row['status']}  elapsed: {row['elapsed']}  error: {row['error']}")
+    else:
+        for row in history.down(args.runs):
+            print(f"{row['coach']}: {row['seeker']} ({row['proj']})")
+    history.close()
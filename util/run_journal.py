@@ -0,0 +1,127 @@
+import json
+import os
+from datetime import date, datetime
+
+# Constants
+DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+RES = os.path.join(DIR, 'res')
+
+
+class RunJournal:
+    
+    def __init__(self, resume:bool = False, path:str = None, read_only:bool = False) -> None:
+        """
+        The RunJournal is an append-only jsonl file of every probe result of a run, written as the results
+        come in. When a run dies part way through, the next one can resume it and only probe what's missing.
+        
+        :param resume: The `resume` parameter picks up the run in the journal instead of starting a new
+        one, a new run is started if there is no journal, or its run finished or didn't start today
+        :type resume: bool (optional)
+        :param path: The `path` parameter is the journal file to use, defaults to res/run_journal.jsonl
+        :type path: str (optional)
+        :param read_only: The `read_only` parameter only reads the run in the journal, finished or not,
+        and never writes to it (merging the journals of the shards)
+        :type read_only: bool (optional)
+        """
+        self.path = path or os.path.join(RES, 'run_journal.jsonl')
+        self.run_id = None
+        self.results = dict()
+        self.histograms = dict()
+        self.file = None
+        self.resumed = False
+        
+        if read_only:
+            if os.path.exists(self.path):
+                self.__replay(read_only)
+            return
+        
+        if resume and os.path.exists(self.path):
+            self.__replay()
+        self.resumed = self.run_id is not None
+            
+        if self.run_id is None:
+            self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+            self.file = open(self.path, 'w')
+            self.__write({'run': self.run_id, 'started': datetime.now().isoformat()})
+        else:
+            self.file = open(self.path, 'a')
+    
+    
+    def __replay(self, read_only:bool = False) -> None:
+        """
+        The function reads the run id from the journal's first line and every result written for it. A
+        line the last run died half way through writing is cut off so new lines start on a clean one. A run
+        that finished, or that started on another day, isn't resumed, its results are stale.
+        """
+        valid, started, finished = 0, None, False
+        with open(self.path, 'rb') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                
+                valid += len(line)
+                if self.run_id is None:
+                    self.run_id = entry['run']
+                    started = entry.get('started')
+                elif entry['run'] == self.run_id and 'finished' in entry:
+                    finished = True
+                elif entry['run'] == self.run_id and 'url' in entry:
+                    self.results[entry['url']] = entry['result']
+                elif entry['run'] == self.run_id and 'histograms' in entry:
+                    self.histograms = entry['histograms']
+        
+        if read_only:
+            return
+        if finished or not started or started[:10] != date.today().isoformat():
+            self.run_id, self.results, self.histograms = None, dict(), dict()
+            return
+        os.truncate(self.path, valid)
+    
+    
+    def __write(self, entry:dict) -> None:
+        """
+        The function appends a line to the journal and flushes it so it survives the process dying.
+        """
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+    
+    
+    def record(self, url:str, result:dict) -> None:
+        """
+        The `record` function writes a url's probe result to the journal.
+        
+        :param url: The `url` parameter is the canonical url that was probed
+        :type url: str
+        :param result: The `result` parameter is the result returned by `Prober.probe`
+        :type result: dict
+        """
+        self.__write({'run': self.run_id, 'url': url, 'result': result})
+    
+    
+    def record_histograms(self, histograms:dict) -> None:
+        """
+        The `record_histograms` function writes the latency histograms of every result in the journal, a
+        later call replaces them.
+        
+        :param histograms: The `histograms` parameter is a dictionary of tags to their `LatencyHistogram`
+        :type histograms: dict
+        """
+        self.__write({'run': self.run_id, 'histograms': {tag: histogram.to_dict() for tag, histogram in histograms.items()}})
+    
+    
+    def close(self, finished:bool = False) -> None:
+        """
+        The `close` function closes the journal file.
+        
+        :param finished: The `finished` parameter marks the run as done, a finished run is never resumed
+        :type finished: bool (optional)
+        """
+        if self.file is None:
+            return
+        if finished:
+            self.__write({'run': self.run_id, 'finished': datetime.now().isoformat()})
+        self.file.close()
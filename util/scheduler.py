@@ -0,0 +1,228 @@
+import asyncio
+from collections import defaultdict as ddict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from ipaddress import ip_address
+from time import monotonic
+from urllib.parse import urlsplit
+
+# free hosting platforms that put every seeker on a subdomain of their own domain, these are
+# rate limited as one host since the platform sees every request coming from us
+PLATFORM_DOMAINS = (
+    'onrender.com', 'herokuapp.com', 'netlify.app', 'github.io', 'vercel.app', 'glitch.me',
+    'fly.dev', 'pages.dev', 'web.app', 'firebaseapp.com', 'surge.sh', 'railway.app', 'repl.co',
+)
+# free tiers of these platforms put an idle site to sleep, the first request after that waits on a cold start
+COLD_START_DOMAINS = ('onrender.com', 'herokuapp.com', 'glitch.me', 'repl.co', 'fly.dev', 'railway.app')
+THROTTLE_STATUS = (429, 503)
+
+
+def host_key(url:str) -> str:
+    """
+    The function returns the key a url is rate limited under, a platform domain for sites hosted on one
+    of the known platforms, otherwise the last two labels of the host (close enough to the registrable
+    domain for the sites seekers use).
+
+    :param url: The `url` parameter is the url to find the key for
+    :type url: str
+    :return: the host key for the url.
+    """
+    host = urlsplit(url).hostname or ''
+
+    try:
+        ip_address(host)
+        return host
+    except ValueError:
+        pass
+
+    for domain in PLATFORM_DOMAINS:
+        if host == domain or host.endswith('.' + domain):
+            return domain
+
+    return '.'.join(host.split('.')[-2:])
+
+
+def cold_start(url:str) -> bool:
+    """
+    The function checks if a url is hosted on a platform that puts idle sites to sleep.
+    """
+    return host_key(url) in COLD_START_DOMAINS
+
+
+def throttled(result:dict) -> bool:
+    """
+    The function checks if a probe's result is its host throttling us, a 429, or a 503 that says when to
+    come back with a `Retry-After`. A bare 503 is what a crashed Heroku or Render app answers with, it's
+    that site's own status and says nothing about the rest of the platform.
+
+    :param result: The `result` parameter is the result dictionary returned by `Prober.probe`
+    :type result: dict
+    """
+    return result['status'] == 429 or (result['status'] == 503 and result.get('retry_after') is not None)
+
+
+def parse_retry_after(value:str) -> float:
+    """
+    The function reads a `Retry-After` header, which is either a number of seconds or an http date.
+
+    :return: the number of seconds to wait, or None if the header is missing or can't be read.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+
+    def __init__(self, limit:float, rate:float, burst:float) -> None:
+        """
+        The HostState keeps the concurrency cap, token bucket and back off of a single host.
+        """
+        self.limit = limit
+        self.in_flight = 0
+        self.tokens = burst
+        self.rate = rate
+        self.burst = burst
+        self.refilled_at = monotonic()
+        self.blocked_until = 0.0
+        self.waiters = list()
+
+
+    def wake(self) -> None:
+        """
+        The function wakes every probe waiting on the host so they try to take a slot again.
+        """
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.waiters.clear()
+
+
+    def try_take(self) -> float:
+        """
+        The function takes a slot and a token for a probe if the host has both free.
+
+        :return: 0 if a slot was taken, otherwise the seconds to wait before trying again, or None when
+        the host is at its cap and a slot needs to be released first.
+        """
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+
+        self.tokens -= 1
+        self.in_flight += 1
+        return 0
+
+
+class HostScheduler:
+
+    def __init__(self, max_per_host:int = 32, start_per_host:int = 8, rate:float = 20.0, max_retries:int = 3,
+                 healthy_latency:float = 2.0, max_backoff:float = 60.0) -> None:
+        """
+        The HostScheduler sits in front of the probes and keeps every host (or hosting platform) under a
+        concurrency cap and a token bucket. The cap is halved and the host paused when it throttles us, a
+        429 or a 503 with a `Retry-After` (for as long as it asks), and it's widened again while the host
+        answers quickly.
+
+        :param max_per_host: The `max_per_host` parameter is the most probes a host can have in flight
+        :type max_per_host: int (optional)
+        :param start_per_host: The `start_per_host` parameter is the cap every host starts out with
+        :type start_per_host: int (optional)
+        :param rate: The `rate` parameter is how many probes per second a host can be sent, it is also the
+        size of the bucket so a host can get a burst of that many at once
+        :type rate: float (optional)
+        :param max_retries: The `max_retries` parameter is how many times a throttled url is retried
+        before its 429/503 is reported as is, a bare 503 isn't retried
+        :type max_retries: int (optional)
+        :param healthy_latency: The `healthy_latency` parameter is the response time in seconds under
+        which a host is treated as healthy and its cap widened
+        :type healthy_latency: float (optional)
+        :param max_backoff: The `max_backoff` parameter caps how long a host is paused in seconds, no
+        matter what its `Retry-After` asks for
+        :type max_backoff: float (optional)
+        """
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.healthy_latency = healthy_latency
+        self.max_backoff = max_backoff
+        self.hosts = ddict(lambda: HostState(min(start_per_host, max_per_host), rate, rate))
+        self.throttled = 0
+
+
+    async def acquire(self, url:str) -> str:
+        """
+        The `acquire` coroutine waits until the url's host has a free slot and token and takes them.
+
+        :param url: The `url` parameter is the url about to be probed
+        :type url: str
+        :return: the host key the slot was taken from, it needs to be handed back to `release`.
+        """
+        key = host_key(url)
+        state = self.hosts[key]
+
+        # no lock is needed since taking and releasing a slot never await, a plain future per waiter is
+        # used over an asyncio.Condition because a wait on one that's cancelled by the caller's deadline
+        # can get stuck taking the condition's lock back (seen on python 3.11)
+        while (delay := state.try_take()) != 0:
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            try:
+                await asyncio.wait((waiter,), timeout=delay)
+            finally:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+
+        return key
+
+
+    async def release(self, key:str, result:dict, attempt:int) -> bool:
+        """
+        The `release` coroutine hands the slot back and adjusts the host's cap from the probe's result.
+
+        :param key: The `key` parameter is the host key returned by `acquire`
+        :type key: str
+        :param result: The `result` parameter is the result dictionary returned by `Prober.probe`
+        :type result: dict
+        :param attempt: The `attempt` parameter is how many times the url has already been retried
+        :type attempt: int
+        :return: True if the host throttled the probe and the url should be tried again.
+        """
+        state = self.hosts[key]
+        result = result or {'status': None, 'elapsed': None, 'error': None} # the probe raised, nothing to learn from it
+
+        state.in_flight -= 1
+
+        # only the host's own throttling backs it off, a platform key is shared by every seeker's site on
+        # it and one of them timing out or down with a bare 503 (a dead or sleeping site) says nothing
+        # about the others
+        busy = throttled(result)
+        if busy:
+            state.limit = max(1.0, state.limit / 2)
+            self.throttled += 1
+            wait = result.get('retry_after')
+            if wait is None:
+                wait = 2 ** attempt
+            state.blocked_until = max(state.blocked_until, monotonic() + min(wait, self.max_backoff))
+
+        elif result['elapsed'] is not None and result['elapsed'] < self.healthy_latency:
+            state.limit = min(self.max_per_host, state.limit + 1 / state.limit)
+
+        state.wake()
+
+        return busy and attempt < self.max_retries
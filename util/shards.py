@@ -0,0 +1,31 @@
+import re
+from zlib import crc32
+
+
+def parse_shard(value:str) -> tuple:
+    """
+    The function reads a shard given as `i/n`, the i-th of n shards counting from 1.
+
+    :param value: The `value` parameter is the shard, like '2/4'
+    :type value: str
+    :return: the shard as an (i, n) tuple.
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value or '')
+    if not match or not 1 <= int(match[1]) <= int(match[2]):
+        raise ValueError(f'SHARD ERROR - ({value}) is not a shard, it should be i/n with 1 <= i <= n like 2/4')
+
+    return int(match[1]), int(match[2])
+
+
+def shard_of(url:str, shards:int) -> int:
+    """
+    The function picks the shard a url belongs to. It only depends on the url, so every process and
+    every machine splits the urls of a report the same way.
+
+    :param url: The `url` parameter is the canonical url
+    :type url: str
+    :param shards: The `shards` parameter is the number of shards
+    :type shards: int
+    :return: the shard the url is probed in, from 1 to `shards`.
+    """
+    return crc32(url.encode()) % shards + 1
@@ -0,0 +1,188 @@
+import smtplib
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import sleep
+
+SECURITY = ('ssl', 'starttls', 'none')
+
+
+class DeliveryEngine:
+
+    def __init__(self, host:str = 'smtp.gmail.com', port:int = 465, security:str = 'ssl', user:str = None,
+                 password:str = None, connections:int = 4, retries:int = 3, backoff:float = 2.0, timeout:float = 30) -> None:
+        """
+        The DeliveryEngine sends a batch of emails through a small pool of SMTP connections at once. Every
+        connection is opened (and logged into) the first time its thread needs it and reused for the rest
+        of the batch, a message that fails on a connection problem or a temporary (4xx) answer is retried
+        after backing off, on a new connection if the old one broke.
+
+        :param host: The `host` parameter is the SMTP server's host
+        :type host: str (optional)
+        :param port: The `port` parameter is the SMTP server's port
+        :type port: int (optional)
+        :param security: The `security` parameter is how the connection is secured, 'ssl' (SMTP over
+        tls, port 465), 'starttls' (port 587) or 'none' (local test servers)
+        :type security: str (optional)
+        :param user: The `user` parameter is the login of the account, nothing is logged into without it
+        :type user: str (optional)
+        :param password: The `password` parameter is the password of the account
+        :type password: str (optional)
+        :param connections: The `connections` parameter is how many connections send at the same time
+        :type connections: int (optional)
+        :param retries: The `retries` parameter is how many times a failed message is tried again
+        :type retries: int (optional)
+        :param backoff: The `backoff` parameter is the seconds waited before the first retry, it doubles
+        with every retry after that
+        :type backoff: float (optional)
+        :param timeout: The `timeout` parameter is the seconds to wait on the server before giving up
+        :type timeout: float (optional)
+        """
+        if security not in SECURITY:
+            raise ValueError(f'SMTP SECURITY ERROR - ({security}) is not a security mode, pick from {SECURITY}')
+
+        self.host = host
+        self.port = port
+        self.security = security
+        self.user = user
+        self.password = password
+        self.connections = max(1, connections)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.__local = threading.local()
+        self.__servers = list()
+        self.__lock = threading.Lock()
+
+
+    def __connect(self) -> smtplib.SMTP:
+        """
+        The function opens a new connection to the server and logs into it, the connection is closed
+        if that fails.
+        """
+        if self.security == 'ssl':
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+        try:
+            if self.security == 'starttls':
+                server.starttls(context=ssl.create_default_context())
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close() # it's not in the pool yet, nothing else would close it
+            raise
+
+        with self.__lock:
+            self.__servers.append(server)
+        return server
+
+
+    def __server(self) -> smtplib.SMTP:
+        """
+        The function returns the calling thread's connection, opening it if it doesn't have one.
+        """
+        server = getattr(self.__local, 'server', None)
+        if server is None:
+            server = self.__local.server = self.__connect()
+
+        return server
+
+
+    def __drop(self) -> None:
+        """
+        The function throws away the calling thread's connection after it failed, the next message opens
+        a new one.
+        """
+        server = getattr(self.__local, 'server', None)
+        self.__local.server = None
+        if server is not None:
+            with self.__lock:
+                self.__servers.remove(server)
+            try:
+                server.close()
+            except Exception:
+                pass
+
+
+    def __broken(self, error:Exception) -> bool:
+        """
+        The function checks if a failed send left the connection unusable, the server hung up (or said it's
+        closing with a 421) or the socket failed. A refused message leaves it usable, smtplib resets it.
+        """
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421
+
+        return not isinstance(error, smtplib.SMTPRecipientsRefused)
+
+
+    def __retryable(self, error:Exception) -> bool:
+        """
+        The function checks if a failed send could work when tried again, a message the server refused
+        for good (a 5xx answer) won't.
+        """
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return any(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+
+        return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+    def __deliver(self, delivery:dict) -> dict:
+        """
+        The function sends a single message, retrying it until it goes through or runs out of retries.
+
+        :return: the delivery's report row.
+        """
+        report = {'name': delivery['name'], 'recipient': delivery['to'], 'status': 'failed', 'attempts': 0, 'error': None, 'sent_at': None}
+
+        for attempt in range(self.retries + 1):
+            report['attempts'] = attempt + 1
+            try:
+                self.__server().sendmail(delivery['from'], delivery['to'], delivery['message'].as_string())
+                report['status'] = 'sent'
+                report['error'] = None
+                report['sent_at'] = datetime.now().isoformat(timespec='seconds')
+                break
+            except Exception as e:
+                report['error'] = f'{type(e).__name__}: {e}'
+                if self.__broken(e):
+                    self.__drop()
+                if not self.__retryable(e) or attempt == self.retries:
+                    break
+                sleep(self.backoff * 2 ** attempt)
+
+        return report
+
+
+    def send_all(self, deliveries:list, on_done = None) -> list:
+        """
+        The `send_all` function sends every message and waits until all of them are sent or gave up.
+
+        :param deliveries: The `deliveries` parameter is a list of dictionaries with the `name` the email
+        is for, the `from` and `to` addresses and the `message` to send
+        :type deliveries: list
+        :param on_done: The `on_done` parameter is an optional callable given every delivery's report row
+        as soon as it's done
+        :return: the report row of every delivery in the same order, with its `status` ('sent' or
+        'failed'), `attempts`, last `error` and when it was `sent_at`.
+        """
+        def deliver(delivery:dict) -> dict:
+            report = self.__deliver(delivery)
+            if on_done:
+                on_done(report)
+            return report
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.connections, len(deliveries)) or 1) as pool:
+                return list(pool.map(deliver, deliveries))
+        finally:
+            for server in self.__servers:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+            self.__servers.clear()
@@ -0,0 +1,293 @@
+import os
+import sys
+import threading
+from collections import defaultdict as ddict, deque
+from contextlib import contextmanager
+from time import monotonic
+
+from util.scheduler import host_key
+
+# the upper bounds in seconds of the probe duration histogram's buckets
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60)
+# the probes per second (and the ETA) are taken over the probes that finished in this many seconds
+RATE_WINDOW = 30
+# how often the textfile is written again in seconds
+TEXTFILE_INTERVAL = 5
+
+
+def interactive() -> bool:
+    """
+    The function checks if the run is attached to a terminal, it isn't under cron or in a container.
+    """
+    return sys.stdout.isatty()
+
+
+def progress_bar(total:int = None, title:str = None):
+    """
+    The function returns an `alive_bar` for a stage of the run, it's turned off when there's no
+    terminal to draw it on.
+
+    :param total: The `total` parameter is how many items the stage goes over, None when it isn't known
+    :type total: int (optional)
+    :param title: The `title` parameter is the bar's title
+    :type title: str (optional)
+    :return: the bar's context manager, the bar it gives is called once for every item done.
+    """
+    from alive_progress import alive_bar # loaded when a stage starts, not when this module is imported
+
+    return alive_bar(total, title=title, disable=not interactive())
+
+
+class Telemetry:
+
+    def __init__(self) -> None:
+        """
+        The Telemetry keeps live numbers on the run while it's probing, how many urls are done, in flight
+        and still queued, the errors of every host and how long the probes take. They can be served in
+        the Prometheus text format at `/metrics` or written to a textfile every few seconds (for the
+        node exporter's textfile collector), so a run under cron or in a container can be watched.
+        """
+        self.stage = None
+        self.total = 0
+        self.done = 0
+        self.cut_off = 0
+        self.in_flight = 0
+        self.queue_depth = lambda: 0
+        self.host_probes = ddict(int)
+        self.host_errors = ddict(int)
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self.finished_at = deque()
+        self.began_at = None
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__writer = None
+        self.__stop = threading.Event()
+
+
+    def begin(self, total:int, queue_depth = None) -> None:
+        """
+        The `begin` function is called when a pass of probes starts.
+
+        :param total: The `total` parameter is how many urls the pass will probe
+        :type total: int
+        :param queue_depth: The `queue_depth` parameter is an optional callable that returns how many
+        urls are still waiting on the queue
+        """
+        with self.__lock:
+            self.total += total
+            self.began_at = self.began_at or monotonic()
+            self.queue_depth = queue_depth or (lambda: 0)
+
+
+    def started(self) -> None:
+        """
+        The `started` function is called when a probe is sent.
+        """
+        with self.__lock:
+            self.in_flight += 1
+
+
+    def finished(self, url:str, result:dict) -> None:
+        """
+        The `finished` function is called with every probe's result, retried probes included.
+
+        :param url: The `url` parameter is the url that was probed
+        :type url: str
+        :param result: The `result` parameter is the result dictionary returned by `Prober.probe`, None
+        if the probe raised
+        :type result: dict
+        """
+        result = result or {'status': None, 'elapsed': None, 'error': 'raised'}
+        host = host_key(url)
+        error = result['error'] is not None or result['status'] is None or result['status'] >= 400
+        elapsed = result['elapsed']
+
+        with self.__lock:
+            self.in_flight -= 1
+            self.host_probes[host] += 1
+            if error:
+                self.host_errors[host] += 1
+            if elapsed is not None:
+                self.buckets[next((i for i, bound in enumerate(DURATION_BUCKETS) if elapsed <= bound), len(DURATION_BUCKETS))] += 1
+                self.duration_sum += elapsed
+                self.duration_count += 1
+
+
+    def completed(self, cut_off:bool = False) -> None:
+        """
+        The `completed` function is called once for every url that has its final result.
+
+        :param cut_off: The `cut_off` parameter is True when the deadline cut the url off before it was probed
+        :type cut_off: bool (optional)
+        """
+        with self.__lock:
+            self.done += 1
+            self.finished_at.append(monotonic())
+            if cut_off:
+                self.cut_off += 1
+
+
+    def rate(self) -> float:
+        """
+        The `rate` function returns how many urls were done per second over the last `RATE_WINDOW` seconds
+        (or since probing began, if that's sooner).
+        """
+        if self.began_at is None:
+            return 0.0
+
+        now = monotonic()
+        while self.finished_at and self.finished_at[0] < now - RATE_WINDOW:
+            self.finished_at.popleft()
+
+        return len(self.finished_at) / max(1.0, min(RATE_WINDOW, now - self.began_at))
+
+
+    def render(self) -> str:
+        """
+        The `render` function returns every metric in the Prometheus text format.
+        """
+        with self.__lock:
+            rate = self.rate()
+            left = self.total - self.done
+            eta = left / rate if rate else None
+            lines = [
+                '# HELP not200_stage The stage the run is in.',
+                '# TYPE not200_stage gauge',
+            ]
+            if self.stage:
+                lines.append(f'not200_stage{{stage="{self.stage}"}} 1')
+            lines += [
+                '# HELP not200_urls_total The urls the run has to probe.',
+                '# TYPE not200_urls_total gauge',
+                f'not200_urls_total {self.total}',
+                '# HELP not200_urls_done_total The urls that have a result, cut off ones included.',
+                '# TYPE not200_urls_done_total counter',
+                f'not200_urls_done_total {self.done}',
+                '# HELP not200_urls_cut_off_total The urls the deadline cut off before they were probed.',
+                '# TYPE not200_urls_cut_off_total counter',
+                f'not200_urls_cut_off_total {self.cut_off}',
+                '# HELP not200_probes_in_flight The probes waiting on a site right now.',
+                '# TYPE not200_probes_in_flight gauge',
+                f'not200_probes_in_flight {self.in_flight}',
+                '# HELP not200_queue_depth The urls waiting on the queue.',
+                '# TYPE not200_queue_depth gauge',
+                f'not200_queue_depth {self.queue_depth()}',
+                f'# HELP not200_urls_per_second The urls done per second over the last {RATE_WINDOW} seconds.',
+                '# TYPE not200_urls_per_second gauge',
+                f'not200_urls_per_second {rate:g}',
+                '# HELP not200_eta_seconds The seconds until every url is done at the current rate.',
+                '# TYPE not200_eta_seconds gauge',
+                f'not200_eta_seconds {"NaN" if eta is None else round(eta, 1)}',
+                '# HELP not200_host_probes_total The probes sent to every host (or hosting platform).',
+                '# TYPE not200_host_probes_total counter',
+            ]
+            lines += [f'not200_host_probes_total{{host="{host}"}} {count}' for host, count in sorted(self.host_probes.items())]
+            lines += [
+                '# HELP not200_host_errors_total The probes of every host that failed or got a 4xx/5xx.',
+                '# TYPE not200_host_errors_total counter',
+            ]
+            lines += [f'not200_host_errors_total{{host="{host}"}} {self.host_errors[host]}' for host in sorted(self.host_probes)]
+            lines += [
+                '# HELP not200_host_error_ratio The share of every host\'s probes that failed so far.',
+                '# TYPE not200_host_error_ratio gauge',
+            ]
+            lines += [f'not200_host_error_ratio{{host="{host}"}} {self.host_errors[host] / count:g}' for host, count in sorted(self.host_probes.items())]
+            lines += [
+                '# HELP not200_probe_duration_seconds How long the probes took.',
+                '# TYPE not200_probe_duration_seconds histogram',
+            ]
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ('+Inf',), self.buckets):
+                cumulative += count
+                lines.append(f'not200_probe_duration_seconds_bucket{{le="{bound}"}} {cumulative}')
+            lines += [
+                f'not200_probe_duration_seconds_sum {self.duration_sum:g}',
+                f'not200_probe_duration_seconds_count {self.duration_count}',
+            ]
+
+        return '\n'.join(lines) + '\n'
+
+
+    def write_textfile(self, path:str) -> None:
+        """
+        The `write_textfile` function writes every metric to a file, it's written next to it and moved
+        over so a reader never sees half of it.
+        """
+        with open(path + '.tmp', 'w') as file:
+            file.write(self.render())
+        os.replace(path + '.tmp', path)
+
+
+    def __write_every(self, path:str, interval:float) -> None:
+        """
+        The function writes the textfile every `interval` seconds until the telemetry is stopped.
+        """
+        while not self.__stop.wait(interval):
+            self.write_textfile(path)
+
+
+    def serve(self, port:int, host:str = '127.0.0.1') -> None:
+        """
+        The `serve` function serves the metrics at `/metrics` on a thread of its own.
+
+        :param port: The `port` parameter is the port to listen on
+        :type port: int
+        :param host: The `host` parameter is the address to listen on, '0.0.0.0' for it to be scraped
+        from outside a container
+        :type host: str (optional)
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        telemetry = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None: # the scrapes would bury the run's own output
+                pass
+
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.__server.serve_forever, name='telemetry-server', daemon=True).start()
+
+
+    @contextmanager
+    def exporting(self, port:int = None, path:str = None, host:str = '127.0.0.1', interval:float = TEXTFILE_INTERVAL):
+        """
+        The `exporting` context manager serves the metrics and/or writes the textfile while the run is in
+        it, the textfile is written one last time when it's left so it ends with the run's final numbers.
+
+        :param port: The `port` parameter is the port to serve `/metrics` on, None to not serve them
+        :type port: int (optional)
+        :param path: The `path` parameter is the textfile to write, None to not write one
+        :type path: str (optional)
+        :param host: The `host` parameter is the address to serve on
+        :type host: str (optional)
+        :param interval: The `interval` parameter is the seconds between writes of the textfile
+        :type interval: float (optional)
+        """
+        if port is not None:
+            self.serve(port, host)
+        if path:
+            self.__writer = threading.Thread(target=self.__write_every, args=(path, interval), name='telemetry-textfile', daemon=True)
+            self.__writer.start()
+
+        try:
+            yield self
+        finally:
+            self.__stop.set()
+            if self.__writer:
+                self.__writer.join()
+                self.write_textfile(path)
+            if self.__server:
+                self.__server.shutdown()
+                self.__server.server_close()
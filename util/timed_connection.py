@@ -0,0 +1,145 @@
+import socket
+import threading
+from time import perf_counter
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError
+
+from util.metrics import PHASES
+
+
+# the phase times of the probe running on each thread, a connection is only used by one thread at a time
+_timings = threading.local()
+
+
+def start_timing() -> None:
+    """
+    The function starts timing a new probe on the calling thread, every request it makes until
+    `stop_timing` adds to the same phase times.
+    """
+    _timings.phases = dict.fromkeys(PHASES, 0.0)
+
+
+def stop_timing() -> dict:
+    """
+    The function stops timing the calling thread's probe.
+
+    :return: a dictionary of every phase to the seconds spent in it, phases that didn't happen (a reused
+    connection has no dns, connect or tls) are 0.
+    """
+    phases = getattr(_timings, 'phases', None) or dict.fromkeys(PHASES, 0.0)
+    _timings.phases = None
+    return {phase: round(secs, 4) for phase, secs in phases.items()}
+
+
+def add_time(phase:str, secs:float) -> None:
+    """
+    The function adds time to a phase of the calling thread's probe, if one is being timed.
+    """
+    phases = getattr(_timings, 'phases', None)
+    if phases is not None:
+        phases[phase] += secs
+
+
+class TimedHTTPConnection(HTTPConnection):
+
+    # looks the host up, swapped for a `DNSCache.getaddrinfo` by adapters that are given one
+    resolver = staticmethod(socket.getaddrinfo)
+
+    def _new_conn(self) -> socket.socket:
+        """
+        The function resolves the host and opens the tcp connection as two timed steps, the socket is
+        opened to the resolved address so the name isn't looked up a second time.
+        """
+        start = perf_counter()
+        try:
+            addresses = self.resolver(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        finally:
+            resolved = perf_counter()
+            add_time('dns', resolved - start)
+
+        dns_host = self._dns_host
+        try:
+            for idx, (*_, address) in enumerate(addresses):
+                self._dns_host = address[0]
+                try:
+                    return super()._new_conn()
+                except NewConnectionError:
+                    if idx == len(addresses) - 1: # out of addresses to try
+                        raise
+        finally:
+            self._dns_host = dns_host
+            add_time('connect', perf_counter() - resolved)
+
+
+    def getresponse(self):
+        """
+        The function times how long it takes for the response's headers to come back after the request
+        was sent (time to first byte).
+        """
+        start = perf_counter()
+        try:
+            return super().getresponse()
+        finally:
+            add_time('ttfb', perf_counter() - start)
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+
+    def connect(self) -> None:
+        """
+        The function times the tls handshake, which is everything `connect` does after the tcp connection
+        is open.
+        """
+        phases = getattr(_timings, 'phases', None)
+        before = (phases['dns'] + phases['connect']) if phases else 0.0
+        start = perf_counter()
+        try:
+            super().connect()
+        finally:
+            phases = getattr(_timings, 'phases', None)
+            if phases is not None:
+                add_time('tls', perf_counter() - start - (phases['dns'] + phases['connect'] - before))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def _with_resolver(pool_cls:type, resolver) -> type:
+    """
+    The function returns a subclass of the pool whose connections look hosts up with the resolver.
+    """
+    conn_cls = type(pool_cls.ConnectionCls.__name__, (pool_cls.ConnectionCls,), {'resolver': staticmethod(resolver)})
+    return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': conn_cls})
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+
+    def __init__(self, *args, resolver = None, **kwargs) -> None:
+        """
+        The TimedHTTPAdapter is an `HTTPAdapter` whose connections time every network phase.
+
+        :param resolver: The `resolver` parameter is a drop-in for `socket.getaddrinfo` the connections
+        look hosts up with (like `DNSCache.getaddrinfo`), defaults to the system resolver
+        """
+        self.resolver = resolver
+        super().__init__(*args, **kwargs)
+
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        """
+        The function sets up the adapter's pools with the timed connections.
+        """
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+        if self.resolver is not None:
+            self.poolmanager.pool_classes_by_scheme = {scheme: _with_resolver(pool_cls, self.resolver) for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()}
@@ -0,0 +1,80 @@
+import threading
+from collections import defaultdict as ddict
+
+from util.metrics import LatencyHistogram
+from util.scheduler import host_key
+
+
+class TimeoutPolicy:
+
+    def __init__(self, cap:float = 60, floor:float = 15, multiple:float = 4, percentile:float = 95, min_samples:int = 8) -> None:
+        """
+        The TimeoutPolicy picks the timeout of every probe from how fast the url's host (or hosting
+        platform) has answered so far in the run, so a host whose sites answer in a second doesn't keep a
+        worker waiting on one of them for the full timeout. It's safe to share between threads.
+
+        :param cap: The `cap` parameter is the longest timeout, it's also used for hosts that haven't
+        answered enough probes yet, None turns the policy off and every probe goes without a timeout
+        :type cap: float (optional)
+        :param floor: The `floor` parameter is the shortest timeout, it's kept above the 10s a site is
+        reported as slow at so slow sites are still reported as slow rather than as timeouts
+        :type floor: float (optional)
+        :param multiple: The `multiple` parameter is how many times the host's percentile the timeout is
+        :type multiple: float (optional)
+        :param percentile: The `percentile` parameter is the percentile of the host's response times
+        the timeout is a multiple of
+        :type percentile: float (optional)
+        :param min_samples: The `min_samples` parameter is how many probes a host needs before its
+        timeout is picked from them
+        :type min_samples: int (optional)
+        """
+        self.cap = cap
+        self.floor = min(floor, cap) if cap else floor
+        self.multiple = multiple
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.__hosts = ddict(LatencyHistogram)
+        self.__lock = threading.Lock()
+
+
+    def timeout_for(self, url:str) -> float:
+        """
+        The `timeout_for` function returns the timeout to probe the url with.
+
+        :param url: The `url` parameter is the url about to be probed
+        :type url: str
+        :return: the timeout in seconds, or None for no timeout.
+        """
+        if not self.cap: # the run has no timeout, so no host gets one either
+            return None
+
+        with self.__lock:
+            histogram = self.__hosts.get(host_key(url))
+            if histogram is None or histogram.count < self.min_samples:
+                return self.cap
+            observed = histogram.percentile(self.percentile) * self.multiple
+
+        return min(self.cap, max(self.floor, observed))
+
+
+    def record(self, url:str, result:dict, timeout:float) -> None:
+        """
+        The `record` function adds a probe's response time to its host, a probe that timed out counts as
+        having taken the whole timeout.
+
+        :param url: The `url` parameter is the url that was probed
+        :type url: str
+        :param result: The `result` parameter is the result returned by `Prober.probe`
+        :type result: dict
+        :param timeout: The `timeout` parameter is the timeout the url was probed with
+        :type timeout: float
+        """
+        if result['error'] == 'timeout' and timeout:
+            seconds = timeout
+        elif result['elapsed'] is not None:
+            seconds = result['elapsed']
+        else:
+            return
+
+        with self.__lock:
+            self.__hosts[host_key(url)].record(seconds)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+from collections import defaultdict as ddict
+from itertools import count
+
+# Firestore takes at most 500 writes and 10MiB in one batch, and 1MiB in one document
+MAX_BATCH_WRITES = 500
+MAX_BATCH_BYTES = 9 * 1024 * 1024
+MAX_DOC_BYTES = 1024 * 1024 - 1024
+
+
+def doc_size(data:dict) -> int:
+    """
+    The function estimates how many bytes a document takes up, from the size of its json.
+    """
+    return len(json.dumps(data, separators=(',', ':'), default=str).encode())
+
+
+def content_hash(data:dict) -> str:
+    """
+    The function returns the hash of a document's content, the same content always gives the same hash
+    no matter the order of its keys.
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode()).hexdigest()
+
+
+def chunk_docs(docs:dict, max_writes:int = MAX_BATCH_WRITES, max_bytes:int = MAX_BATCH_BYTES):
+    """
+    The `chunk_docs` function splits the documents to write into batches that fit in a single commit.
+
+    :param docs: The `docs` parameter is a dictionary of the document ids to their data
+    :type docs: dict
+    :param max_writes: The `max_writes` parameter is the most documents in a batch
+    :type max_writes: int (optional)
+    :param max_bytes: The `max_bytes` parameter is the most bytes in a batch
+    :type max_bytes: int (optional)
+    :return: a generator of dictionaries of document ids to their data.
+    """
+    batch, size = dict(), 0
+    for doc_id, data in docs.items():
+        doc_bytes = doc_size(data)
+        if doc_bytes > MAX_DOC_BYTES:
+            raise ValueError(f'UPLOAD ERROR - document ({doc_id}) is {doc_bytes} bytes, more than Firestore allows in one document')
+
+        if batch and (len(batch) == max_writes or size + doc_bytes > max_bytes):
+            yield batch
+            batch, size = dict(), 0
+        batch[doc_id] = data
+        size += doc_bytes
+
+    if batch:
+        yield batch
+
+
+class FirestoreBackend:
+
+    def __init__(self, db) -> None:
+        """
+        The FirestoreBackend writes the uploads to Firestore, or to the Firestore emulator when the
+        `FIRESTORE_EMULATOR_HOST` environment variable is set.
+
+        :param db: The `db` parameter is the client returned by `firestore.client()`
+        """
+        self.db = db
+
+
+    def add(self, collection:str, data:dict) -> None:
+        """
+        The `add` function adds a document with a generated id to the collection.
+        """
+        self.db.collection(collection).add(data)
+
+
+    def latest(self, collection:str, order_by:str = 'date') -> dict:
+        """
+        The `latest` function returns the document of the collection that comes last by `order_by`, None
+        if the collection is empty.
+        """
+        for doc in self.db.collection(collection).order_by(order_by, direction='DESCENDING').limit(1).stream():
+            return doc.to_dict()
+
+        return None
+
+
+    def commit(self, collection:str, docs:dict) -> None:
+        """
+        The `commit` function writes every document to the collection in a single batch, replacing the
+        documents that already exist.
+
+        :param collection: The `collection` parameter is the collection to write to
+        :type collection: str
+        :param docs: The `docs` parameter is a dictionary of the document ids to their data
+        :type docs: dict
+        """
+        batch = self.db.batch()
+        for doc_id, data in docs.items():
+            batch.set(self.db.collection(collection).document(doc_id), data)
+        batch.commit()
+
+
+class MemoryBackend:
+
+    def __init__(self) -> None:
+        """
+        The MemoryBackend keeps the uploads in dictionaries, it stands in for Firestore in the tests and
+        keeps every batch it was given so they can be checked.
+        """
+        self.collections = ddict(dict)
+        self.batches = list()
+        self.__ids = count(1)
+
+
+    def add(self, collection:str, data:dict) -> None:
+        self.collections[collection][f'doc-{next(self.__ids)}'] = data
+
+
+    def latest(self, collection:str, order_by:str = 'date') -> dict:
+        docs = sorted(self.collections[collection].values(), key=lambda doc: doc[order_by])
+        return docs[-1] if docs else None
+
+
+    def commit(self, collection:str, docs:dict) -> None:
+        self.batches.append((collection, list(docs)))
+        self.collections[collection].update(docs)
@@ -0,0 +1,29 @@
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url:str) -> str:
+    """
+    The function puts a validated url into one canonical form so the same site listed in slightly
+    different ways (by different seekers) is only checked once. The scheme and host are lowercased, the
+    default port, fragment and trailing slashes are dropped, the path and query are kept as is.
+    
+    :param url: The `url` parameter is a url that already has its scheme, see `Not200Club.__validate_url`
+    :type url: str
+    :return: the canonical url, or an empty string if the url is empty.
+    """
+    if not url:
+        return ''
+    
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    
+    try:
+        if parts.port == DEFAULT_PORTS.get(scheme):
+            netloc = netloc.rsplit(':', 1)[0]
+    except ValueError: # a port that isn't a number, leave it for the probe to report as a bad url
+        pass
+    
+    return urlunsplit((scheme, netloc, parts.path.rstrip('/'), parts.query, ''))